@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Benchmarks dos caminhos quentes: autômato celular, movimento, geração
+inteira, operadores genéticos e checkpoints.
+
+Cada caso roda para cada tamanho de grade (linhas x colunas) e de
+população pedidos; os resultados vão para JSON e podem ser comparados com
+uma execução anterior (baseline), marcando regressões.
+
+Uso:
+    python benchmarks/bench.py                          # Suíte rápida (65x85, 100 e 1000 indivíduos)
+    python benchmarks/bench.py --full                   # Grades até 2000x2000, populações até 50k
+    python benchmarks/bench.py --grid 65x85,500x500 --pop 100,10000
+    python benchmarks/bench.py --only propagar,geracao  # Só alguns casos
+    python benchmarks/bench.py --output atual.json      # Grava os resultados
+    python benchmarks/bench.py --baseline benchmarks/baseline.json   # Compara (sai com 1 se regrediu)
+
+Casos grandes demais para a memória (--max-memory) são pulados e marcados
+no resultado. A geração inteira precisa dos quadros de todos os instantes
+(3 * (linhas + colunas)); --ticks limita o número de instantes para medir
+grades grandes.
+"""
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from src.cellular import read_matrix, propagar, propagar_array, get_local_state
+from src.timeline import Timeline
+from src.config import GOAL_TABLE_FITNESS, PRUNE_DOOMED
+from src.solver import time_to_goal, goal_reachability
+from src.batch import BatchSimulation, encode_genomes
+from src.genetic import (
+    create_population, movimentar, tournament_selection, crossover, mutate,
+    reproduce, next_population, calculate_diversity
+)
+from src.persistence import save_checkpoint, load_checkpoint, restore_population
+
+GRADES_RAPIDAS = ['65x85']
+POPULACOES_RAPIDAS = [100, 1000]
+GRADES_COMPLETAS = ['65x85', '500x500', '2000x2000']
+POPULACOES_COMPLETAS = [100, 1000, 10000, 50000]
+
+# Fração de células verdes das grades geradas (a mesma de matrix.txt)
+DENSIDADE = 0.25
+# Chamadas de get_local_state por repetição
+CONSULTAS = 10000
+# Eventos de aprendizado por indivíduo nos checkpoints
+EVENTOS = 50
+
+
+def make_grid(rows, cols, seed=0):
+    """Grade rows x cols: matrix.txt se tiver esse tamanho, senão aleatória"""
+    arquivo = os.path.join(RAIZ, 'matrix.txt')
+    if os.path.exists(arquivo):
+        matrix = read_matrix(arquivo)
+        if len(matrix) == rows and len(matrix[0]) == cols:
+            return matrix
+
+    rng = np.random.default_rng(seed)
+    grid = (rng.random((rows, cols)) < DENSIDADE).astype(int)
+    grid[:3, :3] = 0
+    grid[-3:, -3:] = 0
+    grid[0, 0] = 3
+    grid[-1, -1] = 4
+    return grid.tolist()
+
+
+def make_population(rows, cols, size, seed=0):
+    """População com genes e tabelas de aprendizado preenchidas"""
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    population = create_population(rows, cols, size)
+    for ind in population:
+        codes = rng.integers(0, 2**50, EVENTOS).tolist()
+        direcoes = rng.integers(0, 4, EVENTOS).tolist()
+        ind.aprendizado.add_many(codes, direcoes, rng.normal(size=EVENTOS).tolist())
+        ind.fitness = float(rng.random() * 100)
+    return population
+
+
+def temp_checkpoint():
+    """Caminho de checkpoint numa pasta temporária (apagada ao sair)"""
+    pasta = tempfile.mkdtemp(prefix='bench_')
+    atexit.register(shutil.rmtree, pasta, True)
+    return os.path.join(pasta, 'checkpoint_bench.npz')
+
+
+# === CASOS ===
+# Cada caso recebe (rows, cols, pop, ticks) e devolve (preparar, rodar):
+# só rodar(*preparar()) é medido.
+
+def caso_propagar(rows, cols, pop, ticks):
+    grid = make_grid(rows, cols)
+    return lambda: (grid,), propagar
+
+
+def caso_propagar_array(rows, cols, pop, ticks):
+    grid = np.array(make_grid(rows, cols), dtype=np.int8)
+    return lambda: (grid,), propagar_array
+
+
+def caso_get_local_state(rows, cols, pop, ticks):
+    matrix = make_grid(rows, cols)
+    rng = np.random.default_rng(0)
+    xs = rng.integers(0, cols, CONSULTAS).tolist()
+    ys = rng.integers(0, rows, CONSULTAS).tolist()
+
+    def rodar():
+        for x, y in zip(xs, ys):
+            get_local_state(matrix, x, y)
+    return lambda: (), rodar
+
+
+def caso_movimentar(rows, cols, pop, ticks):
+    """Um passo de cada indivíduo, partindo de posições livres aleatórias"""
+    matrix = make_grid(rows, cols)
+    population = make_population(rows, cols, pop)
+    end_pos = (cols - 1, rows - 1)
+    livres = np.argwhere(np.array(matrix) != 1)
+    rng = np.random.default_rng(0)
+
+    def preparar():
+        for ind, (y, x) in zip(population, livres[rng.integers(0, len(livres), pop)].tolist()):
+            ind.reset()
+            ind.x, ind.y = x, y
+        return ()
+
+    def rodar():
+        for ind in population:
+            movimentar(matrix, ind, end_pos)
+    return preparar, rodar
+
+
+def caso_geracao(rows, cols, pop, ticks):
+    """Geração headless como em main.run: simulação, aprendizado e reprodução"""
+    matrix = make_grid(rows, cols)
+    timeline = Timeline(matrix, ticks)
+    end_pos = (cols - 1, rows - 1)
+    frames = timeline.arrays(ticks)
+    mascaras = timeline.safe_masks(ticks)
+    tabela = time_to_goal(timeline, end_pos) if GOAL_TABLE_FITNESS else None
+    alcance = goal_reachability(timeline, end_pos) if PRUNE_DOOMED else None
+    population = make_population(rows, cols, pop)
+    rng = np.random.default_rng(0)
+    num_elite = max(2, pop // 10)
+
+    def preparar():
+        return ([ind for ind in population],)
+
+    def rodar(individuos):
+        sim = BatchSimulation(encode_genomes(individuos), end_pos, rows, cols, rng=rng,
+                              caminho=False, tabela=tabela, alcance=alcance)
+        sim.simular(frames, mascaras)
+        sim.finalizar(individuos)
+        genes, origem, fator, _ = reproduce(sim.genomes, sim.fitness, pop, num_elite,
+                                            pop // 10, 0.1, rng)
+        next_population(individuos, genes, origem, fator, rows, cols)
+    return preparar, rodar
+
+
+def caso_tournament_selection(rows, cols, pop, ticks):
+    """Uma seleção por filho da geração"""
+    population = make_population(rows, cols, pop)
+
+    def rodar():
+        for _ in range(pop):
+            tournament_selection(population)
+    return lambda: (), rodar
+
+
+def caso_crossover(rows, cols, pop, ticks):
+    """Casais suficientes para uma geração"""
+    population = make_population(rows, cols, pop)
+    casais = [(population[i], population[-1 - i]) for i in range(pop // 2)]
+
+    def rodar():
+        for pai, mae in casais:
+            crossover(pai, mae, rows, cols)
+    return lambda: (), rodar
+
+
+def caso_mutate(rows, cols, pop, ticks):
+    """Uma mutação em cada indivíduo"""
+    population = make_population(rows, cols, pop)
+
+    def rodar():
+        for ind in population:
+            mutate(ind)
+    return lambda: (), rodar
+
+
+def caso_reproduce(rows, cols, pop, ticks):
+    """Reprodução vetorizada (a usada pelo loop principal)"""
+    rng = np.random.default_rng(0)
+    genomes = rng.integers(0, 4, (pop, 3 * (rows + cols))).astype(np.uint8)
+    fitness = rng.random(pop) * 100
+
+    def rodar():
+        reproduce(genomes, fitness, pop, max(2, pop // 10), pop // 10, 0.1, rng)
+    return lambda: (), rodar
+
+
+def caso_calculate_diversity(rows, cols, pop, ticks):
+    population = make_population(rows, cols, pop)
+    return lambda: (population,), calculate_diversity
+
+
+def caso_save_checkpoint(rows, cols, pop, ticks):
+    population = make_population(rows, cols, pop)
+    arquivo = temp_checkpoint()
+
+    def rodar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_checkpoint(population, {'geracao': 1, 'best_fitness': 0}, arquivo, keep=0)
+    return lambda: (), rodar
+
+
+def caso_load_checkpoint(rows, cols, pop, ticks):
+    population = make_population(rows, cols, pop)
+    arquivo = temp_checkpoint()
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_checkpoint(population, {'geracao': 1, 'best_fitness': 0}, arquivo, keep=0)
+
+    def rodar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            pop_data, _ = load_checkpoint(arquivo)
+        restore_population(pop_data, rows, cols)
+    return lambda: (), rodar
+
+
+def _memoria_populacao(rows, cols, pop):
+    # Genes (bytearray + cópias em matriz) e tabelas de aprendizado
+    return pop * (3 * (rows + cols) * 4 + EVENTOS * 48)
+
+
+# nome -> (caso, usa população, memória estimada em bytes)
+CASOS = {
+    'propagar': (caso_propagar, False, lambda r, c, p, t: r * c * 150),
+    'propagar_array': (caso_propagar_array, False, lambda r, c, p, t: r * c * 20),
+    'get_local_state': (caso_get_local_state, False, lambda r, c, p, t: r * c * 40),
+    'movimentar': (caso_movimentar, True, lambda r, c, p, t: r * c * 40 + _memoria_populacao(r, c, p)),
+    # Quadros, máscaras, alcançabilidade (bits) e tempo até o objetivo (uint16, se usado)
+    'geracao': (caso_geracao, True, lambda r, c, p, t: t * r * c * (3 + 2 * GOAL_TABLE_FITNESS) + 2 * _memoria_populacao(r, c, p)),
+    'tournament_selection': (caso_tournament_selection, True, lambda r, c, p, t: _memoria_populacao(r, c, p)),
+    'crossover': (caso_crossover, True, lambda r, c, p, t: 2 * _memoria_populacao(r, c, p)),
+    'mutate': (caso_mutate, True, lambda r, c, p, t: _memoria_populacao(r, c, p)),
+    'reproduce': (caso_reproduce, True, lambda r, c, p, t: 4 * p * 3 * (r + c)),
+    'calculate_diversity': (caso_calculate_diversity, True, lambda r, c, p, t: 2 * _memoria_populacao(r, c, p)),
+    'save_checkpoint': (caso_save_checkpoint, True, lambda r, c, p, t: 2 * _memoria_populacao(r, c, p)),
+    'load_checkpoint': (caso_load_checkpoint, True, lambda r, c, p, t: 3 * _memoria_populacao(r, c, p)),
+}
+
+
+def medir(preparar, rodar, repeticoes, tempo_maximo):
+    """Tempos (segundos) de até `repeticoes` execuções, parando após tempo_maximo"""
+    tempos = []
+    inicio = time.perf_counter()
+    while len(tempos) < repeticoes:
+        args = preparar()
+        t = time.perf_counter()
+        rodar(*args)
+        tempos.append(time.perf_counter() - t)
+        if time.perf_counter() - inicio > tempo_maximo:
+            break
+    return tempos
+
+
+def chave(resultado):
+    """Identifica o mesmo caso em execuções diferentes"""
+    return f"{resultado['nome']}[{resultado['grade']}|{resultado['populacao']}|{resultado['ticks']}]"
+
+
+def run_suite(nomes, grades, populacoes, ticks=None, repeticoes=5, tempo_maximo=5.0,
+              memoria_maxima=2 * 1024**3):
+    """Roda os casos pedidos para cada grade e população; retorna a lista de resultados"""
+    resultados = []
+    for nome in nomes:
+        caso, usa_populacao, memoria = CASOS[nome]
+        for grade in grades:
+            rows, cols = map(int, grade.lower().split('x'))
+            instantes = 3 * (rows + cols)
+            if ticks:
+                instantes = min(instantes, ticks)
+            for pop in (populacoes if usa_populacao else [None]):
+                resultado = {
+                    'nome': nome, 'grade': grade, 'populacao': pop,
+                    'ticks': instantes if nome == 'geracao' else None,
+                }
+                estimativa = memoria(rows, cols, pop or 0, instantes)
+                if estimativa > memoria_maxima:
+                    resultado['pulado'] = f"memoria estimada {estimativa / 1024**3:.1f} GB"
+                    print(f"[!] {chave(resultado)}: pulado ({resultado['pulado']})")
+                    resultados.append(resultado)
+                    continue
+
+                preparar, rodar = caso(rows, cols, pop, instantes)
+                tempos = medir(preparar, rodar, repeticoes, tempo_maximo)
+                resultado.update({
+                    'repeticoes': len(tempos),
+                    'min': min(tempos),
+                    'mediana': statistics.median(tempos),
+                })
+                print(f"[+] {chave(resultado)}: min={resultado['min'] * 1000:.2f} ms "
+                      f"mediana={resultado['mediana'] * 1000:.2f} ms ({len(tempos)}x)")
+                resultados.append(resultado)
+    return resultados
+
+
+def ambiente():
+    """Onde os números foram medidos (para comparar só o que é comparável)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'data': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'maquina': platform.machine(),
+        'processador': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(atual, baseline, tolerancia):
+    """
+    Compara os tempos mínimos com os da baseline: razão acima de
+    1 + tolerancia é regressão. Retorna a lista de regressões.
+    """
+    base = {chave(r): r for r in baseline['resultados'] if 'min' in r}
+    regressoes = []
+
+    print(f"\n{'caso':<50} {'base (ms)':>11} {'atual (ms)':>11} {'razao':>7}")
+    for r in atual['resultados']:
+        anterior = base.get(chave(r))
+        if anterior is None or 'min' not in r:
+            continue
+        razao = r['min'] / anterior['min']
+        marca = ''
+        if razao > 1 + tolerancia:
+            marca = '  REGRESSAO'
+            regressoes.append(chave(r))
+        elif razao < 1 - tolerancia:
+            marca = '  melhorou'
+        print(f"{chave(r):<50} {anterior['min'] * 1000:>11.2f} {r['min'] * 1000:>11.2f} {razao:>6.2f}x{marca}")
+
+    for campo in ('python', 'numpy', 'maquina', 'cpus'):
+        if baseline['ambiente'].get(campo) != atual['ambiente'].get(campo):
+            print(f"[!] Ambiente diferente da baseline ({campo}: "
+                  f"{baseline['ambiente'].get(campo)} -> {atual['ambiente'].get(campo)})")
+
+    if regressoes:
+        print(f"\n[!] {len(regressoes)} regressao(oes) acima de {tolerancia:.0%}")
+    else:
+        print(f"\n[+] Nenhuma regressao acima de {tolerancia:.0%}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos quentes")
+    parser.add_argument('--full', action='store_true',
+                        help="grades 65x85 a 2000x2000 e populações de 100 a 50k")
+    parser.add_argument('--grid', help="grades separadas por vírgula (ex.: 65x85,500x500)")
+    parser.add_argument('--pop', help="populações separadas por vírgula (ex.: 100,10000)")
+    parser.add_argument('--only', help=f"casos separados por vírgula ({', '.join(CASOS)})")
+    parser.add_argument('--ticks', type=int, help="limita os instantes simulados em 'geracao'")
+    parser.add_argument('--repeat', type=int, default=5, help="execuções por caso (padrão: 5)")
+    parser.add_argument('--max-time', type=float, default=5.0,
+                        help="segundos por caso antes de parar de repetir (padrão: 5)")
+    parser.add_argument('--max-memory', type=float, default=2.0,
+                        help="pula casos que precisariam de mais GB que isso (padrão: 2)")
+    parser.add_argument('--output', help="grava os resultados neste arquivo JSON")
+    parser.add_argument('--baseline', help="compara com os resultados deste arquivo JSON")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="aumento relativo tolerado antes de marcar regressão (padrão: 0.15)")
+    args = parser.parse_args(argv)
+
+    grades = GRADES_COMPLETAS if args.full else GRADES_RAPIDAS
+    populacoes = POPULACOES_COMPLETAS if args.full else POPULACOES_RAPIDAS
+    if args.grid:
+        grades = args.grid.split(',')
+    if args.pop:
+        populacoes = [int(p) for p in args.pop.split(',')]
+    nomes = args.only.split(',') if args.only else list(CASOS)
+    desconhecidos = [n for n in nomes if n not in CASOS]
+    if desconhecidos:
+        parser.error(f"casos desconhecidos: {', '.join(desconhecidos)}")
+
+    resultados = run_suite(nomes, grades, populacoes, args.ticks, args.repeat,
+                           args.max_time, args.max_memory * 1024**3)
+    atual = {'ambiente': ambiente(), 'resultados': resultados}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(atual, f, indent=2)
+        print(f"[+] Resultados salvos em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(atual, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
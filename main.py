@@ -6,21 +6,34 @@ Ponto de entrada principal
 Uso:
     python main.py              # Inicia do zero
     python main.py --load       # Carrega último checkpoint
-    python main.py --load checkpoint_xxx.json  # Carrega checkpoint específico
+    python main.py --load checkpoint_xxx.npz   # Carrega checkpoint específico (.npz ou .json)
     python main.py --list       # Lista checkpoints disponíveis
+    python main.py --workers 8  # Simula cada geração com 8 processos (padrão: 1 por CPU)
+    python main.py --headless   # Sem janela e sem limite de FPS (servidores)
+    python main.py --islands 4  # Modelo de ilhas: 4 subpopulações em processos, com migração
+    python main.py --serve :5555           # Coordenador: gerações avaliadas por workers via TCP
+    python main.py --worker host:5555      # Worker (em qualquer máquina); --workers N processos
+    python main.py --solve      # Caminho ótimo exato (referência para o AG)
 """
-import random
+import os
 import sys
+from functools import partial
+import numpy as np
 from src.config import *
-from src.cellular import read_matrix, propagar
+from src.cellular import read_matrix
+from src.timeline import Timeline
+from src.solver import time_to_goal, goal_reachability
 from src.genetic import (
-    create_individual, create_population, movimentar, fitness_function,
-    tournament_selection, crossover, mutate, calculate_diversity,
-    adaptive_mutation_rate
+    create_population, next_population, reproduce,
+    calculate_diversity, allele_diversity, adaptive_mutation_rate
 )
-from src.visualization import Visualizer
+from src.batch import BatchSimulation, encode_genomes
+from src.parallel import ParallelEvaluator
+from src.cache import FitnessCache
+from src.islands import evolve_islands
+from src.distributed import RemoteEvaluator, parse_address, run_workers
 from src.persistence import (
-    save_checkpoint, load_checkpoint, restore_population, 
+    CheckpointWriter, CheckpointError, load_checkpoint, restore_population,
     list_checkpoints
 )
 
@@ -28,8 +41,83 @@ from src.persistence import (
 AUTOSAVE_INTERVAL = 50
 
 
-def run(load_file=None):
-    """Loop principal do algoritmo genético"""
+def tick_stats(sim, geracao, iteracao, stagnation, best_fitness_ever):
+    """Estatísticas da simulação em andamento, para exibição (O(1) por passo)"""
+    stats = sim.stats
+    return {
+        'geracao': geracao,
+        'iteracao': iteracao,
+        'vivos': stats.vivos,
+        'best': max(best_fitness_ever, stats.best),
+        'avg': stats.avg,
+        'diversity': stats.diversity,
+        'mutation': adaptive_mutation_rate(MUTATION_RATE, stats.diversity, stagnation),
+        'stagnation': stagnation,
+        'progress': stats.progress,
+    }
+
+
+def agents(sim, cores):
+    """Posições e cores dos indivíduos vivos, para desenhar o tabuleiro"""
+    vivos = sim.vivo
+    return sim.x[vivos], sim.y[vivos], cores[vivos]
+
+
+def goal_tables(timeline, end_pos):
+    """
+    Tempo até o objetivo de cada (x, y, t), só se o fitness o usa, e o
+    sim/não em bits para podar quem não tem saída. Retorna (tabela, alcance).
+    """
+    tabela = alcance = None
+    if GOAL_TABLE_FITNESS:
+        tabela = time_to_goal(timeline, end_pos)
+    if PRUNE_DOOMED:
+        alcance = goal_reachability(timeline, end_pos)
+    return tabela, alcance
+
+
+def load_population(load_file, width, height):
+    """
+    População inicial e estado salvo: do checkpoint indicado (True = o mais
+    recente) ou uma população nova se não houver checkpoint.
+    
+    Retorna (population, state).
+    """
+    if load_file == True:
+        checkpoints = list_checkpoints()
+        if checkpoints:
+            load_file = checkpoints[0]['filename']
+            print(f"Usando checkpoint mais recente: {load_file}")
+        else:
+            print("Nenhum checkpoint encontrado. Iniciando do zero.")
+            load_file = None
+    
+    if load_file:
+        try:
+            pop_data, state = load_checkpoint(load_file)
+        except CheckpointError as e:
+            # Não recomeça do zero por cima de um checkpoint que não deu para ler
+            print(f"[!] Checkpoint {load_file} inutilizavel: {e}")
+            sys.exit(1)
+        if pop_data:
+            print(f"Continuando da geracao {state.get('geracao', 0)}...")
+            return restore_population(pop_data, width, height), state
+    
+    return create_population(width, height), {}
+
+
+def run(load_file=None, workers=None, headless=False, generations=None, servidor=None):
+    """
+    Loop principal do algoritmo genético.
+    workers: se informado, cada geração é simulada por um pool de processos
+    servidor: (host, porta) para coordenar workers remotos (ver
+        src/distributed.py); tem precedência sobre workers
+    headless: sem janela (não importa pygame/matplotlib) e sem limite de
+        quadros por segundo; só registra o progresso e salva checkpoints
+    generations: número de gerações a rodar (padrão: até NUM_GENERATIONS)
+    
+    Retorna (population, state) ao terminar.
+    """
     
     # Carrega matriz
     matrix_original = read_matrix('matrix.txt')
@@ -42,133 +130,133 @@ def run(load_file=None):
     print(f"Populacao: {POPULATION_SIZE}")
     print("-" * 50)
     
-    # Inicializa visualização
-    viz = Visualizer(width, height)
+    # O autômato é determinístico: os quadros são calculados uma vez e
+    # reaproveitados por todas as gerações
+    max_iter = 3 * (width + height)
+    timeline = Timeline(matrix_original, max_iter)
     
-    # Variáveis de controle
-    best_fitness_ever = 0
-    best_individual = None
-    last_best = 0
-    stagnation = 0
-    geracao = 0
+    # Tempo até o objetivo (fitness) e alcançabilidade (poda de quem não tem saída)
+    tabela, alcance = goal_tables(timeline, end_pos)
     
-    # Tenta carregar checkpoint se solicitado
-    if load_file:
-        if load_file == True:
-            checkpoints = list_checkpoints()
-            if checkpoints:
-                load_file = checkpoints[0]['filename']
-                print(f"Usando checkpoint mais recente: {load_file}")
-            else:
-                print("Nenhum checkpoint encontrado. Iniciando do zero.")
-                load_file = None
-        
-        if load_file:
-            pop_data, state = load_checkpoint(load_file)
-            if pop_data:
-                population = restore_population(pop_data, width, height)
-                geracao = state.get('geracao', 0)
-                best_fitness_ever = state.get('best_fitness', 0)
-                last_best = state.get('last_best', 0)
-                stagnation = state.get('stagnation', 0)
-                print(f"Continuando da geracao {geracao}...")
-            else:
-                population = create_population(width, height)
-        else:
-            population = create_population(width, height)
-    else:
-        population = create_population(width, height)
+    population, state = load_population(load_file, width, height)
+    geracao = state.get('geracao', 0)
+    best_fitness_ever = state.get('best_fitness', 0)
+    last_best = state.get('last_best', 0)
+    stagnation = state.get('stagnation', 0)
+    
+    rng = np.random.default_rng()
+    
+    # Pool de workers (reaproveitado por todas as gerações)
+    evaluator = None
+    if servidor:
+        evaluator = RemoteEvaluator(servidor, 'matrix.txt', end_pos, width, height, max_iter, tabela,
+                                    alcance=alcance)
+        host, porta = evaluator.endereco
+        print(f"Coordenador em {host}:{porta} (workers: python main.py --worker HOST:{porta})")
+    elif workers:
+        evaluator = ParallelEvaluator(timeline, end_pos, width, height, workers, tabela, alcance)
+        print(f"Avaliacao paralela: {evaluator.workers} workers")
+    
+    # Quadros e movimentos seguros de cada célula, por quadro (só para simular
+    # aqui: com workers eles ficam só com o avaliador)
+    frames = mascaras = None
+    if evaluator is None:
+        mascaras = timeline.safe_masks(max_iter)
+        if headless:
+            frames = timeline.arrays(max_iter)
+    
+    # Resultado por genoma (só com avaliação determinística)
+    cache = FitnessCache() if DETERMINISTIC_EVAL else None
+    
+    def simular(genomes, retomada=None, intervalo=0):
+        """Simula a geração inteira (nos workers, se houver)"""
+        if evaluator is not None:
+            return evaluator.evaluate(genomes, rng, retomada, intervalo)
+        sim = BatchSimulation(genomes, end_pos, width, height, rng=rng, caminho=False,
+                              tabela=tabela, intervalo=intervalo, alcance=alcance)
+        if retomada is not None:
+            sim.retomar(*retomada)
+        return sim.simular(frames, mascaras)
+    
+    def avaliar(genomes):
+        """simular, passando pelo cache de fitness se ativo"""
+        if cache is None:
+            return simular(genomes)
+        sim = BatchSimulation(genomes, end_pos, width, height, caminho=False, tabela=tabela)
+        return cache.evaluate(sim, simular)
+    
+    # Checkpoints gravados em segundo plano
+    writer = CheckpointWriter()
+    
+    # Inicializa visualização
+    viz = None
+    if not headless:
+        from src.visualization import Visualizer
+        import pygame
+        viz = Visualizer(width, height)
+        clock = pygame.time.Clock()
     
-    import pygame
-    clock = pygame.time.Clock()
+    # Diversidade da geração atual (calculada só quando alguém a usa)
+    diversidade = partial(calculate_diversity, population)
+    
+    last_generation = NUM_GENERATIONS
+    if generations is not None:
+        last_generation = min(geracao + generations, NUM_GENERATIONS)
     
     try:
-        while geracao < NUM_GENERATIONS:
+        while geracao < last_generation:
             # Verifica eventos (fecha janela, etc)
-            if not viz.check_events():
+            if viz is not None and not viz.check_events():
                 print("\n[!] Janela fechada pelo usuario.")
                 break
             
-            # Reset da matriz para cada geração
-            matrix = [row[:] for row in matrix_original]
-            
-            # Reset dos indivíduos
-            for ind in population:
-                ind['posicao'] = {'x': 0, 'y': 0}
-                ind['passos'] = 0
-                ind['vivo'] = True
-                ind['fitness'] = 0
-                ind['colidiu'] = False
-                ind['max_progresso'] = 0
-                ind['caminho'] = []
+            if headless:
+                # Geração inteira de uma vez, na velocidade máxima da CPU
+                sim = avaliar(encode_genomes(population))
+                sim.stats.set_diversity(diversidade)
+                best_fitness_ever = max(best_fitness_ever, sim.stats.best)
             
-            # Simula geração
-            vivos = len(population)
-            iteracao = 0
-            max_iter = 3 * (width + height)
+            elif evaluator is not None:
+                # Geração inteira nos workers: a janela mostra só o resultado
+                sim = avaliar(encode_genomes(population))
+                sim.stats.set_diversity(diversidade)
+                stats = tick_stats(sim, geracao, max_iter - 1, stagnation, best_fitness_ever)
+                best_fitness_ever = stats['best']
+                cores = np.array([ind.cor for ind in population], dtype=np.uint8)
+                viz.draw(timeline.array(max_iter - 1), agents(sim, cores), stats)
             
-            while vivos > 0 and iteracao < max_iter:
-                # Verifica eventos durante simulação também
-                if not viz.check_events():
-                    raise KeyboardInterrupt("Janela fechada")
-                
-                # Propaga autômato celular
-                if iteracao > 0:
-                    matrix = propagar(matrix)
-                
-                # Move indivíduos
-                for ind in population:
-                    if ind['vivo']:
-                        movimentar(matrix, ind, end_pos)
-                        if not ind['vivo']:
-                            ind['fitness'] = fitness_function(ind, end_pos, width, height)
-                            vivos -= 1
-                
-                # Calcula estatísticas para exibição
-                if iteracao % 10 == 0:
-                    diversity = calculate_diversity(population)
-                else:
-                    diversity = viz.history['diversity'][-1] if viz.history['diversity'] else 0.5
-                
-                current_mut = adaptive_mutation_rate(MUTATION_RATE, diversity, stagnation)
-                
-                avg_progress = sum(ind['max_progresso'] for ind in population) / len(population)
-                avg_progress_norm = avg_progress / (width + height)
-                
-                all_fitness = [ind['fitness'] for ind in population if ind['fitness'] > 0]
-                current_best = max(all_fitness) if all_fitness else 0
-                avg_fitness = sum(all_fitness) / len(all_fitness) if all_fitness else 0
-                
-                if current_best > best_fitness_ever:
-                    best_fitness_ever = current_best
-                    best_individual = max(population, key=lambda x: x['fitness'])
-                
-                stats = {
-                    'geracao': geracao,
-                    'iteracao': iteracao,
-                    'vivos': vivos,
-                    'best': best_fitness_ever,
-                    'avg': avg_fitness,
-                    'diversity': diversity,
-                    'mutation': current_mut,
-                    'stagnation': stagnation,
-                    'progress': avg_progress_norm,
-                }
+            else:
+                # Simula geração: toda a população avança em lote
+                sim = BatchSimulation(encode_genomes(population), end_pos, width, height,
+                                      rng=rng, tabela=tabela, alcance=alcance)
+                sim.stats.set_diversity(diversidade)
+                cores = np.array([ind.cor for ind in population], dtype=np.uint8)
+                iteracao = 0
                 
-                viz.draw(matrix, population, stats)
-                clock.tick(60)
-                iteracao += 1
+                while sim.vivos > 0 and iteracao < max_iter:
+                    # Verifica eventos durante simulação também
+                    if not viz.check_events():
+                        raise KeyboardInterrupt("Janela fechada")
+                    
+                    # Move indivíduos no quadro do autômato celular deste instante
+                    matrix = timeline.array(iteracao)
+                    sim.step(matrix, mascaras[iteracao])
+                    
+                    # Estatísticas para exibição (mantidas pela simulação)
+                    stats = tick_stats(sim, geracao, iteracao, stagnation, best_fitness_ever)
+                    best_fitness_ever = stats['best']
+                    
+                    viz.draw(matrix, agents(sim, cores), stats)
+                    clock.tick(60)
+                    iteracao += 1
             
-            # Calcula fitness final para todos
-            for ind in population:
-                if ind['fitness'] == 0:
-                    ind['fitness'] = fitness_function(ind, end_pos, width, height)
+            # Calcula fitness final para todos (e grava aprendizado e caminho)
+            sim.finalizar(population)
             
             # Análise de diversidade e estagnação
-            diversity = calculate_diversity(population)
-            all_fitness = [ind['fitness'] for ind in population]
-            current_best = max(all_fitness)
-            avg_fitness = sum(all_fitness) / len(all_fitness)
+            diversity = sim.stats.diversity
+            current_best = sim.stats.best
+            avg_fitness = sim.stats.avg
             
             if current_best <= last_best:
                 stagnation += 1
@@ -179,26 +267,16 @@ def run(load_file=None):
             current_mut = adaptive_mutation_rate(MUTATION_RATE, diversity, stagnation)
             
             # Atualiza histórico e gráficos
-            avg_progress = sum(ind['max_progresso'] for ind in population) / len(population)
-            avg_progress_norm = avg_progress / (width + height)
+            avg_progress_norm = sim.stats.progress
             
-            viz.update_history(geracao, best_fitness_ever, avg_fitness, diversity, current_mut, avg_progress_norm)
-            
-            if geracao % 5 == 0:
-                viz.update_plots()
+            if viz is not None:
+                viz.update_history(geracao, best_fitness_ever, avg_fitness, diversity, current_mut, avg_progress_norm)
+                
+                if geracao % 5 == 0:
+                    viz.update_plots()
             
             # === SELEÇÃO E REPRODUÇÃO ===
-            population = sorted(population, key=lambda x: x['fitness'], reverse=True)
-            
-            new_population = []
-            
-            # Elitismo
             num_elite = max(2, int(POPULATION_SIZE * ELITISM_RATE))
-            for i in range(num_elite):
-                elite = create_individual(width, height)
-                elite['historico_movimento'] = population[i]['historico_movimento'][:]
-                elite['aprendizado'] = population[i]['aprendizado'].copy()
-                new_population.append(elite)
             
             # Imigração (aumenta se estagnado)
             num_immigrants = int(POPULATION_SIZE * IMMIGRATION_RATE)
@@ -207,33 +285,14 @@ def run(load_file=None):
                 print(f"[!] Estagnacao! Injetando {num_immigrants} novos individuos...")
                 stagnation = 0
             
-            for _ in range(num_immigrants):
-                new_population.append(create_individual(width, height, biased=random.random() < 0.5))
-            
-            # Crossover
-            while len(new_population) < POPULATION_SIZE:
-                pai = tournament_selection(population)
-                mae = tournament_selection(population, exclude=pai)
-                
-                if random.random() < CROSSOVER_RATE:
-                    filho1, filho2 = crossover(pai, mae, width, height)
-                else:
-                    filho1 = create_individual(width, height)
-                    filho1['historico_movimento'] = pai['historico_movimento'][:]
-                    filho2 = create_individual(width, height)
-                    filho2['historico_movimento'] = mae['historico_movimento'][:]
-                
-                # Mutação adaptativa
-                if random.random() < current_mut:
-                    filho1 = mutate(filho1, current_mut)
-                if random.random() < current_mut:
-                    filho2 = mutate(filho2, current_mut)
-                
-                new_population.append(filho1)
-                if len(new_population) < POPULATION_SIZE:
-                    new_population.append(filho2)
+            # Elitismo, imigrantes, crossover e mutação sobre a matriz de genes
+            genomes, origem, fator, contagem = reproduce(
+                sim.genomes, sim.fitness, POPULATION_SIZE, num_elite, num_immigrants,
+                current_mut, rng
+            )
             
-            population = new_population
+            population = next_population(population, genomes, origem, fator, width, height)
+            diversidade = partial(allele_diversity, contagem)
             geracao += 1
             
             # Auto-save a cada AUTOSAVE_INTERVAL gerações
@@ -244,11 +303,12 @@ def run(load_file=None):
                     'last_best': last_best,
                     'stagnation': stagnation,
                 }
-                save_checkpoint(population, state, f"checkpoint_gen{geracao}.json")
+                writer.save(population, state, f"checkpoint_gen{geracao}.npz")
             
             # Log
             if geracao % 10 == 0:
-                print(f"Gen {geracao}: Best={best_fitness_ever:.1f} Avg={avg_fitness:.1f} Div={diversity:.2f} Mut={current_mut:.2f}")
+                cache_info = f" Cache={cache.taxa_acertos:.0%}" if cache is not None else ""
+                print(f"Gen {geracao}: Best={best_fitness_ever:.1f} Avg={avg_fitness:.1f} Div={diversity:.2f} Mut={current_mut:.2f}{cache_info}")
     
     except KeyboardInterrupt:
         print("\n[!] Interrompido!")
@@ -262,27 +322,141 @@ def run(load_file=None):
                 'last_best': last_best,
                 'stagnation': stagnation,
             }
-            save_checkpoint(population, state, f"checkpoint_gen{geracao}.json")
-            
+            writer.save(population, state, f"checkpoint_gen{geracao}.npz")
+        # Espera a gravação em segundo plano terminar antes de sair
+        writer.close()
+        
+        if geracao > 0:
             print("\n" + "=" * 50)
             print("Evolucao pausada/concluida!")
             print(f"Melhor fitness: {best_fitness_ever:.2f}")
-            print(f"Checkpoint salvo: checkpoint_gen{geracao}.json")
+            print(f"Checkpoint salvo: checkpoint_gen{geracao}.npz")
             print(f"Para continuar: python main.py --load")
         
-        viz.quit()
+        if evaluator is not None:
+            evaluator.close()
+        if viz is not None:
+            viz.quit()
+    
+    state = {
+        'geracao': geracao,
+        'best_fitness': best_fitness_ever,
+        'last_best': last_best,
+        'stagnation': stagnation,
+    }
+    return population, state
+
+
+def run_islands(load_file=None, ilhas=ISLANDS, generations=None):
+    """
+    Modelo de ilhas (sem janela): a população é dividida em `ilhas`
+    subpopulações que evoluem em processos separados e trocam os melhores
+    indivíduos a cada MIGRATION_INTERVAL gerações (ver src/islands.py).
+    
+    Retorna (population, state) ao terminar.
+    """
+    matrix_original = read_matrix('matrix.txt')
+    width = len(matrix_original)
+    height = len(matrix_original[0])
+    end_pos = (height - 1, width - 1)
+    
+    print(f"Matriz: {width}x{height}")
+    print(f"Populacao: {POPULATION_SIZE} em {ilhas} ilhas")
+    print(f"Migracao: {MIGRATION_SIZE} individuos a cada {MIGRATION_INTERVAL} geracoes ({MIGRATION_TOPOLOGY})")
+    print("-" * 50)
+    
+    max_iter = 3 * (width + height)
+    timeline = Timeline(matrix_original, max_iter)
+    tabela, alcance = goal_tables(timeline, end_pos)
+    
+    population, state = load_population(load_file, width, height)
+    geracao = state.get('geracao', 0)
+    geracoes = NUM_GENERATIONS - geracao
+    if generations is not None:
+        geracoes = min(generations, geracoes)
+    
+    # Checkpoints da população inteira (as ilhas juntas, na ordem)
+    writer = CheckpointWriter()
+
+    def salvar(population, state):
+        writer.save(population, state, f"checkpoint_gen{state['geracao']}.npz")
+        print(f"[+] Auto-save: checkpoint_gen{state['geracao']}.npz")
+
+    try:
+        population, state = evolve_islands(population, state, timeline, end_pos, width, height,
+                                           tabela, ilhas, geracoes,
+                                           autosave=AUTOSAVE_INTERVAL, salvar=salvar, alcance=alcance)
+        if state['geracao'] > geracao:
+            writer.save(population, state, f"checkpoint_gen{state['geracao']}.npz")
+    finally:
+        writer.close()
+
+    if state['geracao'] > geracao:
+        print("\n" + "=" * 50)
+        print("Evolucao pausada/concluida!")
+        print(f"Melhor fitness: {state['best_fitness']:.2f}")
+        print(f"Checkpoint salvo: checkpoint_gen{state['geracao']}.npz")
+        print(f"Para continuar: python main.py --load --islands {ilhas}")
+    
+    return population, state
+
+
+def run_headless(load_file=None, workers=None, generations=None, servidor=None):
+    """Roda o algoritmo sem interface (para servidores e scripts)"""
+    return run(load_file, workers=workers, headless=True, generations=generations,
+               servidor=servidor)
 
 
 if __name__ == '__main__':
     load_file = None
+    workers = None
+    args = sys.argv[1:]
+    
+    headless = '--headless' in args
+    if headless:
+        args.remove('--headless')
     
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '--load':
-            if len(sys.argv) > 2:
-                load_file = sys.argv[2]
+    if '--workers' in args:
+        i = args.index('--workers')
+        if i + 1 < len(args) and args[i + 1].isdigit():
+            workers = int(args.pop(i + 1))
+        else:
+            workers = os.cpu_count()
+        args.pop(i)
+    
+    ilhas = None
+    if '--islands' in args:
+        i = args.index('--islands')
+        if i + 1 < len(args) and args[i + 1].isdigit():
+            ilhas = int(args.pop(i + 1))
+        else:
+            ilhas = ISLANDS
+        args.pop(i)
+    
+    servidor = None
+    if '--serve' in args:
+        i = args.index('--serve')
+        endereco = args.pop(i + 1) if i + 1 < len(args) and not args[i + 1].startswith('--') else ''
+        servidor = parse_address(endereco)
+        args.pop(i)
+    
+    if '--worker' in args:
+        i = args.index('--worker')
+        endereco = args.pop(i + 1) if i + 1 < len(args) and not args[i + 1].startswith('--') else ''
+        args.pop(i)
+        try:
+            run_workers(parse_address(endereco, 'localhost'), workers or 1)
+        except KeyboardInterrupt:
+            print("\n[!] Worker encerrado.")
+        sys.exit(0)
+    
+    if len(args) > 0:
+        if args[0] == '--load':
+            if len(args) > 1:
+                load_file = args[1]
             else:
                 load_file = True
-        elif sys.argv[1] == '--list':
+        elif args[0] == '--list':
             print("Checkpoints disponiveis:")
             checkpoints = list_checkpoints()
             if checkpoints:
@@ -291,8 +465,18 @@ if __name__ == '__main__':
             else:
                 print("  Nenhum checkpoint encontrado.")
             sys.exit(0)
-        elif sys.argv[1] == '--help':
+        elif args[0] == '--solve':
+            from src.solver import print_solution
+            matrix_original = read_matrix('matrix.txt')
+            width = len(matrix_original)
+            height = len(matrix_original[0])
+            print_solution(Timeline(matrix_original, 3 * (width + height)))
+            sys.exit(0)
+        elif args[0] == '--help':
             print(__doc__)
             sys.exit(0)
     
-    run(load_file)
+    if ilhas:
+        run_islands(load_file, ilhas)
+    else:
+        run(load_file, workers=workers, headless=headless, servidor=servidor)
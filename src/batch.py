@@ -0,0 +1,379 @@
+"""
+Simulação em lote (estrutura de arrays).
+
+Em vez de chamar movimentar para cada indivíduo, posições, passos, estados
+(vivo/colidiu) e progresso de toda a população ficam em arrays NumPy e
+avançam um passo por vez com operações vetorizadas. As regras são as mesmas
+de get_direction_from_learning e movimentar.
+"""
+from array import array
+import numpy as np
+from .config import LEARNING_RATE, GOAL_TABLE_FITNESS, PRUNE_DOOMED, DETERMINISTIC_EVAL
+from .cellular import neighborhood_codes, safe_move_mask
+from .genetic import MOVE_DELTAS, fitness_array
+from .solver import can_reach, goal_proximity
+from .stats import RunningStats
+
+# Deslocamentos por código de movimento (U, D, R, L)
+DX = np.array([dx for dx, dy in MOVE_DELTAS])
+DY = np.array([dy for dx, dy in MOVE_DELTAS])
+
+# Ordem em que a heurística gulosa avalia os movimentos (R, D, L, U)
+GREEDY_ORDER = np.array([2, 1, 3, 0])
+
+# Bit de cada código de movimento na máscara de movimentos seguros
+MOVE_BITS = np.arange(len(MOVE_DELTAS), dtype=np.uint8)
+
+# Sorteios determinísticos (splitmix64): semente inicial e incremento por sorteio
+PREFIX_SEED = np.uint64(0x2545F4914F6CDD1D)
+DRAW_OFFSETS = np.arange(1, 4, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+
+# Estado de cada indivíduo guardado nos snapshots (e usado para retomar)
+CAMPOS_ESTADO = ('x', 'y', 'passos', 'max_progresso', 'vivo', 'colidiu', 'fitness',
+                 'prefixo', 'num_eventos')
+
+
+def mix64(z):
+    """Embaralha os bits de um array uint64 (finalizador do splitmix64)"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def encode_genomes(population):
+    """Junta os genes da população numa matriz uint8 (indivíduos x genes)"""
+    raw = b''.join(ind.historico_movimento for ind in population)
+    return np.frombuffer(raw, dtype=np.uint8).reshape(len(population), -1)
+
+
+class BatchSimulation:
+    """
+    Estado de toda a população durante uma geração.
+    alcance: bits de solver.goal_reachability, usados se informados:
+        podar: quem não consegue mais chegar ao objetivo sai da simulação
+    tabela: tempo até o objetivo (solver.time_to_goal), usada se informada:
+        proximidade: o fitness mede a proximidade pela tabela
+    deterministico: os sorteios da heurística gulosa vêm de um hash dos
+        genes já lidos (prefixo) em vez de rng, então o resultado de cada
+        indivíduo é função só do seu genoma
+    intervalo: em simular, guarda o estado de todos a cada intervalo
+        instantes (snapshots); 0 = não guarda
+    """
+
+    def __init__(self, genomes, end_pos, width, height, rng=None, caminho=True,
+                 tabela=None, podar=PRUNE_DOOMED, proximidade=GOAL_TABLE_FITNESS,
+                 deterministico=DETERMINISTIC_EVAL, intervalo=0, alcance=None):
+        n = len(genomes)
+        self.genomes = genomes
+        self.end_pos = end_pos
+        self.width = width
+        self.height = height
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.tabela = tabela
+        self.alcance = alcance
+        self.podar = podar and alcance is not None
+        self.proximidade = proximidade and tabela is not None
+
+        self.x = np.zeros(n, dtype=np.int32)
+        self.y = np.zeros(n, dtype=np.int32)
+        self.passos = np.zeros(n, dtype=np.int32)
+        self.max_progresso = np.zeros(n, dtype=np.int32)
+        self.vivo = np.ones(n, dtype=bool)
+        self.colidiu = np.zeros(n, dtype=bool)
+        self.fitness = np.zeros(n)
+        self.distancia = width + height
+        self.stats = RunningStats(n, self.distancia)
+        self.prefixo = np.full(n, PREFIX_SEED, dtype=np.uint64) if deterministico else None
+
+        # Aprendizado: (índices, códigos dos estados, direções, deltas) de cada passo,
+        # aplicado nas tabelas dos indivíduos só no fim da geração
+        self.eventos = []
+        self.num_eventos = np.zeros(n, dtype=np.int32)
+
+        # Snapshots: (instante, índices, estado de cada um antes do passo)
+        self.intervalo = intervalo
+        self.snapshots = []
+        self._iniciado = np.ones(n, dtype=bool)
+        self._fim_registrado = np.zeros(n, dtype=bool)
+        # Instante -> índices que retomam a simulação nele (ver retomar)
+        self._espera = {}
+
+        # Posições após cada passo (para reconstruir 'caminho')
+        self.caminho = caminho
+        self._trilha_x = []
+        self._trilha_y = []
+
+    @property
+    def vivos(self):
+        return self.stats.vivos
+
+    def step(self, matrix, mascara=None):
+        """
+        Avança um passo de todos os vivos no quadro matrix (array rows x cols).
+        mascara: safe_move_mask do quadro; se já vier calculada (Timeline), a
+        decisão de cada indivíduo é só leitura nela. Os estados locais são
+        lidos de matrix só nas posições de quem aprende neste passo.
+        Retorna os índices de quem morreu (ou chegou) neste passo, já com fitness.
+        """
+        alive = np.flatnonzero(self.vivo)
+        if len(alive) == 0:
+            return alive
+
+        if mascara is None:
+            mascara = safe_move_mask(matrix)
+        rows, cols = mascara.shape
+        end_x, end_y = self.end_pos
+
+        x, y = self.x[alive], self.y[alive]
+        passos = self.passos[alive]
+        k = len(alive)
+        rows_idx = np.arange(k)
+
+        # Vizinhos seguros nas 4 direções (dentro do mapa e não verdes)
+        safe = ((mascara[y, x][:, None] >> MOVE_BITS) & 1).astype(bool)
+
+        # Movimento do gene, se ainda houver e for seguro
+        gene_size = self.genomes.shape[1]
+        has_gene = passos < gene_size
+        gene = self.genomes[alive, np.minimum(passos, gene_size - 1)].astype(np.intp)
+        gene_ok = has_gene & safe[rows_idx, gene]
+        direcao = gene.copy()
+
+        if self.prefixo is not None:
+            # Hash dos genes lidos até este passo (4 = sem gene)
+            lido = np.where(has_gene, gene, 4).astype(np.uint64)
+            self.prefixo[alive] = mix64(self.prefixo[alive] + lido)
+
+        # Heurística gulosa para os demais
+        fb = np.flatnonzero(~gene_ok)
+        if len(fb):
+            fb_safe = safe[fb][:, GREEDY_ORDER]
+            nx = x[fb, None] + DX[GREEDY_ORDER]
+            ny = y[fb, None] + DY[GREEDY_ORDER]
+            dist = np.abs(end_x - nx) + np.abs(end_y - ny)
+
+            # Melhor: menor distância, empate pela ordem R, D, L, U (sort estável)
+            best = np.argmin(np.where(fb_safe, dist, np.iinfo(dist.dtype).max), axis=1)
+
+            # Aleatório entre os seguros
+            n_safe = fb_safe.sum(axis=1)
+            draw = (self._random(alive[fb], 0) * n_safe).astype(np.intp)
+            rand = np.argmax(np.cumsum(fb_safe, axis=1) > draw[:, None], axis=1)
+
+            # 70% escolhe o melhor, 30% escolhe aleatório entre os seguros
+            col = np.where(self._random(alive[fb], 1) < 0.7, best, rand)
+            chosen = GREEDY_ORDER[col]
+
+            # Sem movimento seguro: tenta o gene, senão direção aleatória
+            stuck = n_safe == 0
+            if self.prefixo is None:
+                aleatoria = self.rng.integers(0, 4, len(fb))
+            else:
+                aleatoria = (self._random(alive[fb], 2) * 4).astype(np.intp)
+            fallback = np.where(has_gene[fb], gene[fb], aleatoria)
+            direcao[fb] = np.where(stuck, fallback, chosen)
+
+        # Nova posição e colisões
+        new_x = x + DX[direcao]
+        new_y = y + DY[direcao]
+        out = (new_x < 0) | (new_x >= cols) | (new_y < 0) | (new_y >= rows)
+        dead = ~safe[rows_idx, direcao]
+        ok = ~dead
+
+        self.colidiu[alive[out]] = True
+        self.vivo[alive[dead]] = False
+
+        # Movimento válido
+        moved = alive[ok]
+        self.x[moved] = new_x[ok]
+        self.y[moved] = new_y[ok]
+        self.passos[moved] += 1
+
+        dist_atual = np.abs(end_x - new_x) + np.abs(end_y - new_y)
+        progresso = self.distancia - dist_atual
+        improved = ok & (progresso > self.max_progresso[alive])
+        if improved.any():
+            ganho = progresso[improved] - self.max_progresso[alive[improved]]
+            self.stats.progrediu(ganho.sum())
+            self.max_progresso[alive[improved]] = progresso[improved]
+
+        # Chegou ao objetivo?
+        goal = ok & (new_x == end_x) & (new_y == end_y)
+        self.vivo[alive[goal]] = False
+
+        # Sem saída: nenhuma sequência segura leva mais ao objetivo
+        doomed = np.zeros(k, dtype=bool)
+        if self.podar:
+            instante = np.minimum(passos[ok] + 1, len(self.alcance) - 1)
+            doomed[ok] = ~can_reach(self.alcance, instante, new_x[ok], new_y[ok])
+            self.vivo[alive[doomed]] = False
+
+        # Aprendizado: negativo ao morrer, positivo ao progredir
+        learn = dead | improved
+        if learn.any():
+            codigos = neighborhood_codes(matrix, x[learn], y[learn])
+            delta = np.where(dead[learn], -LEARNING_RATE, LEARNING_RATE)
+            self.eventos.append((alive[learn], codigos, direcao[learn], delta))
+            self.num_eventos[alive[learn]] += 1
+
+        if self.caminho:
+            self._trilha_x.append(self.x.copy())
+            self._trilha_y.append(self.y.copy())
+
+        # Fitness de quem saiu da simulação neste passo (como em main.run,
+        # sempre por fitness_function)
+        finished = alive[dead | goal | doomed]
+        if len(finished):
+            self.fitness[finished] = self.fitness_of(finished)
+            self.stats.saiu(len(finished))
+            self.stats.avaliado(self.fitness[finished])
+        return finished
+
+    def _random(self, idx, sorteio):
+        """
+        Uniforme em [0, 1) para os indivíduos idx: de rng, ou no modo
+        determinístico do prefixo de cada um (sorteio 0..2 dentro do passo)
+        """
+        if self.prefixo is None:
+            return self.rng.random(len(idx))
+        z = mix64(self.prefixo[idx] + DRAW_OFFSETS[sorteio])
+        return (z >> np.uint64(11)) * 2.0 ** -53
+
+    def simular(self, frames, mascaras=None):
+        """
+        Simula a geração inteira (sem parar a cada passo) nos quadros dados.
+        mascaras: safe_move_mask de cada quadro, já calculadas (Timeline.safe_masks)
+        """
+        inicio = 0 if self.vivo.any() else min(self._espera, default=len(frames))
+        for t in range(inicio, len(frames)):
+            if self.intervalo and t % self.intervalo == 0 and t > 0:
+                self._snapshot(t)
+            acorda = self._espera.pop(t, None)
+            if acorda is not None:
+                self.vivo[acorda] = True
+                self._iniciado[acorda] = True
+            if not self.vivo.any() and not self._espera:
+                break
+            self.step(frames[t], None if mascaras is None else mascaras[t])
+        return self
+
+    def _snapshot(self, t):
+        """Guarda o estado no instante t de quem já está nele (uma vez após sair)"""
+        idx = np.flatnonzero(self._iniciado & ~self._fim_registrado)
+        self._fim_registrado[idx[~self.vivo[idx]]] = True
+        estado = {campo: getattr(self, campo)[idx] for campo in CAMPOS_ESTADO}
+        self.snapshots.append((t, idx, estado))
+
+    def retomar(self, estado, inicio):
+        """
+        Começa indivíduos de um estado salvo em vez do início do mapa: o
+        snapshot (instante inicio) de um genoma com os mesmos inicio
+        primeiros genes, que até ali se comportou exatamente igual (requer
+        deterministico). Os eventos de aprendizado anteriores não entram em
+        eventos; só num_eventos os conta.
+        estado: campo de CAMPOS_ESTADO -> array; inicio: instante de cada
+        indivíduo (0 = começa do início)
+        """
+        inicio = np.asarray(inicio)
+        retoma = np.flatnonzero(inicio > 0)
+        for campo in CAMPOS_ESTADO:
+            getattr(self, campo)[retoma] = estado[campo][retoma]
+
+        acabou = retoma[~self.vivo[retoma]]
+        self.stats.progrediu(self.max_progresso[retoma].sum())
+        self.stats.saiu(len(acabou))
+        self.stats.avaliado(self.fitness[acabou])
+        self._fim_registrado[acabou] = True
+
+        # Quem continua entra na simulação no seu instante
+        continua = retoma[self.vivo[retoma]]
+        self.vivo[continua] = False
+        self._iniciado[continua] = False
+        for t in np.unique(inicio[continua]).tolist():
+            self._espera[t] = continua[inicio[continua] == t]
+
+    def fitness_of(self, idx):
+        """fitness_function vetorizada para os índices idx"""
+        proximidade = None
+        if self.proximidade:
+            proximidade = goal_proximity(self.tabela, self.x[idx], self.y[idx], self.passos[idx])
+        return fitness_array(
+            self.x[idx], self.y[idx], self.max_progresso[idx], self.passos[idx],
+            self.colidiu[idx], self.end_pos, self.width, self.height, proximidade
+        )
+
+    def concluir(self):
+        """Fitness de quem não saiu da simulação até o último passo"""
+        pending = np.flatnonzero(self.fitness == 0)
+        self.fitness[pending] = self.fitness_of(pending)
+        self.stats.avaliado(self.fitness[pending])
+
+    def resultado(self):
+        """Arrays finais da simulação (para enviar entre processos)"""
+        if self.eventos:
+            eventos = tuple(np.concatenate(parte) for parte in zip(*self.eventos))
+        else:
+            eventos = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.int64),
+                       np.zeros(0, dtype=np.intp), np.zeros(0))
+        return {
+            'x': self.x, 'y': self.y, 'passos': self.passos,
+            'max_progresso': self.max_progresso, 'vivo': self.vivo,
+            'colidiu': self.colidiu, 'fitness': self.fitness, 'eventos': eventos,
+            'snapshots': self.snapshots,
+        }
+
+    def absorver(self, inicio, resultado):
+        """Copia o resultado de uma fatia da população (a partir de inicio)"""
+        fim = inicio + len(resultado['x'])
+        for campo in ('x', 'y', 'passos', 'max_progresso', 'vivo', 'colidiu', 'fitness'):
+            getattr(self, campo)[inicio:fim] = resultado[campo]
+        fitness = resultado['fitness']
+        self.stats.saiu(len(fitness) - int(np.count_nonzero(resultado['vivo'])))
+        self.stats.progrediu(resultado['max_progresso'].sum())
+        self.stats.avaliado(fitness[fitness > 0])
+        idx, codes, direcoes, deltas = resultado['eventos']
+        self.eventos.append((idx + inicio, codes, direcoes, deltas))
+        for t, idx, estado in resultado.get('snapshots', ()):
+            self.snapshots.append((t, idx + inicio, estado))
+
+    def sincronizar(self, population):
+        """Copia posição, estado e fitness dos arrays para os indivíduos"""
+        xs, ys = self.x.tolist(), self.y.tolist()
+        passos, progresso = self.passos.tolist(), self.max_progresso.tolist()
+        vivo, colidiu, fitness = self.vivo.tolist(), self.colidiu.tolist(), self.fitness.tolist()
+
+        for i, ind in enumerate(population):
+            ind.x = xs[i]
+            ind.y = ys[i]
+            ind.passos = passos[i]
+            ind.max_progresso = progresso[i]
+            ind.vivo = vivo[i]
+            ind.colidiu = colidiu[i]
+            ind.fitness = fitness[i]
+
+    def finalizar(self, population):
+        """
+        Fim da geração: fitness de quem não saiu da simulação, aprendizado
+        acumulado e caminho percorrido são gravados nos indivíduos.
+        """
+        self.concluir()
+        self.sincronizar(population)
+
+        if self.eventos:
+            # Eventos agrupados por indivíduo (na ordem em que aconteceram)
+            idx, codes, direcoes, deltas = (np.concatenate(parte) for parte in zip(*self.eventos))
+            ordem = np.argsort(idx, kind='stable')
+            idx, codes = idx[ordem], codes[ordem].tolist()
+            direcoes, deltas = direcoes[ordem].tolist(), deltas[ordem].tolist()
+            inicios = np.flatnonzero(np.diff(idx, prepend=-1)).tolist() + [len(idx)]
+            for a, b in zip(inicios[:-1], inicios[1:]):
+                population[idx[a]].aprendizado.add_many(codes[a:b], direcoes[a:b], deltas[a:b])
+        self.eventos = []
+
+        if self.caminho and self._trilha_x:
+            # (indivíduos, passos, 2): posições intercaladas x, y
+            trilha = np.stack((self._trilha_x, self._trilha_y), axis=-1).astype(np.int16)
+            trilha = trilha.transpose(1, 0, 2)
+            for i, ind in enumerate(population):
+                ind.caminho = array('h', trilha[i, :ind.passos].tobytes())
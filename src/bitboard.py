@@ -0,0 +1,76 @@
+"""
+Autômato celular em bitboard (sem NumPy).
+
+A grade inteira vira um único inteiro Python: a célula (i, j) é o bit
+i * stride + j, com stride = cols + 1. A coluna extra fica sempre zerada e
+impede que deslocamentos de 1 bit passem de uma linha para a outra, então
+fora do mapa conta como não-verde, igual a propagar.
+
+Os 8 vizinhos são somados com somadores bit a bit (cada bit de contagem é
+um inteiro), e as regras viram operações AND/XOR sobre esses inteiros.
+"""
+
+
+class Bitboard:
+    """Codifica e propaga quadros guardados como inteiros"""
+
+    def __init__(self, matrix):
+        self.rows = len(matrix)
+        self.cols = len(matrix[0])
+        self.stride = self.cols + 1
+
+        row_mask = (1 << self.cols) - 1
+        self.valid = 0
+        for i in range(self.rows):
+            self.valid |= row_mask << (i * self.stride)
+
+        # Células especiais (início, fim): nunca verdes e nunca mudam
+        self.fixed = 0
+        for i, row in enumerate(matrix):
+            for j, cell in enumerate(row):
+                if cell != 0 and cell != 1:
+                    self.fixed |= 1 << (i * self.stride + j)
+
+        self.bits = self.encode(matrix)
+
+    def encode(self, grid):
+        """Converte a matriz (lista de listas) para o inteiro de células verdes"""
+        bits = 0
+        for i, row in enumerate(grid):
+            row_bits = ''.join('1' if cell == 1 else '0' for cell in reversed(row))
+            bits |= int(row_bits, 2) << (i * self.stride)
+        return bits
+
+    def step(self, bits):
+        """Um passo do autômato (mesmas regras de propagar)"""
+        s = self.stride
+        valid = self.valid
+
+        neighbors = (
+            bits << 1, bits >> 1,
+            bits << s, bits >> s,
+            bits << (s + 1), bits >> (s + 1),
+            bits << (s - 1), bits >> (s - 1),
+        )
+
+        # Contagem de vizinhos verdes em 4 bits (0..8), um inteiro por bit
+        s0 = s1 = s2 = s3 = 0
+        for n in neighbors:
+            carry = n & valid
+            s0, carry = s0 ^ carry, s0 & carry
+            s1, carry = s1 ^ carry, s1 & carry
+            s2, carry = s2 ^ carry, s2 & carry
+            s3 |= carry
+
+        not_s0 = valid ^ (s0 & valid)
+        not_s1 = valid ^ (s1 & valid)
+        not_s2 = valid ^ (s2 & valid)
+        not_s3 = valid ^ (s3 & valid)
+
+        # Nasce com 2, 3 ou 4 vizinhos (0010, 0011, 0100)
+        two_to_four = not_s3 & ((not_s2 & s1) | (s2 & not_s1 & not_s0))
+        # Sobrevive com 4 ou 5 vizinhos (0100, 0101)
+        four_or_five = not_s3 & s2 & not_s1
+
+        white = valid ^ ((bits | self.fixed) & valid)
+        return (white & two_to_four) | (bits & four_or_five)
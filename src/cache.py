@@ -0,0 +1,321 @@
+"""
+Cache de avaliação por genoma.
+
+Com a avaliação determinística (BatchSimulation com deterministico), o
+resultado de um indivíduo depende só do seu genoma. Elites copiadas e
+filhos sem crossover nem mutação repetem genomas já simulados; o cache
+guarda o resultado de cada genoma (posição final, passos, progresso,
+fitness e eventos de aprendizado) pelo hash dos genes e só os genomas
+novos são simulados.
+
+Até o primeiro gene diferente, um filho anda exatamente como o genoma de
+onde veio esse trecho (crossover mantém o início do pai, a mutação muda
+poucas posições). Por isso o cache também guarda o estado de cada
+indivíduo simulado a cada SNAPSHOT_INTERVAL instantes, indexado pelo
+instante t e pelo hash dos t primeiros genes; um genoma novo retoma a
+simulação do snapshot mais adiantado com o mesmo início.
+
+Tudo fica em arrays, um bloco por geração: hashes ordenados (busca com
+searchsorted), um array por campo e os eventos de cada genoma concatenados
+com offsets. Cada geração grava num bloco novo os genomas que usou, então
+descartar os blocos mais antigos funciona como um LRU.
+"""
+from collections import deque
+import numpy as np
+from .batch import CAMPOS_ESTADO, PREFIX_SEED, mix64
+from .config import FITNESS_CACHE_SIZE, SNAPSHOT_INTERVAL
+
+# Campos por indivíduo de BatchSimulation.resultado()
+CAMPOS = ('x', 'y', 'passos', 'max_progresso', 'vivo', 'colidiu', 'fitness')
+
+# Tipo de cada campo do estado (como em BatchSimulation)
+TIPOS_ESTADO = {
+    'x': np.int32, 'y': np.int32, 'passos': np.int32, 'max_progresso': np.int32,
+    'vivo': bool, 'colidiu': bool, 'fitness': float, 'prefixo': np.uint64,
+    'num_eventos': np.int32,
+}
+
+# Valor aleatório de cada (posição, movimento) para o hash dos prefixos
+_ZOBRIST = {}
+
+
+def genome_hashes(genomes):
+    """Hash de 64 bits dos genes de cada linha da matriz de genomas"""
+    n, gene_size = genomes.shape
+    largura = -(-gene_size // 8) * 8
+    dados = np.zeros((n, largura), dtype=np.uint8)
+    dados[:, :gene_size] = genomes
+
+    h = np.full(n, PREFIX_SEED, dtype=np.uint64)
+    for palavra in dados.view(np.uint64).T:
+        h = mix64(h ^ palavra)
+    return h
+
+
+def prefix_hashes(genomes):
+    """
+    Hash de Zobrist de todos os prefixos: coluna j é o hash dos j + 1
+    primeiros genes de cada genoma (soma, módulo 2**64, de um valor
+    aleatório fixo por posição e movimento)
+    """
+    gene_size = genomes.shape[1]
+    tabela = _ZOBRIST.get(gene_size)
+    if tabela is None:
+        rng = np.random.default_rng(gene_size)
+        tabela = _ZOBRIST[gene_size] = rng.integers(0, 2**64, (gene_size, 4), dtype=np.uint64,
+                                                     endpoint=False)
+    return np.cumsum(tabela[np.arange(gene_size), genomes], axis=1, dtype=np.uint64)
+
+
+def _offsets(tamanhos):
+    """Offsets (n + 1) de trechos com os tamanhos dados, concatenados"""
+    return np.concatenate(([0], np.cumsum(tamanhos, dtype=np.int64)))
+
+
+def _fatias(inicios, tamanhos):
+    """Índices dos trechos [inicio, inicio + tamanho) concatenados"""
+    fim = np.cumsum(tamanhos)
+    return np.repeat(inicios - (fim - tamanhos), tamanhos) + np.arange(fim[-1] if len(fim) else 0)
+
+
+def _juntar_eventos(fontes, fonte, inicios, tamanhos):
+    """
+    Eventos (códigos, direções, deltas) formados por trechos de várias
+    fontes: o trecho k vem de fontes[fonte[k]], a partir de inicios[k]
+    """
+    usadas = np.unique(fonte[tamanhos > 0]).tolist()
+    base = np.zeros(len(fontes), dtype=np.int64)
+    base[usadas] = _offsets([len(fontes[f][0]) for f in usadas])[:-1]
+    idx = _fatias(base[fonte] + inicios, tamanhos)
+    return tuple(
+        np.concatenate([fontes[f][k] for f in usadas] or [fontes[0][k][:0]])[idx]
+        for k in range(3)
+    )
+
+
+def _eventos_por_individuo(resultado):
+    """Eventos de BatchSimulation.resultado() agrupados por indivíduo: (offsets, eventos)"""
+    n = len(resultado['x'])
+    idx, codes, direcoes, deltas = resultado['eventos']
+    ordem = np.argsort(idx, kind='stable')
+    offsets = np.searchsorted(idx[ordem], np.arange(n + 1))
+    return offsets, (codes[ordem], direcoes[ordem], deltas[ordem])
+
+
+# Eventos vazios (códigos, direções, deltas)
+SEM_EVENTOS = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.intp), np.zeros(0))
+
+
+class FitnessCache:
+    """
+    Hash do genoma -> resultado da simulação do indivíduo.
+    capacidade: quantos genomas guardar (aproximado: os blocos mais antigos
+        saem inteiros; sempre fica pelo menos a última geração)
+    intervalo: instantes entre snapshots (0 = sem retomada por prefixo)
+    """
+
+    def __init__(self, capacidade=FITNESS_CACHE_SIZE, intervalo=SNAPSHOT_INTERVAL):
+        self.capacidade = capacidade
+        self.intervalo = intervalo
+        self._blocos = deque()
+        self.acertos = 0
+        self.avaliacoes = 0
+        # Genomas que começaram de um snapshot e instantes que não simularam
+        self.retomados = 0
+        self.passos_poupados = 0
+
+    def __len__(self):
+        return sum(len(bloco['chaves']) for bloco in self._blocos)
+
+    def evaluate(self, sim, simular):
+        """
+        Preenche sim (BatchSimulation nova, da população inteira) com o
+        resultado de cada genoma: do cache, ou simulados para os que faltam.
+        simular(genomas, retomada, intervalo) recebe só os genomas distintos
+        que não estão no cache, retoma-os de retomada (ver
+        BatchSimulation.retomar) e retorna a BatchSimulation já simulada
+        (sem finalizar), com snapshots a cada intervalo instantes.
+        """
+        n = len(sim.genomes)
+        if n == 0:
+            return sim
+        chaves, primeiro, inverso = np.unique(genome_hashes(sim.genomes), return_index=True,
+                                              return_inverse=True)
+        inverso = inverso.ravel()
+
+        # Onde está cada genoma distinto: bloco (-1 = falta) e linha nele
+        bloco, linha = self._procurar(chaves)
+        faltam = np.flatnonzero(bloco < 0)
+        self.acertos += n - len(faltam)
+        self.avaliacoes += n
+
+        fontes = list(self._blocos)
+        if len(faltam):
+            novo = self._simular(sim.genomes[primeiro[faltam]], simular)
+            bloco[faltam] = len(fontes)
+            linha[faltam] = np.arange(len(faltam))
+            fontes.append(novo)
+
+        # Bloco desta geração: todos os genomas distintos usados
+        atual = {'chaves': chaves}
+        for campo in CAMPOS:
+            atual[campo] = np.empty(len(chaves), dtype=TIPOS_ESTADO[campo])
+        inicios = np.empty(len(chaves), dtype=np.int64)
+        tamanhos = np.empty(len(chaves), dtype=np.int64)
+        for b in np.unique(bloco).tolist():
+            sel = np.flatnonzero(bloco == b)
+            for campo in CAMPOS:
+                atual[campo][sel] = fontes[b][campo][linha[sel]]
+            offsets = fontes[b]['offsets']
+            inicios[sel] = offsets[linha[sel]]
+            tamanhos[sel] = offsets[linha[sel] + 1] - offsets[linha[sel]]
+        atual['offsets'] = _offsets(tamanhos)
+        atual['eventos'] = _juntar_eventos([f['eventos'] for f in fontes], bloco, inicios, tamanhos)
+        atual['snapshots'] = {}
+        if len(faltam):
+            # Snapshots dos genomas simulados agora, com a linha no bloco atual
+            for t, (ordenados, linhas, estado) in fontes[-1]['snapshots'].items():
+                atual['snapshots'][t] = (ordenados, faltam[linhas], estado)
+        self._guardar(atual)
+
+        # Resultado da população inteira (genomas repetidos incluídos)
+        resultado = {campo: atual[campo][inverso] for campo in CAMPOS}
+        offsets = atual['offsets']
+        tamanhos = offsets[inverso + 1] - offsets[inverso]
+        eventos = _juntar_eventos([atual['eventos']], np.zeros(n, dtype=np.intp),
+                                  offsets[inverso], tamanhos)
+        resultado['eventos'] = (np.repeat(np.arange(n), tamanhos),) + eventos
+        sim.absorver(0, resultado)
+        return sim
+
+    def _procurar(self, chaves):
+        """Bloco (-1 se nenhum) e linha de cada hash, do bloco mais novo ao mais antigo"""
+        bloco = np.full(len(chaves), -1, dtype=np.int64)
+        linha = np.zeros(len(chaves), dtype=np.int64)
+        pendentes = np.arange(len(chaves))
+        for b in range(len(self._blocos) - 1, -1, -1):
+            if len(pendentes) == 0:
+                break
+            ordenados = self._blocos[b]['chaves']
+            pos = np.minimum(np.searchsorted(ordenados, chaves[pendentes]), len(ordenados) - 1)
+            achou = ordenados[pos] == chaves[pendentes]
+            bloco[pendentes[achou]] = b
+            linha[pendentes[achou]] = pos[achou]
+            pendentes = pendentes[~achou]
+        return bloco, linha
+
+    def _simular(self, genomes, simular):
+        """
+        Resultado dos genomas (nenhum no cache) no formato de um bloco,
+        retomando cada um do snapshot mais adiantado com o mesmo prefixo
+        """
+        n = len(genomes)
+        hashes = prefix_hashes(genomes) if self.intervalo else None
+        inicio, estado, origem = self._procurar_prefixos(hashes, n)
+        self.retomados += int(np.count_nonzero(inicio))
+        self.passos_poupados += int(inicio.sum())
+
+        # Quem já tinha saído da simulação no snapshot não precisa simular
+        faltam = np.flatnonzero((inicio == 0) | estado['vivo'])
+        novo = {campo: estado[campo].copy() for campo in CAMPOS}
+
+        tamanhos_sim = np.zeros(n, dtype=np.int64)
+        eventos_sim = SEM_EVENTOS
+        snapshots = []
+        if len(faltam):
+            retomada = None
+            if inicio[faltam].any():
+                retomada = ({campo: valores[faltam] for campo, valores in estado.items()},
+                            inicio[faltam])
+            resultado = simular(genomes[faltam], retomada, self.intervalo).resultado()
+            for campo in CAMPOS:
+                novo[campo][faltam] = resultado[campo]
+            offsets, eventos_sim = _eventos_por_individuo(resultado)
+            tamanhos_sim[faltam] = np.diff(offsets)
+            snapshots = resultado['snapshots']
+
+        # Eventos de cada genoma: os anteriores ao snapshot (no bloco de
+        # origem) seguidos dos simulados agora
+        bloco_origem, inicio_origem, quantos = origem
+        fontes = [b['eventos'] for b in self._blocos] + [eventos_sim]
+        fonte = np.stack((np.maximum(bloco_origem, 0), np.full(n, len(fontes) - 1)), axis=1)
+        inicios = np.stack((inicio_origem, _offsets(tamanhos_sim)[:-1]), axis=1)
+        tamanhos = np.stack((quantos, tamanhos_sim), axis=1)
+        novo['offsets'] = _offsets(tamanhos.sum(axis=1))
+        novo['eventos'] = _juntar_eventos(fontes, fonte.ravel(), inicios.ravel(), tamanhos.ravel())
+        novo['snapshots'] = self._indexar_snapshots(hashes, faltam, snapshots)
+        return novo
+
+    def _procurar_prefixos(self, hashes, n):
+        """
+        Snapshot mais adiantado com o mesmo prefixo para cada genoma.
+        Retorna (inicio, estado, origem): o instante do snapshot (0 = sem
+        snapshot), o estado nele (campo de CAMPOS_ESTADO -> array) e
+        (bloco, início, quantidade) dos eventos anteriores a ele.
+        """
+        inicio = np.zeros(n, dtype=np.int64)
+        estado = {campo: np.zeros(n, dtype=TIPOS_ESTADO[campo]) for campo in CAMPOS_ESTADO}
+        origem = (np.full(n, -1, dtype=np.int64), np.zeros(n, dtype=np.int64),
+                  np.zeros(n, dtype=np.int64))
+        if hashes is None:
+            return inicio, estado, origem
+
+        gene_size = hashes.shape[1]
+        ultimo = max((max(b['snapshots'], default=0) for b in self._blocos), default=0)
+        pendentes = np.arange(n)
+        for t in range(ultimo, 0, -self.intervalo):
+            for b in range(len(self._blocos) - 1, -1, -1):
+                if len(pendentes) == 0:
+                    return inicio, estado, origem
+                snapshot = self._blocos[b]['snapshots'].get(t)
+                if snapshot is None:
+                    continue
+                ordenados, linhas, valores = snapshot
+                chaves = hashes[pendentes, min(t, gene_size) - 1]
+                pos = np.minimum(np.searchsorted(ordenados, chaves), len(ordenados) - 1)
+                achou = ordenados[pos] == chaves
+                if not achou.any():
+                    continue
+
+                quem, pos = pendentes[achou], pos[achou]
+                inicio[quem] = t
+                for campo in CAMPOS_ESTADO:
+                    estado[campo][quem] = valores[campo][pos]
+                origem[0][quem] = b
+                origem[1][quem] = self._blocos[b]['offsets'][linhas[pos]]
+                origem[2][quem] = valores['num_eventos'][pos]
+                pendentes = pendentes[~achou]
+
+        return inicio, estado, origem
+
+    def _indexar_snapshots(self, hashes, simulados, snapshots):
+        """Snapshots por instante: (hashes dos prefixos ordenados, linha do genoma, estado)"""
+        if hashes is None:
+            return {}
+        gene_size = hashes.shape[1]
+        partes = {}
+        for t, idx, estado in snapshots:
+            partes.setdefault(t, []).append((simulados[idx], estado))
+
+        por_instante = {}
+        for t, lista in partes.items():
+            linhas = np.concatenate([l for l, estado in lista])
+            # Uma linha por prefixo (genomas com o mesmo prefixo têm o mesmo estado)
+            ordenados, primeiro = np.unique(hashes[linhas, min(t, gene_size) - 1], return_index=True)
+            if len(ordenados):
+                estado = {campo: np.concatenate([e[campo] for l, e in lista])[primeiro]
+                          for campo in CAMPOS_ESTADO}
+                por_instante[t] = (ordenados, linhas[primeiro], estado)
+        return por_instante
+
+    def _guardar(self, bloco):
+        """Adiciona o bloco e descarta os mais antigos além da capacidade"""
+        self._blocos.append(bloco)
+        total = len(self)
+        while len(self._blocos) > 1 and total > self.capacidade:
+            total -= len(self._blocos.popleft()['chaves'])
+
+    @property
+    def taxa_acertos(self):
+        """Fração das avaliações respondidas pelo cache"""
+        return self.acertos / self.avaliacoes if self.avaliacoes else 0
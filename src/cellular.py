@@ -1,6 +1,8 @@
 """
 Lógica do autômato celular e manipulação da matriz
 """
+import numpy as np
+
 
 def read_matrix(filename):
     """Lê a matriz do arquivo"""
@@ -44,6 +46,34 @@ def propagar(grid):
     return new_grid
 
 
+def propagar_array(grid):
+    """
+    Versão vetorizada de propagar para matrizes NumPy (mesmas regras).
+    A contagem de vizinhos usa fatias deslocadas de uma cópia com borda de
+    zeros, então fora do mapa conta como não-verde. Células com valores
+    diferentes de 0 e 1 (início/fim) nunca mudam.
+    """
+    grid = np.asarray(grid)
+    rows, cols = grid.shape
+    green = grid == 1
+    
+    padded = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = green
+    
+    green_neighbors = np.zeros((rows, cols), dtype=np.uint8)
+    for di in range(3):
+        for dj in range(3):
+            if di == 1 and dj == 1:
+                continue
+            green_neighbors += padded[di:di + rows, dj:dj + cols]
+    
+    new_grid = grid.copy()
+    new_grid[(grid == 0) & (green_neighbors > 1) & (green_neighbors < 5)] = 1
+    new_grid[green & ((green_neighbors < 4) | (green_neighbors > 5))] = 0
+    
+    return new_grid
+
+
 def get_local_state(matrix, x, y, radius=2):
     """
     Obtém o estado local ao redor de uma posição.
@@ -65,6 +95,78 @@ def get_local_state(matrix, x, y, radius=2):
     return tuple(state)
 
 
+# Código de 2 bits de cada valor de célula no estado local: branca, verde,
+# fora do mapa e posições especiais (início/fim)
+CELL_CODES = {0: 0, 1: 1, -1: 2, 3: 3, 4: 3}
+
+# CELL_CODES como tabela indexada por valor + 1 (para arrays NumPy)
+CELL_CODE_TABLE = np.array([2, 0, 1, 0, 3, 3], dtype=np.int64)
+
+
+def encode_state(state):
+    """Empacota o estado local (tupla de get_local_state) num inteiro, 2 bits por célula"""
+    code = 0
+    for i, value in enumerate(state):
+        code |= CELL_CODES[value] << (2 * i)
+    return code
+
+
+def get_state_code(matrix, x, y, radius=2):
+    """
+    Estado local já empacotado (mesmo que encode_state(get_local_state(...))),
+    sem montar a tupla.
+    """
+    rows = len(matrix)
+    cols = len(matrix[0])
+    code = 0
+    shift = 0
+    
+    for ni in range(y - radius, y + radius + 1):
+        row = matrix[ni] if 0 <= ni < rows else None
+        for nj in range(x - radius, x + radius + 1):
+            if row is not None and 0 <= nj < cols:
+                code |= CELL_CODES[row[nj]] << shift
+            else:
+                code |= 2 << shift  # Fora do mapa
+            shift += 2
+    
+    return code
+
+
+def neighborhood_codes(grid, x, y, radius=2):
+    """
+    Código do estado local (get_state_code) nas posições (x, y) do quadro,
+    como array int64. Lê só as vizinhanças pedidas (fora do mapa pelos
+    limites, sem cópia do quadro inteiro).
+    """
+    grid = np.asarray(grid)
+    rows, cols = grid.shape
+    size = 2 * radius + 1
+    dy, dx = np.divmod(np.arange(size * size), size)
+    
+    ny = np.asarray(y)[:, None] + (dy - radius)
+    nx = np.asarray(x)[:, None] + (dx - radius)
+    dentro = (ny >= 0) & (ny < rows) & (nx >= 0) & (nx < cols)
+    valores = grid[np.clip(ny, 0, rows - 1), np.clip(nx, 0, cols - 1)].astype(np.intp)
+    celulas = np.where(dentro, CELL_CODE_TABLE[valores + 1], 2)  # 2: fora do mapa
+    return np.bitwise_or.reduce(celulas << (2 * np.arange(size * size)), axis=1)
+
+
+def safe_move_mask(grid):
+    """
+    Máscara de 4 bits (uint8, rows x cols) dos movimentos seguros a partir de
+    cada célula: o bit d está ligado se o movimento de código d (U, D, R, L)
+    leva a uma célula dentro do mapa e não verde neste quadro.
+    """
+    free = np.asarray(grid) != 1
+    mask = np.zeros(free.shape, dtype=np.uint8)
+    mask[1:] |= free[:-1].astype(np.uint8)           # U: y - 1
+    mask[:-1] |= free[1:].astype(np.uint8) << 1      # D: y + 1
+    mask[:, :-1] |= free[:, 1:].astype(np.uint8) << 2  # R: x + 1
+    mask[:, 1:] |= free[:, :-1].astype(np.uint8) << 3  # L: x - 1
+    return mask
+
+
 def is_safe_position(matrix, x, y):
     """Verifica se uma posição é segura (não é obstáculo e está dentro do mapa)"""
     rows = len(matrix)
@@ -35,3 +35,58 @@ STAGNATION_THRESHOLD = 15
 MEMORY_SIZE = 3
 # Peso do aprendizado por reforço
 LEARNING_RATE = 0.1
+
+# === TEMPO ATÉ O OBJETIVO (src/solver.py) ===
+# Tira da simulação quem não consegue mais chegar ao objetivo
+# (alcançabilidade em bits: 1 bit por célula e quadro)
+PRUNE_DOOMED = True
+# Fitness mede a proximidade pelo menor número de passos até o objetivo
+# (contornando os obstáculos futuros) em vez da distância em linha reta
+# (tabela uint16: 2 bytes por célula e quadro)
+GOAL_TABLE_FITNESS = False
+
+# === AVALIAÇÃO ===
+# Sorteios da heurística gulosa derivados dos genes (em vez de aleatórios):
+# o fitness passa a ser função do genoma e pode ficar em cache
+DETERMINISTIC_EVAL = True
+# Quantos genomas o cache de fitness guarda (os usados mais recentemente)
+FITNESS_CACHE_SIZE = 5000
+# Estado dos indivíduos guardado a cada N instantes: filhos retomam a
+# simulação do ponto em que seus genes deixam de ser iguais aos de um
+# genoma já simulado (0 = desliga)
+SNAPSHOT_INTERVAL = 10
+
+# === ILHAS (python main.py --islands) ===
+# Subpopulações evoluindo em paralelo, uma por processo (POPULATION_SIZE dividido entre elas)
+ISLANDS = 4
+# A cada quantas gerações as ilhas trocam indivíduos
+MIGRATION_INTERVAL = 10
+# Quantos dos melhores de cada ilha migram (substituem os piores da vizinha)
+MIGRATION_SIZE = 5
+# Para onde vão os migrantes: 'ring' (ilha i -> i + 1) ou 'random' (sorteado a cada migração)
+MIGRATION_TOPOLOGY = 'ring'
+# Segundos de espera pelos migrantes da vizinha antes de seguir sem eles
+MIGRATION_TIMEOUT = 300
+
+# === AVALIAÇÃO DISTRIBUÍDA (python main.py --serve / --worker) ===
+# Porta do coordenador quando o endereço não a informa
+REMOTE_PORT = 5555
+# Genomas por lote enviado a um worker (lotes grandes diluem o custo fixo de cada passo)
+REMOTE_BATCH_SIZE = 5000
+# Segundos sem nenhuma mensagem de um worker (nem VIVO) até o lote voltar para a fila
+REMOTE_TIMEOUT = 120
+# Segundos entre os avisos VIVO do worker enquanto simula um lote (bem menor que REMOTE_TIMEOUT)
+REMOTE_HEARTBEAT = 10
+# Segundos entre tentativas de conexão do worker (e entre avisos do coordenador sem workers)
+REMOTE_RETRY = 5
+# Pasta onde os workers guardam os quadros do autômato, pelo hash de matrix.txt
+REMOTE_CACHE_DIR = 'timeline_cache'
+
+# === CHECKPOINTS ===
+# Comprime os checkpoints binários (.npz) com deflate
+CHECKPOINT_COMPRESS = True
+# Quantos checkpoints salvos pelo programa manter na pasta (0 = todos)
+CHECKPOINT_KEEP = 10
+# A cada quantos checkpoints gravar um completo; os outros guardam só o que
+# mudou desde o último completo (1 = sempre completo)
+CHECKPOINT_FULL_EVERY = 5
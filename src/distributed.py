@@ -0,0 +1,446 @@
+"""
+Avaliação distribuída: um coordenador publica lotes de genomas numa fila
+TCP e workers (nesta ou em outras máquinas) devolvem o resultado.
+
+O coordenador (RemoteEvaluator, python main.py --serve) tem a mesma
+interface de ParallelEvaluator: o loop principal chama evaluate() e recebe
+uma BatchSimulation com a geração inteira. Cada worker conectado
+(python main.py --worker HOST:PORTA) pega um lote por vez da fila; se a
+conexão cair ou o worker ficar REMOTE_TIMEOUT segundos sem mandar nenhuma
+mensagem, o lote volta para a fila e outro worker o simula. Enquanto
+calcula (quadros ou um lote), o worker avisa VIVO a cada REMOTE_HEARTBEAT
+segundos: o timeout detecta worker parado, não lote demorado, e não
+depende do tamanho do lote nem do horizonte. Workers podem entrar e sair
+no meio da geração.
+
+Protocolo: cada mensagem é um cabeçalho (tipo de 4 bytes, tamanho) seguido
+de um .npz sem compressão e sem objetos Python (lido com allow_pickle=False).
+Os genes vão compactados com pack_genomes (2 bits por gene); a resposta traz
+os campos por indivíduo (fitness, posição, passos...) e os eventos de
+aprendizado.
+
+    coordenador -> worker   CONF   hash de matrix.txt, dimensões e opções
+    worker -> coordenador   PEDE   não tem os quadros desse hash: pede a matriz
+    coordenador -> worker   MATR   conteúdo de matrix.txt
+    worker -> coordenador   PRON   pronto para receber lotes
+    coordenador -> worker   LOTE   genes (e estado para retomar, se houver)
+    worker -> coordenador   VIVO   ainda calculando (quadros ou lote); sem conteúdo
+    worker -> coordenador   FEIT   resultado do lote
+
+Os workers guardam os quadros do autômato calculados em REMOTE_CACHE_DIR,
+pelo hash de matrix.txt: reconectar (ou reiniciar o worker) com a mesma
+matriz não recalcula nada.
+"""
+import hashlib
+import multiprocessing
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from io import BytesIO
+import numpy as np
+from .config import *
+from .batch import BatchSimulation, CAMPOS_ESTADO
+from .cache import CAMPOS
+from .genetic import pack_genomes, unpack_genomes
+from .timeline import Timeline
+from .solver import time_to_goal, goal_reachability
+
+# Tipo da mensagem (4 bytes) e tamanho do conteúdo
+CABECALHO = struct.Struct('!4sQ')
+
+
+def parse_address(texto, host=''):
+    """'host:porta', 'porta' ou 'host' -> (host, porta); host vazio = todas as interfaces"""
+    texto = texto or ''
+    if ':' in texto:
+        nome, porta = texto.rsplit(':', 1)
+        return nome or host, int(porta)
+    if texto.isdigit():
+        return host, int(texto)
+    return texto or host, REMOTE_PORT
+
+
+def matrix_hash(conteudo):
+    """Hash do conteúdo de matrix.txt (chave dos quadros guardados pelos workers)"""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def _message(tipo, arrays=None):
+    """Mensagem pronta para enviar: cabeçalho + .npz"""
+    conteudo = b''
+    if arrays:
+        buffer = BytesIO()
+        np.savez(buffer, **arrays)
+        conteudo = buffer.getvalue()
+    return CABECALHO.pack(tipo, len(conteudo)) + conteudo
+
+
+def _recv_exact(conn, tamanho):
+    buffer = bytearray(tamanho)
+    visao = memoryview(buffer)
+    lidos = 0
+    while lidos < tamanho:
+        n = conn.recv_into(visao[lidos:])
+        if n == 0:
+            raise ConnectionError("conexao fechada")
+        lidos += n
+    return buffer
+
+
+def _recv(conn, esperado=None):
+    """Lê uma mensagem: (tipo, arrays)"""
+    tipo, tamanho = CABECALHO.unpack(_recv_exact(conn, CABECALHO.size))
+    if esperado is not None and tipo != esperado:
+        raise ConnectionError(f"mensagem inesperada: {tipo!r}")
+    arrays = {}
+    if tamanho:
+        with np.load(BytesIO(_recv_exact(conn, tamanho)), allow_pickle=False) as dados:
+            arrays = {nome: dados[nome] for nome in dados.files}
+    return tipo, arrays
+
+
+def _recv_resposta(conn, esperado=None):
+    """_recv que pula os avisos VIVO do worker (cada um renova o timeout)"""
+    while True:
+        tipo, arrays = _recv(conn)
+        if tipo != b'VIVO':
+            break
+    if esperado is not None and tipo != esperado:
+        raise ConnectionError(f"mensagem inesperada: {tipo!r}")
+    return tipo, arrays
+
+
+@contextmanager
+def _pulso(conn):
+    """Manda VIVO ao coordenador a cada REMOTE_HEARTBEAT segundos enquanto o bloco roda"""
+    parar = threading.Event()
+
+    def avisar():
+        try:
+            while not parar.wait(REMOTE_HEARTBEAT):
+                conn.sendall(_message(b'VIVO'))
+        except OSError:
+            pass  # Conexão caiu: o envio seguinte do worker também falha
+
+    thread = threading.Thread(target=avisar, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        # Nenhum VIVO pela metade quando o bloco voltar a enviar
+        parar.set()
+        thread.join()
+
+
+def _encode_task(lote, genomes, seed, retomada, intervalo):
+    """Arrays de um lote: genes compactados, semente e estado para retomar"""
+    arrays = {
+        'genes': pack_genomes(genomes),
+        'info': np.array([lote, seed, intervalo, genomes.shape[1]], dtype=np.uint64),
+    }
+    if retomada is not None:
+        estado, inicio = retomada
+        for campo in CAMPOS_ESTADO:
+            arrays['estado_' + campo] = estado[campo]
+        arrays['inicio'] = inicio
+    return arrays
+
+
+def _encode_result(lote, resultado):
+    """Arrays de BatchSimulation.resultado() (snapshots achatados por índice)"""
+    arrays = {campo: resultado[campo] for campo in CAMPOS}
+    arrays['lote'] = np.array(lote)
+    for i, parte in enumerate(resultado['eventos']):
+        arrays[f'eventos_{i}'] = parte
+    for k, (t, idx, estado) in enumerate(resultado['snapshots']):
+        arrays[f'snap{k}_t'] = np.array(t)
+        arrays[f'snap{k}_idx'] = idx
+        for campo in CAMPOS_ESTADO:
+            arrays[f'snap{k}_{campo}'] = estado[campo]
+    return arrays
+
+
+def _decode_result(arrays):
+    """Inverso de _encode_result: (lote, resultado)"""
+    resultado = {campo: arrays[campo] for campo in CAMPOS}
+    resultado['eventos'] = tuple(arrays[f'eventos_{i}'] for i in range(4))
+    snapshots = []
+    k = 0
+    while f'snap{k}_t' in arrays:
+        estado = {campo: arrays[f'snap{k}_{campo}'] for campo in CAMPOS_ESTADO}
+        snapshots.append((int(arrays[f'snap{k}_t']), arrays[f'snap{k}_idx'], estado))
+        k += 1
+    resultado['snapshots'] = snapshots
+    return int(arrays['lote']), resultado
+
+
+class RemoteEvaluator:
+    """
+    Coordenador: fila de lotes servida por TCP em `endereco` (host, porta).
+    arquivo: matrix.txt (enviado aos workers que ainda não têm seus quadros)
+    tabela, alcance: tempo até o objetivo e bits de alcançabilidade; os
+        workers calculam os mesmos a partir da matriz (só os que forem usados)
+    """
+
+    def __init__(self, endereco, arquivo, end_pos, width, height, max_iter, tabela=None,
+                 lote=REMOTE_BATCH_SIZE, timeout=REMOTE_TIMEOUT, alcance=None):
+        self.end_pos = end_pos
+        self.width = width
+        self.height = height
+        self.tabela = tabela
+        self.lote = lote
+        self.timeout = timeout
+
+        with open(arquivo, 'rb') as f:
+            self._matriz = f.read()
+        self.hash = matrix_hash(self._matriz)
+        parametros = [width, height, end_pos[0], end_pos[1], max_iter,
+                      PRUNE_DOOMED and alcance is not None,
+                      GOAL_TABLE_FITNESS and tabela is not None, DETERMINISTIC_EVAL]
+        self._conf = _message(b'CONF', {
+            'hash': np.frombuffer(self.hash.encode(), dtype=np.uint8),
+            'parametros': np.array(parametros, dtype=np.int64),
+        })
+
+        # Fila de lotes (chamada, lote, inicio, mensagem) e respostas
+        self._pendentes = queue.Queue()
+        self._resultados = queue.Queue()
+        self._chamada = 0
+        self._conexoes = set()
+        self._lock = threading.Lock()
+        self._fechado = False
+
+        self._servidor = socket.create_server(endereco)
+        self.endereco = self._servidor.getsockname()[:2]
+        threading.Thread(target=self._aceitar, daemon=True).start()
+
+    @property
+    def workers(self):
+        """Workers conectados agora"""
+        with self._lock:
+            return len(self._conexoes)
+
+    def _aceitar(self):
+        while not self._fechado:
+            try:
+                conn, addr = self._servidor.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._atender, args=(conn, addr), daemon=True).start()
+
+    def _atender(self, conn, addr):
+        """Uma thread por worker: entrega lotes e devolve à fila os que se perderem"""
+        nome = f"{addr[0]}:{addr[1]}"
+        tarefa = None
+        try:
+            conn.settimeout(self.timeout)
+            conn.sendall(self._conf)
+            tipo, _ = _recv_resposta(conn)
+            if tipo == b'PEDE':
+                conn.sendall(_message(b'MATR', {'conteudo': np.frombuffer(self._matriz, dtype=np.uint8)}))
+                tipo, _ = _recv_resposta(conn)
+            if tipo != b'PRON':
+                raise ConnectionError(f"mensagem inesperada: {tipo!r}")
+
+            with self._lock:
+                self._conexoes.add(conn)
+            print(f"[+] Worker conectado: {nome} ({self.workers} ativos)")
+
+            while True:
+                tarefa = self._pendentes.get()
+                if tarefa is None:
+                    break
+                chamada, lote, inicio, mensagem = tarefa
+                conn.sendall(mensagem)
+                _, arrays = _recv_resposta(conn, b'FEIT')
+                self._resultados.put((chamada, *_decode_result(arrays), inicio))
+                tarefa = None
+        except (OSError, ValueError, KeyError) as erro:
+            if not self._fechado:
+                perdido = f"; lote {tarefa[1]} volta para a fila" if tarefa is not None else ""
+                print(f"[!] Worker {nome} saiu ({erro}){perdido}")
+        finally:
+            if tarefa is not None:
+                # Lote perdido: volta para a fila
+                self._pendentes.put(tarefa)
+            with self._lock:
+                self._conexoes.discard(conn)
+            conn.close()
+
+    def evaluate(self, genomes, rng, retomada=None, intervalo=0):
+        """
+        Simula a geração inteira para a matriz de genes, em lotes de self.lote
+        nos workers conectados (espera se não houver nenhum).
+        retomada, intervalo: como em ParallelEvaluator.evaluate
+        Retorna uma BatchSimulation com o resultado de todos os lotes.
+        """
+        n = len(genomes)
+        bounds = list(range(0, n, self.lote)) + [n]
+        seeds = rng.integers(0, 2**63, len(bounds) - 1)
+        self._chamada += 1
+
+        for lote, (a, b, seed) in enumerate(zip(bounds[:-1], bounds[1:], seeds.tolist())):
+            fatia = None
+            if retomada is not None:
+                estado, inicio = retomada
+                fatia = ({campo: valores[a:b] for campo, valores in estado.items()}, inicio[a:b])
+            mensagem = _message(b'LOTE', _encode_task(lote, genomes[a:b], seed, fatia, intervalo))
+            self._pendentes.put((self._chamada, lote, a, mensagem))
+
+        sim = BatchSimulation(genomes, self.end_pos, self.width, self.height, caminho=False,
+                              tabela=self.tabela)
+        faltam = set(range(len(bounds) - 1))
+        while faltam:
+            try:
+                chamada, lote, resultado, inicio = self._resultados.get(timeout=REMOTE_RETRY)
+            except queue.Empty:
+                if self.workers == 0:
+                    print(f"[!] Nenhum worker conectado; aguardando em {self.endereco[0]}:{self.endereco[1]}...")
+                continue
+            # Respostas repetidas ou de chamadas anteriores são descartadas
+            if chamada == self._chamada and lote in faltam:
+                faltam.discard(lote)
+                sim.absorver(inicio, resultado)
+        return sim
+
+    def close(self):
+        """Para de aceitar workers e encerra as conexões (eles tentam reconectar)"""
+        self._fechado = True
+        self._servidor.close()
+        with self._lock:
+            conexoes = list(self._conexoes)
+        for conn in conexoes:
+            self._pendentes.put(None)
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def _build_timeline(conteudo, max_iter, end_pos, campos):
+    """
+    Quadros, máscaras e, se estiverem em campos, bits de alcançabilidade
+    ('alcance') e tempo até o objetivo ('tabela') a partir de matrix.txt
+    """
+    matrix = [list(map(int, row.split())) for row in conteudo.decode().splitlines()]
+    timeline = Timeline(matrix, max_iter)
+    dados = {
+        'frames': timeline.arrays(max_iter),
+        'mascaras': timeline.safe_masks(max_iter),
+    }
+    if 'alcance' in campos:
+        dados['alcance'] = goal_reachability(timeline, end_pos)
+    if 'tabela' in campos:
+        dados['tabela'] = time_to_goal(timeline, end_pos)
+    return dados
+
+
+def _load_timeline(pasta, chave, campos):
+    """Quadros guardados em disco para a chave (ou None, também se faltar algum campo)"""
+    caminho = os.path.join(pasta, f"{chave}.npz")
+    if not os.path.exists(caminho):
+        return None
+    with np.load(caminho, allow_pickle=False) as dados:
+        if not set(campos) <= set(dados.files):
+            return None
+        return {nome: dados[nome] for nome in campos}
+
+
+def _save_timeline(pasta, chave, dados):
+    """Grava os quadros (arquivo temporário + rename: outros workers podem ler ao mesmo tempo)"""
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"{chave}.npz")
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'wb') as f:
+        np.savez(f, **dados)
+    os.replace(temporario, caminho)
+
+
+def _serve(conn, quadros, pasta):
+    """Atende um coordenador: handshake e lotes até a conexão cair"""
+    _, conf = _recv(conn, b'CONF')
+    hash_matriz = conf['hash'].tobytes().decode()
+    width, height, end_x, end_y, max_iter, podar, proximidade, deterministico = conf['parametros'].tolist()
+    end_pos = (end_x, end_y)
+
+    # Chave: hash da matriz e número de quadros
+    chave = f"{hash_matriz}_{max_iter}"
+    # Só o que as opções do coordenador usam (a tabela de tempos é 16x maior)
+    campos = ['frames', 'mascaras']
+    if podar:
+        campos.append('alcance')
+    if proximidade:
+        campos.append('tabela')
+    dados = quadros.get(chave)
+    if dados is None or not set(campos) <= set(dados):
+        dados = _load_timeline(pasta, chave, campos)
+    if dados is None:
+        conn.sendall(_message(b'PEDE'))
+        _, matriz = _recv(conn, b'MATR')
+        conteudo = matriz['conteudo'].tobytes()
+        if matrix_hash(conteudo) != hash_matriz:
+            raise ConnectionError("matriz recebida nao confere com o hash")
+        print(f"[+] Calculando quadros da matriz {hash_matriz[:12]}...")
+        with _pulso(conn):
+            dados = _build_timeline(conteudo, max_iter, end_pos, campos)
+        _save_timeline(pasta, chave, dados)
+    quadros[chave] = dados
+    conn.sendall(_message(b'PRON'))
+
+    tabela = dados.get('tabela') if proximidade else None
+    alcance = dados.get('alcance') if podar else None
+    while True:
+        _, tarefa = _recv(conn, b'LOTE')
+        lote, seed, intervalo, gene_size = tarefa['info'].tolist()
+        genomes = unpack_genomes(tarefa['genes'], gene_size)
+        sim = BatchSimulation(
+            genomes, end_pos, width, height, rng=np.random.default_rng(seed), caminho=False,
+            tabela=tabela, podar=bool(podar), proximidade=bool(proximidade),
+            deterministico=bool(deterministico), intervalo=intervalo, alcance=alcance
+        )
+        if 'inicio' in tarefa:
+            estado = {campo: tarefa['estado_' + campo] for campo in CAMPOS_ESTADO}
+            sim.retomar(estado, tarefa['inicio'])
+        with _pulso(conn):
+            sim.simular(dados['frames'], dados['mascaras'])
+        conn.sendall(_message(b'FEIT', _encode_result(lote, sim.resultado())))
+
+
+def run_worker(endereco, pasta=REMOTE_CACHE_DIR):
+    """
+    Worker: conecta ao coordenador em `endereco` e simula os lotes que
+    chegarem. Se a conexão cair (ou o coordenador ainda não existir), tenta
+    de novo a cada REMOTE_RETRY segundos; sai com Ctrl+C.
+    """
+    quadros = {}
+    while True:
+        try:
+            with socket.create_connection(endereco) as conn:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                print(f"[+] Conectado ao coordenador {endereco[0]}:{endereco[1]}")
+                _serve(conn, quadros, pasta)
+        except (OSError, ValueError, KeyError) as erro:
+            print(f"[!] Sem coordenador ({erro}); nova tentativa em {REMOTE_RETRY}s")
+            time.sleep(REMOTE_RETRY)
+
+
+def run_workers(endereco, processos=1, pasta=REMOTE_CACHE_DIR):
+    """run_worker em `processos` processos (cada um com a sua conexão)"""
+    if processos <= 1:
+        run_worker(endereco, pasta)
+        return
+    filhos = [multiprocessing.Process(target=run_worker, args=(endereco, pasta)) for _ in range(processos)]
+    for p in filhos:
+        p.start()
+    try:
+        for p in filhos:
+            p.join()
+    except KeyboardInterrupt:
+        for p in filhos:
+            p.terminate()
+            p.join()
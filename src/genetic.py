@@ -3,38 +3,94 @@ Algoritmo Genético - Indivíduos, População, Seleção, Crossover e Mutação
 """
 import random
 import math
-from collections import defaultdict
+from array import array
+import numpy as np
 from .config import *
+from .learning import TabelaAprendizado
 
 
-def create_individual(width, height, biased=False):
+# Códigos dos movimentos nos genes (um byte por gene, valores 0..3)
+MOVES = ('U', 'D', 'R', 'L')
+MOVE_CODES = {move: code for code, move in enumerate(MOVES)}
+MOVE_DELTAS = ((0, -1), (0, 1), (1, 0), (-1, 0))
+U, D, R, L = range(4)
+
+
+def encode_moves(moves):
+    """Converte movimentos ('U', 'D', 'R', 'L') para genes (bytearray de códigos)"""
+    return bytearray(MOVE_CODES[move] for move in moves)
+
+
+def decode_moves(genes):
+    """Converte genes de volta para a string de movimentos"""
+    return ''.join(MOVES[code] for code in genes)
+
+
+def pack_genomes(genomes):
+    """Matriz de genes (n x genes, códigos 0..3) compactada em 2 bits por gene"""
+    genomes = np.asarray(genomes, dtype=np.uint8)
+    n, size = genomes.shape
+    padded = np.zeros((n, -(-size // 4) * 4), dtype=np.uint8)
+    padded[:, :size] = genomes
+    quads = padded.reshape(n, padded.shape[1] // 4, 4)
+    return quads[..., 0] | (quads[..., 1] << 2) | (quads[..., 2] << 4) | (quads[..., 3] << 6)
+
+
+def unpack_genomes(packed, gene_size):
+    """Inverso de pack_genomes: matriz (n x gene_size) de códigos"""
+    packed = np.asarray(packed, dtype=np.uint8)
+    quads = np.stack([(packed >> shift) & 3 for shift in (0, 2, 4, 6)], axis=-1)
+    return quads.reshape(len(packed), packed.shape[1] * 4)[:, :gene_size]
+
+
+class Individuo:
+    """
+    Indivíduo da população:
+    - historico_movimento: genes, um código de movimento (0..3) por byte
+    - aprendizado: preferências de direção por estado local (TabelaAprendizado)
+    - caminho: posições visitadas, intercaladas (x0, y0, x1, y1, ...)
+    """
+    __slots__ = (
+        'x', 'y', 'passos', 'distancia', 'max_progresso', 'vivo', 'fitness',
+        'colidiu', 'historico_movimento', 'aprendizado', 'cor', 'caminho',
+    )
+    
+    def __init__(self, genes, distancia, cor):
+        self.historico_movimento = genes
+        self.distancia = distancia
+        self.cor = cor
+        self.aprendizado = TabelaAprendizado()
+        self.reset()
+    
+    def reset(self):
+        """Volta ao estado inicial de uma geração (mantém genes e aprendizado)"""
+        self.x = 0
+        self.y = 0
+        self.passos = 0
+        self.max_progresso = 0  # Máximo progresso em direção ao objetivo
+        self.vivo = True
+        self.fitness = 0
+        self.colidiu = False
+        self.caminho = array('h')
+
+
+def create_individual(width, height, biased=False, genes=None):
     """
     Cria um indivíduo com:
-    - Histórico de movimentos (genes)
+    - Histórico de movimentos (genes), aleatórios se não forem dados
     - Tabela de aprendizado (mapeia estados locais para preferências de direção)
     """
-    gene_size = 3 * (width + height)
+    if genes is None:
+        gene_size = 3 * (width + height)
+        if biased:
+            # Movimentos com viés para o objetivo (D e R)
+            weighted = [D, D, D, R, R, R, U, L]
+            genes = bytearray(random.choices(weighted, k=gene_size))
+        else:
+            genes = bytearray(random.choices(range(4), k=gene_size))
     
-    if biased:
-        # Movimentos com viés para o objetivo (D e R)
-        weighted = ['D', 'D', 'D', 'R', 'R', 'R', 'U', 'L']
-        direcoes = [random.choice(weighted) for _ in range(gene_size)]
-    else:
-        direcoes = [random.choice(['U', 'D', 'R', 'L']) for _ in range(gene_size)]
-    
-    return {
-        'posicao': {'x': 0, 'y': 0},
-        'passos': 0,
-        'distancia': width + height,
-        'max_progresso': 0,  # Máximo progresso em direção ao objetivo
-        'vivo': True,
-        'fitness': 0,
-        'colidiu': False,
-        'historico_movimento': direcoes,
-        'aprendizado': defaultdict(lambda: {'U': 0, 'D': 0, 'R': 0, 'L': 0}),
-        'cor': (random.randint(50, 255), random.randint(50, 255), random.randint(50, 255)),
-        'caminho': [],  # Histórico de posições visitadas
-    }
+    cor = (random.randint(50, 255), random.randint(50, 255), random.randint(50, 255))
+    return Individuo(genes, width + height, cor)
 
 
 def create_population(width, height, size=POPULATION_SIZE):
@@ -57,15 +113,15 @@ def get_direction_from_learning(individuo, state, matrix, x, y, end_pos):
     Escolhe direção baseado no aprendizado + heurística.
     O indivíduo aprende quais direções funcionam melhor em cada estado local.
     """
-    passos = individuo['passos']
-    hist = individuo['historico_movimento']
+    passos = individuo.passos
+    hist = individuo.historico_movimento
     
     # Se ainda tem movimentos no gene, usa com probabilidade
     if passos < len(hist):
         gene_move = hist[passos]
         
         # Verifica se o movimento do gene é seguro
-        dx, dy = {'U': (0, -1), 'D': (0, 1), 'R': (1, 0), 'L': (-1, 0)}[gene_move]
+        dx, dy = MOVE_DELTAS[gene_move]
         new_x, new_y = x + dx, y + dy
         
         rows, cols = len(matrix), len(matrix[0])
@@ -74,7 +130,7 @@ def get_direction_from_learning(individuo, state, matrix, x, y, end_pos):
     
     # Caso contrário, usa heurística gulosa (vai em direção ao objetivo evitando obstáculos)
     moves = []
-    for move, (dx, dy) in [('R', (1, 0)), ('D', (0, 1)), ('L', (-1, 0)), ('U', (0, -1))]:
+    for move, (dx, dy) in [(R, (1, 0)), (D, (0, 1)), (L, (-1, 0)), (U, (0, -1))]:
         new_x, new_y = x + dx, y + dy
         rows, cols = len(matrix), len(matrix[0])
         
@@ -96,82 +152,87 @@ def get_direction_from_learning(individuo, state, matrix, x, y, end_pos):
     if passos < len(hist):
         return hist[passos]
     
-    return random.choice(['U', 'D', 'R', 'L'])
+    return random.randrange(4)
 
 
 def movimentar(matrix, individuo, end_pos):
     """Move o indivíduo e atualiza seu estado"""
-    from .cellular import get_local_state
+    from .cellular import get_state_code
     
-    x, y = individuo['posicao']['x'], individuo['posicao']['y']
+    x, y = individuo.x, individuo.y
     
-    # Obtém estado local
-    state = get_local_state(matrix, x, y)
+    # Obtém estado local (código inteiro)
+    state = get_state_code(matrix, x, y)
     
     # Escolhe direção
     direcao = get_direction_from_learning(individuo, state, matrix, x, y, end_pos)
     
     # Calcula nova posição
-    dx, dy = {'U': (0, -1), 'D': (0, 1), 'R': (1, 0), 'L': (-1, 0)}[direcao]
+    dx, dy = MOVE_DELTAS[direcao]
     new_x, new_y = x + dx, y + dy
     
     rows, cols = len(matrix), len(matrix[0])
     
     # Verifica colisão
     if new_x < 0 or new_x >= cols or new_y < 0 or new_y >= rows:
-        individuo['vivo'] = False
-        individuo['colidiu'] = True
+        individuo.vivo = False
+        individuo.colidiu = True
         # Aprendizado negativo: evitar essa direção neste estado
-        individuo['aprendizado'][state][direcao] -= LEARNING_RATE
+        individuo.aprendizado.add(state, direcao, -LEARNING_RATE)
     elif matrix[new_y][new_x] == 1:
-        individuo['vivo'] = False
-        individuo['aprendizado'][state][direcao] -= LEARNING_RATE
+        individuo.vivo = False
+        individuo.aprendizado.add(state, direcao, -LEARNING_RATE)
     else:
         # Movimento válido
-        individuo['posicao']['x'] = new_x
-        individuo['posicao']['y'] = new_y
-        individuo['passos'] += 1
-        individuo['caminho'].append((new_x, new_y))
+        individuo.x = new_x
+        individuo.y = new_y
+        individuo.passos += 1
+        individuo.caminho.extend((new_x, new_y))
         
         # Calcula progresso (distância inicial - distância atual)
         dist_atual = abs(end_pos[0] - new_x) + abs(end_pos[1] - new_y)
-        progresso = (individuo['distancia'] - dist_atual)
+        progresso = (individuo.distancia - dist_atual)
         
-        if progresso > individuo['max_progresso']:
-            individuo['max_progresso'] = progresso
+        if progresso > individuo.max_progresso:
+            individuo.max_progresso = progresso
             # Aprendizado positivo
-            individuo['aprendizado'][state][direcao] += LEARNING_RATE
+            individuo.aprendizado.add(state, direcao, LEARNING_RATE)
         
         # Chegou ao objetivo?
         if new_x == end_pos[0] and new_y == end_pos[1]:
-            individuo['vivo'] = False
-            individuo['fitness'] = 1000 + (1000 / individuo['passos'])  # Bônus por chegar rápido
+            individuo.vivo = False
+            individuo.fitness = 1000 + (1000 / individuo.passos)  # Bônus por chegar rápido
     
     return individuo
 
 
-def fitness_function(individuo, end_pos, width, height):
-    """Calcula fitness baseado em progresso, não apenas distância final"""
-    x, y = individuo['posicao']['x'], individuo['posicao']['y']
-    
-    # Distância ao objetivo
-    dist = math.sqrt((end_pos[0] - x)**2 + (end_pos[1] - y)**2)
-    max_dist = math.sqrt(width**2 + height**2)
+def fitness_function(individuo, end_pos, width, height, proximidade=None):
+    """
+    Calcula fitness baseado em progresso, não apenas distância final.
+    proximidade: se informada (0 = longe, 1 = perto), substitui a distância
+    euclidiana (ex.: goal_proximity, que considera os obstáculos)
+    """
+    x, y = individuo.x, individuo.y
     
-    # Normaliza (0 = longe, 1 = perto)
-    proximidade = 1 - (dist / max_dist)
+    if proximidade is None:
+        # Distância ao objetivo
+        dist = math.sqrt((end_pos[0] - x)**2 + (end_pos[1] - y)**2)
+        max_dist = math.sqrt(width**2 + height**2)
+        
+        # Normaliza (0 = longe, 1 = perto)
+        proximidade = 1 - (dist / max_dist)
     
     # Bônus por progresso máximo alcançado
-    progresso = individuo['max_progresso'] / (width + height)
+    progresso = individuo.max_progresso / (width + height)
     
     # Bônus por sobrevivência
-    sobrevivencia = min(individuo['passos'] / 100, 1)
+    sobrevivencia = min(individuo.passos / 100, 1)
     
     # Penalidades
     penalidade = 0
-    if individuo['colidiu']:
+    if individuo.colidiu:
         penalidade += 0.3
-    if individuo['passos'] < 5:
+    if individuo.passos < 5:
         penalidade += 0.2
     
     # Fitness final
@@ -180,55 +241,70 @@ def fitness_function(individuo, end_pos, width, height):
     return max(fitness, 0.1)
 
 
+def fitness_array(x, y, max_progresso, passos, colidiu, end_pos, width, height, proximidade=None):
+    """fitness_function para arrays de indivíduos (mesma fórmula)"""
+    if proximidade is None:
+        dist = np.sqrt((end_pos[0] - x)**2 + (end_pos[1] - y)**2)
+        max_dist = math.sqrt(width**2 + height**2)
+        proximidade = 1 - (dist / max_dist)
+    
+    progresso = max_progresso / (width + height)
+    sobrevivencia = np.minimum(passos / 100, 1)
+    
+    penalidade = np.where(colidiu, 0.3, 0) + np.where(passos < 5, 0.2, 0)
+    
+    fitness = (proximidade * 50) + (progresso * 30) + (sobrevivencia * 20) - (penalidade * 20)
+    
+    return np.maximum(fitness, 0.1)
+
+
 def tournament_selection(population, exclude=None, tournament_size=5):
     """Seleção por torneio"""
-    candidates = [ind for ind in population if ind != exclude and ind['fitness'] > 0]
+    candidates = [ind for ind in population if ind is not exclude and ind.fitness > 0]
     
     if len(candidates) < tournament_size:
-        candidates = [ind for ind in population if ind != exclude]
+        candidates = [ind for ind in population if ind is not exclude]
     
     if not candidates:
         return random.choice(population)
     
     tournament = random.sample(candidates, min(tournament_size, len(candidates)))
-    return max(tournament, key=lambda x: x['fitness'])
+    return max(tournament, key=lambda x: x.fitness)
 
 
 def crossover(pai, mae, width, height):
     """Crossover de dois pontos com herança de aprendizado"""
-    filho1 = create_individual(width, height)
-    filho2 = create_individual(width, height)
+    g_pai = pai.historico_movimento
+    g_mae = mae.historico_movimento
+    size = len(g_pai)
     
-    size = len(pai['historico_movimento'])
-    
-    # Crossover de dois pontos
+    # Crossover de dois pontos (trecho p1..p2 inclusive vem do outro pai)
     p1 = random.randint(0, size // 3)
     p2 = random.randint(2 * size // 3, size - 1)
     
-    for i in range(size):
-        if p1 <= i <= p2:
-            filho1['historico_movimento'][i] = mae['historico_movimento'][i]
-            filho2['historico_movimento'][i] = pai['historico_movimento'][i]
-        else:
-            filho1['historico_movimento'][i] = pai['historico_movimento'][i]
-            filho2['historico_movimento'][i] = mae['historico_movimento'][i]
+    filho1 = create_individual(width, height, genes=g_pai[:p1] + g_mae[p1:p2 + 1] + g_pai[p2 + 1:])
+    filho2 = create_individual(width, height, genes=g_mae[:p1] + g_pai[p1:p2 + 1] + g_mae[p2 + 1:])
     
     # Herda parte do aprendizado dos pais (Lamarckismo leve)
-    for state in pai['aprendizado']:
-        for dir in pai['aprendizado'][state]:
-            filho1['aprendizado'][state][dir] = pai['aprendizado'][state][dir] * 0.5
-    
-    for state in mae['aprendizado']:
-        for dir in mae['aprendizado'][state]:
-            filho2['aprendizado'][state][dir] = mae['aprendizado'][state][dir] * 0.5
+    inherit_learning(filho1, pai)
+    inherit_learning(filho2, mae)
     
     return filho1, filho2
 
 
+def inherit_learning(filho, pai, fator=0.5):
+    """Copia o aprendizado do pai para o filho, multiplicado por fator"""
+    if not filho.aprendizado:
+        filho.aprendizado = pai.aprendizado.scaled(fator)
+        return
+    for state, pesos in pai.aprendizado.items():
+        filho.aprendizado.set(state, [p * fator for p in pesos])
+
+
 def mutate(individuo, rate=MUTATION_RATE):
     """Aplica mutação"""
     mutation_type = random.choice(['swap', 'random', 'scramble', 'insert'])
-    hist = individuo['historico_movimento']
+    hist = individuo.historico_movimento
     size = len(hist)
     
     if mutation_type == 'swap':
@@ -238,7 +314,7 @@ def mutate(individuo, rate=MUTATION_RATE):
     elif mutation_type == 'random':
         for _ in range(random.randint(1, 5)):
             pos = random.randint(0, size - 1)
-            hist[pos] = random.choice(['U', 'D', 'R', 'L'])
+            hist[pos] = random.randrange(4)
     
     elif mutation_type == 'scramble':
         a = random.randint(0, size - 10)
@@ -257,25 +333,206 @@ def mutate(individuo, rate=MUTATION_RATE):
     return individuo
 
 
-def calculate_diversity(population, sample_size=20):
-    """Calcula diversidade genética"""
-    if len(population) < 2:
-        return 1.0
+def random_genomes(count, gene_size, biased, rng):
+    """
+    Matriz (count x gene_size) de genes aleatórios. biased: máscara booleana
+    das linhas com viés para o objetivo (D e R), como em create_individual.
+    """
+    genomes = rng.integers(0, 4, (count, gene_size), dtype=np.uint8)
+    weighted = np.array([D, D, D, R, R, R, U, L], dtype=np.uint8)
+    rows = np.flatnonzero(biased)
+    genomes[rows] = weighted[rng.integers(0, len(weighted), (len(rows), gene_size))]
+    return genomes
+
+
+def tournament_selection_batch(fitness, count, rng, exclude=None, tournament_size=5):
+    """
+    count seleções por torneio de uma vez (mesmas regras de tournament_selection).
+    fitness: array da população; exclude: array de índices a excluir por seleção.
+    Retorna os índices dos vencedores.
+    """
+    pool = np.flatnonzero(fitness > 0)
+    if len(pool) - (exclude is not None) < tournament_size:
+        pool = np.arange(len(fitness))
+    
+    # Excluído: sorteia entre os demais e pula a posição dele no pool
+    if exclude is not None:
+        pos = np.minimum(np.searchsorted(pool, exclude), len(pool) - 1)
+        excluded = pool[pos] == exclude
+    else:
+        pos = np.zeros(count, dtype=np.intp)
+        excluded = np.zeros(count, dtype=bool)
+    available = len(pool) - excluded
+    
+    size = min(tournament_size, int(available.min()) if count else tournament_size)
+    if size < 1:
+        return rng.integers(0, len(fitness), count)
+    
+    # Amostra sem reposição: sorteia de novo as linhas com repetição
+    draws = np.empty((count, size), dtype=np.intp)
+    pending = np.arange(count)
+    while len(pending):
+        r = (rng.random((len(pending), size)) * available[pending, None]).astype(np.intp)
+        draws[pending] = r
+        ordered = np.sort(r, axis=1)
+        pending = pending[(ordered[:, 1:] == ordered[:, :-1]).any(axis=1)]
+    
+    draws += (draws >= pos[:, None]) & excluded[:, None]
+    candidates = pool[draws]
+    winner = np.argmax(fitness[candidates], axis=1)
+    return candidates[np.arange(count), winner]
+
+
+def crossover_batch(genomes, pais, maes, rng, rate=CROSSOVER_RATE):
+    """
+    Crossover de dois pontos para vários casais de uma vez.
+    Casais sorteados com probabilidade 1 - rate apenas copiam os pais.
+    Retorna (filhos1, filhos2, cruzou).
+    """
+    size = genomes.shape[1]
+    cruzou = rng.random(len(pais)) < rate
+    p1 = rng.integers(0, size // 3 + 1, len(pais))
+    p2 = rng.integers(2 * size // 3, size, len(pais))
+    
+    pos = np.arange(size)
+    trecho = (pos >= p1[:, None]) & (pos <= p2[:, None]) & cruzou[:, None]
     
-    sample = random.sample(population, min(sample_size, len(population)))
-    total_diff = 0
-    comparisons = 0
+    filhos1 = np.where(trecho, genomes[maes], genomes[pais])
+    filhos2 = np.where(trecho, genomes[pais], genomes[maes])
+    return filhos1, filhos2, cruzou
+
+
+def mutate_batch(genomes, rows, rng):
+    """
+    Aplica mutate (tipo sorteado por linha) nas linhas rows de genomes, no lugar.
+    """
+    count = len(rows)
+    size = genomes.shape[1]
+    mutation_type = rng.integers(0, 4, count)
+    pos = np.arange(size)
+    
+    # Swap
+    sel = rows[mutation_type == 0]
+    a = rng.integers(0, size, len(sel))
+    b = rng.integers(0, size - 1, len(sel))
+    b += b >= a
+    genomes[sel, a], genomes[sel, b] = genomes[sel, b], genomes[sel, a]
+    
+    # Random: 1 a 5 posições recebem movimentos aleatórios (em ordem)
+    sel = rows[mutation_type == 1]
+    quantos = rng.integers(1, 6, len(sel))
+    onde = rng.integers(0, size, (len(sel), 5))
+    valores = rng.integers(0, 4, (len(sel), 5), dtype=np.uint8)
+    for k in range(5):
+        m = quantos > k
+        genomes[sel[m], onde[m, k]] = valores[m, k]
+    
+    # Scramble: embaralha o trecho [a, b) ordenando por chaves aleatórias
+    sel = rows[mutation_type == 2]
+    a = rng.integers(0, size - 9, len(sel))
+    b = a + rng.integers(3, 11, len(sel))
+    trecho = (pos >= a[:, None]) & (pos < b[:, None])
+    chaves = np.where(trecho, a[:, None] - 0.5 + rng.random((len(sel), size)) * (b - a)[:, None], pos)
+    genomes[sel] = np.take_along_axis(genomes[sel], np.argsort(chaves, axis=1), axis=1)
+    
+    # Insert: remove o gene de a e insere na posição b
+    sel = rows[mutation_type == 3]
+    a = rng.integers(0, size, len(sel))[:, None]
+    b = rng.integers(0, size, len(sel))[:, None]
+    resto = np.where(pos < b, pos, pos - 1)
+    origem = np.where(pos == b, a, np.where(resto < a, resto, resto + 1))
+    genomes[sel] = np.take_along_axis(genomes[sel], origem, axis=1)
+    
+    return genomes
+
+
+def reproduce(genomes, fitness, size, num_elite, num_immigrants, mutation_rate, rng):
+    """
+    Gera a matriz de genes da próxima geração em uma passada:
+    elitismo, imigrantes, crossover por torneio e mutação adaptativa.
     
-    for i in range(len(sample)):
-        for j in range(i + 1, len(sample)):
-            h1 = sample[i]['historico_movimento']
-            h2 = sample[j]['historico_movimento']
-            min_len = min(len(h1), len(h2))
-            diff = sum(1 for k in range(min_len) if h1[k] != h2[k])
-            total_diff += diff / min_len
-            comparisons += 1
+    Retorna (genes, origem, fator, contagem): para cada filho, o índice do
+    indivíduo cujo aprendizado ele herda (-1 se nenhum) e o fator aplicado à
+    tabela (1.0 para a elite, 0.5 no crossover); contagem é a frequência de
+    cada movimento por posição do gene na nova geração (ver allele_counts).
+    """
+    gene_size = genomes.shape[1]
+    ordem = np.argsort(-fitness, kind='stable')
+    
+    # Elitismo
+    elite = ordem[:num_elite]
+    contagem = allele_counts(genomes[elite])
+    
+    # Imigração
+    imigrantes = random_genomes(num_immigrants, gene_size, rng.random(num_immigrants) < 0.5, rng)
+    contagem += allele_counts(imigrantes)
+    
+    # Crossover (casais em sequência; o último filho pode sobrar)
+    num_filhos = max(size - num_elite - num_immigrants, 0)
+    casais = (num_filhos + 1) // 2
+    pais = tournament_selection_batch(fitness, casais, rng)
+    maes = tournament_selection_batch(fitness, casais, rng, exclude=pais)
+    filhos1, filhos2, cruzou = crossover_batch(genomes, pais, maes, rng)
+    filhos = np.stack((filhos1, filhos2), axis=1).reshape(-1, gene_size)[:num_filhos]
+    
+    # Mutação adaptativa
+    mutar = np.flatnonzero(rng.random(num_filhos) < mutation_rate)
+    mutate_batch(filhos, mutar, rng)
+    contagem += allele_counts(filhos)
+    
+    herda = np.stack((np.where(cruzou, pais, -1), np.where(cruzou, maes, -1)), axis=1).ravel()[:num_filhos]
+    origem = np.concatenate((elite, np.full(num_immigrants, -1), herda))
+    fator = np.concatenate((np.ones(num_elite), np.zeros(num_immigrants), np.where(herda >= 0, 0.5, 0)))
+    
+    genes = np.concatenate((genomes[elite], imigrantes, filhos))
+    return genes, origem, fator, contagem
+
+
+def next_population(population, genomes, origem, fator, width, height):
+    """
+    Indivíduos da próxima geração a partir da saída de reproduce: cada filho
+    recebe a tabela de aprendizado de population[origem] (copiada se o fator
+    for 1, herdada com o fator se for menor)
+    """
+    new_population = []
+    for genes, o, f in zip(genomes, origem.tolist(), fator.tolist()):
+        filho = create_individual(width, height, genes=bytearray(genes.tobytes()))
+        if f == 1:
+            filho.aprendizado = population[o].aprendizado.copy()
+        elif f > 0:
+            inherit_learning(filho, population[o], f)
+        new_population.append(filho)
+    
+    return new_population
+
+
+def allele_counts(genomes):
+    """Quantos indivíduos têm cada movimento em cada posição do gene: (4, genes)"""
+    genomes = np.asarray(genomes)
+    return np.stack([np.count_nonzero(genomes == code, axis=0) for code in range(len(MOVES))])
+
+
+def allele_diversity(contagem):
+    """
+    Distância de Hamming média entre dois indivíduos distintos (fração dos
+    genes que diferem), calculada exatamente a partir de allele_counts:
+    em cada posição, (N² - Σ c²) / (N (N - 1)) dos pares diferem.
+    """
+    n = int(contagem[:, 0].sum()) if contagem.size else 0
+    if n < 2:
+        return 1.0
+    iguais = (contagem.astype(np.int64) ** 2).sum(axis=0)
+    return float(np.mean((n * n - iguais) / (n * (n - 1))))
+
+
+def calculate_diversity(population):
+    """Calcula diversidade genética (sobre a população inteira)"""
+    if len(population) < 2:
+        return 1.0
     
-    return total_diff / comparisons if comparisons > 0 else 1.0
+    raw = b''.join(ind.historico_movimento for ind in population)
+    genomes = np.frombuffer(raw, dtype=np.uint8).reshape(len(population), -1)
+    return allele_diversity(allele_counts(genomes))
 
 
 def adaptive_mutation_rate(base_rate, diversity, stagnation, threshold=STAGNATION_THRESHOLD):
@@ -0,0 +1,271 @@
+"""
+Modelo de ilhas: a população é dividida em subpopulações que evoluem
+independentes, cada uma em um processo, com os mesmos operadores do loop
+principal (elitismo, imigrantes, torneio, crossover e mutação adaptativa).
+
+A cada MIGRATION_INTERVAL gerações cada ilha envia cópias dos seus
+MIGRATION_SIZE melhores indivíduos (genes, aprendizado e fitness) para a
+ilha vizinha, que os coloca no lugar dos seus piores antes de reproduzir.
+Na topologia 'ring' a ilha i envia para i + 1; na 'random' os destinos de
+cada migração são uma permutação sorteada sem pontos fixos, igual em todas
+as ilhas (mesma semente). Cada ilha recebe exatamente um lote por migração,
+então a única sincronização é esperar esse lote.
+
+Com a avaliação determinística o fitness de um migrante vale em qualquer
+ilha (todas simulam os mesmos quadros), e ele pode virar elite ou pai já na
+geração em que chega.
+
+Para auto-save, cada ilha manda uma cópia da sua população ao processo
+principal a cada `autosave` gerações, sem esperar as outras; quando as
+cópias de todas as ilhas para a mesma geração chegam, elas são juntadas e
+entregues a `salvar`.
+"""
+import multiprocessing
+import pickle
+import queue
+import random
+import signal
+import time
+from functools import partial
+import numpy as np
+from .config import *
+from .batch import BatchSimulation, encode_genomes
+from .cache import FitnessCache
+from .genetic import (
+    next_population, reproduce, calculate_diversity, allele_diversity, adaptive_mutation_rate
+)
+
+
+def migration_targets(ilhas, topologia, migracao, semente):
+    """Ilha de destino dos migrantes de cada ilha, na migração de número dado"""
+    if ilhas < 2:
+        return np.zeros(ilhas, dtype=np.int64)
+    if topologia == 'ring':
+        return (np.arange(ilhas) + 1) % ilhas
+    if topologia != 'random':
+        raise ValueError(f"Topologia de migracao desconhecida: {topologia}")
+
+    # Permutação sem pontos fixos (ninguém envia para si mesmo)
+    rng = np.random.default_rng([semente, migracao])
+    while True:
+        destinos = rng.permutation(ilhas)
+        if np.all(destinos != np.arange(ilhas)):
+            return destinos
+
+
+def split_population(population, ilhas):
+    """Divide a população em ilhas de tamanhos quase iguais"""
+    limites = np.linspace(0, len(population), ilhas + 1).astype(int)
+    return [population[a:b] for a, b in zip(limites[:-1], limites[1:])]
+
+
+def _migrate(indice, sim, population, caixas, destinos, tamanho, interrompido):
+    """
+    Envia os melhores desta ilha e troca os piores pelos recebidos.
+    Retorna (genes, fitness, population) já com os migrantes.
+    """
+    genomes = sim.genomes.copy()
+    fitness = sim.fitness.copy()
+    population = list(population)
+    ordem = np.argsort(-fitness, kind='stable')
+
+    melhores = ordem[:tamanho]
+    lote = (genomes[melhores], fitness[melhores], [population[i] for i in melhores.tolist()])
+    caixas[destinos[indice]].put(lote)
+
+    # Espera o lote da vizinha (desiste se ela parou por Ctrl+C ou falhou)
+    prazo = time.monotonic() + MIGRATION_TIMEOUT
+    while True:
+        try:
+            genes, valores, individuos = caixas[indice].get(timeout=0.5)
+            break
+        except queue.Empty:
+            if interrompido or time.monotonic() > prazo:
+                print(f"[!] Ilha {indice}: migrantes nao chegaram, seguindo sem eles")
+                return genomes, fitness, population
+
+    piores = ordem[len(ordem) - len(genes):]
+    genomes[piores] = genes
+    fitness[piores] = valores
+    for i, ind in zip(piores.tolist(), individuos):
+        population[i] = ind
+    return genomes, fitness, population
+
+
+def _island_state(geracao, best_fitness_ever, last_best, stagnation):
+    """Estado de uma ilha no formato do checkpoint"""
+    return {
+        'geracao': geracao,
+        'best_fitness': best_fitness_ever,
+        'last_best': last_best,
+        'stagnation': stagnation,
+    }
+
+
+def _merge(resultados, ilhas, state):
+    """Populações das ilhas juntas (na ordem) e o estado combinado"""
+    population = []
+    estados = []
+    for i in sorted(resultados):
+        parte, estado = resultados[i]
+        population.extend(parte)
+        estados.append(estado)
+
+    state = {
+        'geracao': max((e['geracao'] for e in estados), default=state.get('geracao', 0)),
+        'best_fitness': max((e['best_fitness'] for e in estados), default=state.get('best_fitness', 0)),
+        'last_best': max((e['last_best'] for e in estados), default=state.get('last_best', 0)),
+        'stagnation': 0,
+        'ilhas': ilhas,
+    }
+    return population, state
+
+
+def _island(indice, population, state, geracoes, ilhas, semente, dados, caixas, saida, autosave):
+    """Loop de uma ilha (roda no próprio processo)"""
+    # Ctrl+C: termina a geração atual e devolve a população
+    interrompido = []
+    signal.signal(signal.SIGINT, lambda *args: interrompido.append(True))
+    # Lotes que a vizinha não chegou a ler não seguram o fim do processo
+    for caixa in caixas:
+        caixa.cancel_join_thread()
+
+    frames, mascaras, tabela, alcance, end_pos, width, height = dados
+    sementes = np.random.SeedSequence(semente).spawn(ilhas)[indice]
+    rng = np.random.default_rng(sementes)
+    random.seed(int(sementes.generate_state(1)[0]))
+    cache = FitnessCache() if DETERMINISTIC_EVAL else None
+
+    tamanho = len(population)
+    num_elite = max(2, int(tamanho * ELITISM_RATE))
+    migrantes = min(MIGRATION_SIZE, tamanho // 2)
+
+    geracao = state.get('geracao', 0)
+    best_fitness_ever = state.get('best_fitness', 0)
+    last_best = state.get('last_best', 0)
+    stagnation = state.get('stagnation', 0)
+
+    # Diversidade da geração atual (calculada só quando alguém a usa)
+    diversidade = partial(calculate_diversity, population)
+
+    def simular(genomes, retomada=None, intervalo=0):
+        sim = BatchSimulation(genomes, end_pos, width, height, rng=rng, caminho=False,
+                              tabela=tabela, intervalo=intervalo, alcance=alcance)
+        if retomada is not None:
+            sim.retomar(*retomada)
+        return sim.simular(frames, mascaras)
+
+    for _ in range(geracoes):
+        if interrompido:
+            break
+
+        genomes = encode_genomes(population)
+        if cache is None:
+            sim = simular(genomes)
+        else:
+            sim = cache.evaluate(BatchSimulation(genomes, end_pos, width, height, caminho=False,
+                                                 tabela=tabela), simular)
+        sim.finalizar(population)
+        sim.stats.set_diversity(diversidade)
+        best_fitness_ever = max(best_fitness_ever, sim.stats.best)
+
+        # Migração: os recebidos entram na seleção desta geração
+        genomes, fitness = sim.genomes, sim.fitness
+        if ilhas > 1 and migrantes > 0 and (geracao + 1) % MIGRATION_INTERVAL == 0:
+            destinos = migration_targets(ilhas, MIGRATION_TOPOLOGY, (geracao + 1) // MIGRATION_INTERVAL, semente)
+            genomes, fitness, population = _migrate(indice, sim, population, caixas, destinos,
+                                                    migrantes, interrompido)
+
+        current_best = float(fitness.max())
+        if current_best <= last_best:
+            stagnation += 1
+        else:
+            stagnation = 0
+            last_best = current_best
+        best_fitness_ever = max(best_fitness_ever, current_best)
+
+        current_mut = adaptive_mutation_rate(MUTATION_RATE, sim.stats.diversity, stagnation)
+
+        num_immigrants = int(tamanho * IMMIGRATION_RATE)
+        if stagnation > STAGNATION_THRESHOLD:
+            num_immigrants = int(tamanho * 0.3)
+            print(f"[!] Ilha {indice} estagnada! Injetando {num_immigrants} novos individuos...")
+            stagnation = 0
+
+        genes, origem, fator, contagem = reproduce(
+            genomes, fitness, tamanho, num_elite, num_immigrants, current_mut, rng
+        )
+        population = next_population(population, genes, origem, fator, width, height)
+        diversidade = partial(allele_diversity, contagem)
+        geracao += 1
+
+        if autosave and geracao % autosave == 0:
+            # Serializada agora: a próxima geração altera as tabelas de aprendizado
+            estado = _island_state(geracao, best_fitness_ever, last_best, stagnation)
+            saida.put(pickle.dumps(('autosave', indice, population, estado)))
+
+        if geracao % 10 == 0:
+            print(f"Ilha {indice} Gen {geracao}: Best={best_fitness_ever:.1f} Avg={sim.stats.avg:.1f} Mut={current_mut:.2f}")
+
+    estado = _island_state(geracao, best_fitness_ever, last_best, stagnation)
+    saida.put(pickle.dumps(('fim', indice, population, estado)))
+
+
+def evolve_islands(population, state, timeline, end_pos, width, height, tabela=None,
+                   ilhas=ISLANDS, geracoes=NUM_GENERATIONS, semente=None, autosave=0, salvar=None,
+                   alcance=None):
+    """
+    Evolui a população dividida em ilhas, uma por processo, por `geracoes`
+    gerações (ou até Ctrl+C). As ilhas são juntadas de volta na ordem.
+    salvar(population, state): chamada com as ilhas juntas a cada
+    `autosave` gerações (0 = nunca)
+    tabela, alcance: como em BatchSimulation
+
+    Retorna (population, state) como o loop principal.
+    """
+    if semente is None:
+        semente = int(np.random.SeedSequence().generate_state(1)[0])
+
+    max_iter = timeline.max_iter
+    dados = (timeline.arrays(max_iter), timeline.safe_masks(max_iter), tabela, alcance,
+             end_pos, width, height)
+
+    ctx = multiprocessing.get_context()
+    caixas = [ctx.Queue() for _ in range(ilhas)]
+    saida = ctx.Queue()
+    processos = [
+        ctx.Process(target=_island, args=(i, parte, state, geracoes, ilhas, semente, dados, caixas, saida,
+                                              autosave if salvar is not None else 0))
+        for i, parte in enumerate(split_population(population, ilhas))
+    ]
+    for p in processos:
+        p.start()
+
+    # Resultados lidos antes do join (filas grandes travariam o processo)
+    resultados = {}
+    copias = {}
+    while len(resultados) < ilhas:
+        try:
+            tipo, indice, parte, estado = pickle.loads(saida.get(timeout=1))
+            if tipo == 'fim':
+                resultados[indice] = (parte, estado)
+                continue
+            # Auto-save: só quando todas as ilhas chegaram nessa geração
+            copia = copias.setdefault(estado['geracao'], {})
+            copia[indice] = (parte, estado)
+            if len(copia) == ilhas:
+                del copias[estado['geracao']]
+                salvar(*_merge(copia, ilhas, state))
+        except queue.Empty:
+            if not any(p.is_alive() for p in processos) and saida.empty():
+                break
+        except KeyboardInterrupt:
+            print("\n[!] Interrompido! Esperando as ilhas terminarem a geracao...")
+
+    for p in processos:
+        p.join()
+
+    if len(resultados) < ilhas:
+        print(f"[!] {ilhas - len(resultados)} ilha(s) terminaram sem devolver a populacao")
+
+    return _merge(resultados, ilhas, state)
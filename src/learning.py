@@ -0,0 +1,95 @@
+"""
+Tabela de aprendizado dos indivíduos.
+
+Cada estado local é um inteiro (cellular.encode_state, 2 bits por célula) e
+as preferências das 4 direções (U, D, R, L) ficam num array contíguo de
+float32: uma linha de 4 pesos por estado, localizada por um dicionário
+código -> linha.
+"""
+from array import array
+import numpy as np
+
+NUM_MOVES = 4
+
+
+class TabelaAprendizado:
+    """Preferências de direção por estado local (código inteiro)"""
+    __slots__ = ('index', 'weights')
+
+    def __init__(self):
+        self.index = {}
+        self.weights = array('f')
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def _row(self, code):
+        """Linha do estado (criada com pesos zero se ainda não existe)"""
+        row = self.index.get(code)
+        if row is None:
+            row = len(self.index)
+            self.index[code] = row
+            self.weights.extend((0.0,) * NUM_MOVES)
+        return row
+
+    def get(self, code):
+        """Pesos (U, D, R, L) do estado; zeros se nunca visto"""
+        row = self.index.get(code)
+        if row is None:
+            return (0.0,) * NUM_MOVES
+        base = row * NUM_MOVES
+        return tuple(self.weights[base:base + NUM_MOVES])
+
+    def add(self, code, direcao, delta):
+        """Soma delta ao peso da direção (código 0..3) no estado"""
+        self.weights[self._row(code) * NUM_MOVES + direcao] += delta
+
+    def add_many(self, codes, direcoes, deltas):
+        """add para listas de códigos, direções e deltas"""
+        weights = self.weights
+        row_of = self._row
+        for code, direcao, delta in zip(codes, direcoes, deltas):
+            weights[row_of(code) * NUM_MOVES + direcao] += delta
+
+    def set(self, code, pesos):
+        """Substitui os 4 pesos do estado"""
+        base = self._row(code) * NUM_MOVES
+        self.weights[base:base + NUM_MOVES] = array('f', pesos)
+
+    def items(self):
+        """Pares (código, (U, D, R, L))"""
+        weights = self.weights
+        for code, row in self.index.items():
+            base = row * NUM_MOVES
+            yield code, tuple(weights[base:base + NUM_MOVES])
+
+    def arrays(self):
+        """(códigos int64, pesos float32 (n x 4)) na ordem das linhas"""
+        codes = np.fromiter(self.index, dtype=np.int64, count=len(self.index))
+        weights = np.frombuffer(self.weights, dtype=np.float32).reshape(-1, NUM_MOVES)
+        return codes, weights.copy()
+
+    @classmethod
+    def from_arrays(cls, codes, weights):
+        """Tabela a partir de arrays no formato de arrays()"""
+        tabela = cls()
+        tabela.index = {code: row for row, code in enumerate(np.asarray(codes).tolist())}
+        tabela.weights = array('f', np.asarray(weights, dtype=np.float32).tobytes())
+        return tabela
+
+    def copy(self):
+        tabela = TabelaAprendizado()
+        tabela.index = self.index.copy()
+        tabela.weights = array('f', self.weights)
+        return tabela
+
+    def scaled(self, fator):
+        """Cópia com todos os pesos multiplicados por fator"""
+        tabela = TabelaAprendizado()
+        tabela.index = self.index.copy()
+        weights = np.frombuffer(self.weights, dtype=np.float32) * np.float32(fator)
+        tabela.weights = array('f', weights.tobytes())
+        return tabela
@@ -0,0 +1,133 @@
+"""
+Avaliação paralela da população com um pool de processos.
+
+Os quadros do autômato (e os arrays pré-calculados de cada quadro) ficam em
+memória compartilhada, calculados uma vez no processo principal; cada
+worker os acessa sem cópia e simula uma fatia da população. O pool é
+reaproveitado entre gerações.
+"""
+import multiprocessing
+import signal
+from multiprocessing import shared_memory
+import numpy as np
+from .batch import BatchSimulation
+
+# Estado de cada worker (preenchido por _init_worker)
+_worker = {}
+
+
+def _allocate(shape, dtype):
+    """Array novo (não inicializado) num bloco de memória compartilhada"""
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    return shm, (shm.name, shape, dtype.str), np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _share(array):
+    """Copia o array para um bloco de memória compartilhada novo"""
+    shm, info, destino = _allocate(array.shape, array.dtype)
+    destino[:] = array
+    return shm, info
+
+
+def _attach(info):
+    """Array sobre um bloco compartilhado criado por _allocate"""
+    name, shape, dtype = info
+    shm = shared_memory.SharedMemory(name=name)
+    _worker.setdefault('shm', []).append(shm)  # Mantém a referência viva
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_worker(arrays, end_pos, width, height):
+    # Ctrl+C é tratado só pelo processo principal (que encerra o pool)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    for nome, info in arrays.items():
+        _worker[nome] = _attach(info)
+    _worker.setdefault('tabela', None)
+    _worker.setdefault('alcance', None)
+    _worker['end_pos'] = end_pos
+    _worker['width'] = width
+    _worker['height'] = height
+
+
+def _evaluate_slice(args):
+    genomes, seed, retomada, intervalo = args
+    sim = BatchSimulation(
+        genomes, _worker['end_pos'], _worker['width'], _worker['height'],
+        rng=np.random.default_rng(seed), caminho=False, tabela=_worker['tabela'],
+        intervalo=intervalo, alcance=_worker['alcance']
+    )
+    if retomada is not None:
+        sim.retomar(*retomada)
+    sim.simular(_worker['frames'], _worker['mascaras'])
+    return sim.resultado()
+
+
+class ParallelEvaluator:
+    """
+    Pool de workers que simulam fatias da população nos mesmos quadros.
+    tabela, alcance: tempo até o objetivo e bits de alcançabilidade,
+    repassados a BatchSimulation (também em memória compartilhada)
+    """
+
+    def __init__(self, timeline, end_pos, width, height, workers=None, tabela=None, alcance=None):
+        self.end_pos = end_pos
+        self.width = width
+        self.height = height
+        self.workers = workers or multiprocessing.cpu_count()
+        self.tabela = tabela
+
+        # Quadros 0..max_iter-1 (os que a simulação usa), preenchidos direto
+        # na memória compartilhada (sem cópia no processo principal)
+        total = timeline.max_iter
+        forma = (total, timeline.rows, timeline.cols)
+        self._shm = []
+        infos = {}
+        for nome, dtype, preencher in (('frames', np.int8, timeline.arrays),
+                                       ('mascaras', np.uint8, timeline.safe_masks)):
+            shm, infos[nome], destino = _allocate(forma, dtype)
+            preencher(total, out=destino)
+            del destino
+            self._shm.append(shm)
+        for nome, array in (('tabela', tabela), ('alcance', alcance)):
+            if array is not None:
+                shm, infos[nome] = _share(array)
+                self._shm.append(shm)
+
+        self._pool = multiprocessing.Pool(
+            self.workers, initializer=_init_worker,
+            initargs=(infos, end_pos, width, height)
+        )
+
+    def evaluate(self, genomes, rng, retomada=None, intervalo=0):
+        """
+        Simula a geração inteira para a matriz de genes.
+        retomada: (estado, inicio) de BatchSimulation.retomar, se houver
+        intervalo: snapshots a cada intervalo instantes (ver BatchSimulation)
+        Retorna uma BatchSimulation com o resultado de todas as fatias.
+        """
+        n = len(genomes)
+        bounds = np.linspace(0, n, min(self.workers, n) + 1).astype(int)
+        seeds = rng.integers(0, 2**63, len(bounds) - 1)
+        tasks = []
+        for a, b, seed in zip(bounds[:-1], bounds[1:], seeds):
+            fatia = None
+            if retomada is not None:
+                estado, inicio = retomada
+                fatia = ({campo: valores[a:b] for campo, valores in estado.items()}, inicio[a:b])
+            tasks.append((genomes[a:b], seed, fatia, intervalo))
+
+        sim = BatchSimulation(genomes, self.end_pos, self.width, self.height, caminho=False,
+                              tabela=self.tabela)
+        for inicio, resultado in zip(bounds[:-1], self._pool.map(_evaluate_slice, tasks)):
+            sim.absorver(inicio, resultado)
+        return sim
+
+    def close(self):
+        """Encerra os workers e libera a memória compartilhada"""
+        self._pool.terminate()
+        self._pool.join()
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
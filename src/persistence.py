@@ -1,120 +1,652 @@
 """
 Persistência - Salvar e carregar população e estado do algoritmo
+
+Formato binário (.npz): um zip com um array NumPy por campo, no mesmo
+formato de numpy.savez (lido com numpy.load):
+- meta: JSON (timestamp e state) em bytes
+- genes: genes compactados em 2 bits (pack_genomes) e gene_size
+- cores: cor de cada indivíduo (n x 3)
+- aprendizado_*: tabelas de todos os indivíduos concatenadas (códigos dos
+  estados e pesos U/D/R/L), com offsets[i]..offsets[i+1] do indivíduo i
+
+Checkpoints delta (CheckpointWriter) guardam só o que não está no último
+checkpoint completo (meta['base']): genomas e linhas de aprendizado
+(código + pesos) novos, comparados pelo conteúdo, e para cada indivíduo
+referências (genes_ref, aprendizado_ref) às linhas da base seguidas das
+novas (aprendizado_tabela aponta para as referências de uma tabela,
+compartilhadas por quem tem tabelas iguais). load_checkpoint junta a base e
+o delta, conferindo que a base é a mesma (meta['base_id'] = timestamp dela).
+Antes de sobrescrever uma base, os deltas que dependem dela viram
+checkpoints completos.
+
+Checkpoints .json (formato antigo) continuam sendo lidos e gravados.
 """
+import ast
 import json
 import os
+import tempfile
+import threading
+import zipfile
+from itertools import chain
 from datetime import datetime
+import numpy as np
+from .config import CHECKPOINT_COMPRESS, CHECKPOINT_KEEP, CHECKPOINT_FULL_EVERY
+
+CHECKPOINT_EXTENSIONS = ('.npz', '.json')
+
+# Índice dos checkpoints de cada pasta (geração e fitness sem abrir os arquivos)
+MANIFEST = 'checkpoints_manifest.json'
+
+
+# umask do processo, lida na importação (só dá para ler trocando e voltando,
+# o que não pode acontecer com a thread de gravação rodando)
+UMASK = os.umask(0)
+os.umask(UMASK)
+
 
+class CheckpointError(Exception):
+    """Checkpoint delta cuja base não existe mais ou foi substituída"""
 
-def save_checkpoint(population, state, filename='checkpoint.json'):
+
+def save_checkpoint(population, state, filename='checkpoint.npz', compress=CHECKPOINT_COMPRESS,
+                    keep=CHECKPOINT_KEEP):
     """
     Salva a população e estado atual do algoritmo.
     
     Args:
         population: Lista de indivíduos
         state: Dicionário com estado do algoritmo (geração, best_fitness, etc)
-        filename: Nome do arquivo
+        filename: Nome do arquivo (.npz binário ou .json)
+        compress: Comprime os arrays do .npz (deflate)
+        keep: Quantos checkpoints salvos por aqui manter na pasta (os mais
+            recentes); None ou 0 mantém todos
     """
+    meta = _meta(state)
+    
+    if filename.endswith('.json'):
+        _save_json(population, meta, filename)
+    else:
+        _release_base(filename, compress)
+        write_npz(filename, _population_arrays(population, meta), compress)
+    
+    _register(filename, meta, keep)
+    print(f"[+] Checkpoint salvo: {filename} (Gen {state.get('geracao', '?')})")
+
+
+def _meta(state):
+    # Cópia do estado (via JSON), para não mudar depois de salvo
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'state': json.loads(json.dumps(state)),
+    }
+
+
+def _save_json(population, meta, filename):
+    """Formato antigo: JSON indentado com genes em texto"""
+    from .genetic import decode_moves
+    
     # Prepara população para serialização
     pop_data = []
     for ind in population:
         ind_data = {
-            'historico_movimento': ind['historico_movimento'],
-            'cor': ind['cor'],
-            # Converte defaultdict para dict normal
-            'aprendizado': {str(k): dict(v) for k, v in ind.get('aprendizado', {}).items()},
+            'historico_movimento': decode_moves(ind.historico_movimento),
+            'cor': ind.cor,
+            # Código do estado -> pesos [U, D, R, L]
+            'aprendizado': {str(k): list(v) for k, v in ind.aprendizado.items()},
         }
         pop_data.append(ind_data)
     
-    checkpoint = {
-        'timestamp': datetime.now().isoformat(),
-        'state': state,
-        'population': pop_data,
-    }
+    checkpoint = dict(meta, population=pop_data)
     
     with open(filename, 'w') as f:
         json.dump(checkpoint, f, indent=2)
+
+
+def _population_arrays(population, meta, copiar=False):
+    """
+    Campos do .npz para a população. As tabelas de aprendizado são
+    geradas indivíduo por indivíduo (o arquivo é escrito em partes), ou
+    copiadas já concatenadas se copiar (snapshot que não depende mais da
+    população).
+    """
+    from .genetic import pack_genomes
     
-    print(f"[+] Checkpoint salvo: {filename} (Gen {state.get('geracao', '?')})")
+    raw = b''.join(ind.historico_movimento for ind in population)
+    genomes = np.frombuffer(raw, dtype=np.uint8).reshape(len(population), -1)
+    tamanhos = np.array([len(ind.aprendizado) for ind in population], dtype=np.int64)
+    total = int(tamanhos.sum())
+    
+    # Linhas de cada tabela na ordem do índice (ver TabelaAprendizado)
+    if copiar:
+        codigos = np.fromiter(chain.from_iterable(ind.aprendizado.index for ind in population),
+                              dtype=np.int64, count=total)
+        pesos = b''.join(ind.aprendizado.weights for ind in population)
+        pesos = np.frombuffer(pesos, dtype=np.float32).reshape(total, 4)
+    else:
+        codigos = (np.int64, (total,), (list(ind.aprendizado.index) for ind in population))
+        pesos = (np.float32, (total, 4), (ind.aprendizado.weights for ind in population))
+    
+    return {
+        'meta': np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+        'gene_size': np.array(genomes.shape[1]),
+        'genes': pack_genomes(genomes),
+        'cores': np.array([ind.cor for ind in population], dtype=np.uint8).reshape(-1, 3),
+        'aprendizado_offsets': np.concatenate(([0], np.cumsum(tamanhos))),
+        'aprendizado_codigos': codigos,
+        'aprendizado_pesos': pesos,
+    }
+
+
+class CheckpointWriter:
+    """
+    Grava checkpoints numa thread em segundo plano. save tira um snapshot
+    da população (arrays independentes dela) e retorna; a gravação acontece
+    fora do loop das gerações. Se um pedido chega enquanto outro ainda
+    espera na fila, só o mais novo é gravado. close (ou flush) espera a
+    fila esvaziar.
+    
+    Um a cada full_every checkpoints é completo; os outros são deltas em
+    relação ao último completo (ver _delta_arrays).
+    """
+    
+    def __init__(self, compress=CHECKPOINT_COMPRESS, keep=CHECKPOINT_KEEP,
+                 full_every=CHECKPOINT_FULL_EVERY):
+        self.compress = compress
+        self.keep = keep
+        self.full_every = full_every
+        # Último checkpoint completo (só usado pela thread de gravação)
+        self._base = None
+        self._cond = threading.Condition()
+        self._pendente = None
+        self._gravando = False
+        self._fechado = False
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+    
+    def save(self, population, state, filename):
+        """Agenda a gravação de um snapshot da população e do estado"""
+        if filename.endswith('.json'):
+            # Formato antigo: gravado na hora
+            self.flush()
+            save_checkpoint(population, state, filename, self.compress, self.keep)
+            return
+        
+        meta = _meta(state)
+        snapshot = (filename, meta, _population_arrays(population, meta, copiar=True))
+        
+        with self._cond:
+            if self._pendente is not None:
+                print(f"[!] Checkpoint {self._pendente[0]} substituido por {filename} (gravacao em andamento)")
+            self._pendente = snapshot
+            self._cond.notify_all()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pendente is None and not self._fechado:
+                    self._cond.wait()
+                if self._pendente is None:
+                    return
+                filename, meta, arrays = self._pendente
+                self._pendente = None
+                self._gravando = True
+            
+            try:
+                arrays = self._delta_or_full(filename, meta, arrays)
+                _release_base(filename, self.compress)
+                write_npz(filename, arrays, self.compress)
+                _register(filename, meta, self.keep)
+                delta = f", delta de {meta['base']}" if meta.get('base') else ''
+                print(f"[+] Checkpoint salvo: {filename} (Gen {meta['state'].get('geracao', '?')}{delta})")
+            except Exception as e:
+                print(f"[!] Erro ao salvar checkpoint {filename}: {e}")
+            finally:
+                with self._cond:
+                    self._gravando = False
+                    self._cond.notify_all()
+    
+    def _delta_or_full(self, filename, meta, arrays):
+        """
+        Campos a gravar: delta se há uma base compatível, senão completo
+        (também quando o arquivo é a própria base: ela seria sobrescrita)
+        """
+        base = self._base
+        directory = os.path.dirname(os.path.abspath(filename))
+        if (base is not None and base['contagem'] < self.full_every - 1
+                and base['directory'] == directory
+                and base['filename'] != os.path.basename(filename)
+                and base['gene_size'] == int(arrays['gene_size'])
+                and os.path.exists(os.path.join(directory, base['filename']))):
+            base['contagem'] += 1
+            meta['base'] = base['filename']
+            meta['base_id'] = base['id']
+            return _delta_arrays(arrays, meta, base)
+        
+        self._base = _delta_base(filename, arrays, meta)
+        return arrays
+    
+    def flush(self):
+        """Espera até que tudo que foi pedido esteja gravado"""
+        with self._cond:
+            while self._pendente is not None or self._gravando:
+                self._cond.wait()
+    
+    def close(self):
+        """Grava o que estiver pendente e encerra a thread"""
+        with self._cond:
+            self._fechado = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+def _row_keys(array):
+    """Bytes de cada linha do array (chave de conteúdo)"""
+    array = np.ascontiguousarray(array)
+    linha = np.dtype((np.void, array.itemsize * int(np.prod(array.shape[1:]))))
+    return array.view(linha).ravel().tolist()
+
+
+def _learning_rows(codigos, pesos):
+    """Linha de aprendizado (código + 4 pesos) como 24 bytes"""
+    return np.concatenate((
+        np.ascontiguousarray(codigos, dtype=np.int64).view(np.uint8).reshape(-1, 8),
+        np.ascontiguousarray(pesos, dtype=np.float32).view(np.uint8).reshape(-1, 16),
+    ), axis=1)
+
+
+def _content_index(linhas):
+    """Conteúdo de cada linha -> posição da primeira linha com esse conteúdo"""
+    index = {}
+    for i, chave in enumerate(_row_keys(linhas)):
+        index.setdefault(chave, i)
+    return index
+
+
+def _delta_base(filename, arrays, meta):
+    """Índices de conteúdo de um checkpoint completo, para os deltas seguintes"""
+    return {
+        'filename': os.path.basename(filename),
+        'id': meta['timestamp'],
+        'directory': os.path.dirname(os.path.abspath(filename)),
+        'gene_size': int(arrays['gene_size']),
+        'genes': _content_index(arrays['genes']),
+        'num_genes': len(arrays['genes']),
+        'linhas': _content_index(_learning_rows(arrays['aprendizado_codigos'],
+                                                arrays['aprendizado_pesos'])),
+        'num_linhas': len(arrays['aprendizado_codigos']),
+        'contagem': 0,  # Deltas gravados desde este checkpoint
+    }
+
+
+def _references(linhas, index, total):
+    """
+    Referência de cada linha: a posição na base se o conteúdo já está lá
+    (index), ou total + posição entre as novas (uma por conteúdo).
+    Retorna (referências, índices das linhas novas).
+    """
+    ref = np.empty(len(linhas), dtype=np.int32)
+    novos = {}
+    novas = []
+    for i, chave in enumerate(_row_keys(linhas)):
+        r = index.get(chave)
+        if r is None:
+            r = novos.get(chave)
+            if r is None:
+                r = novos[chave] = total + len(novas)
+                novas.append(i)
+        ref[i] = r
+    return ref, np.array(novas, dtype=np.int64)
+
+
+def _delta_arrays(arrays, meta, base):
+    """Campos de um checkpoint delta: só genomas e linhas que não estão na base"""
+    genes_ref, novos = _references(arrays['genes'], base['genes'], base['num_genes'])
+    codigos = arrays['aprendizado_codigos']
+    pesos = arrays['aprendizado_pesos']
+    linhas_ref, novas = _references(_learning_rows(codigos, pesos), base['linhas'],
+                                    base['num_linhas'])
+    
+    # Tabelas iguais (filhos do mesmo pai) guardam as referências uma vez só
+    offsets = arrays['aprendizado_offsets'].tolist()
+    tabelas = {}
+    tabela_ref = np.empty(len(offsets) - 1, dtype=np.int32)
+    for i, (a, b) in enumerate(zip(offsets[:-1], offsets[1:])):
+        tabela_ref[i] = tabelas.setdefault(linhas_ref[a:b].tobytes(), len(tabelas))
+    unicas = [np.frombuffer(chave, dtype=np.int32) for chave in tabelas]
+    tamanhos = [len(refs) for refs in unicas]
+    
+    return {
+        'meta': np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+        'gene_size': arrays['gene_size'],
+        'genes': arrays['genes'][novos],
+        'genes_ref': genes_ref,
+        'cores': arrays['cores'],
+        'aprendizado_tabela': tabela_ref,
+        'aprendizado_offsets': np.concatenate(([0], np.cumsum(tamanhos, dtype=np.int64))),
+        'aprendizado_ref': np.concatenate([np.empty(0, dtype=np.int32)] + unicas),
+        'aprendizado_codigos': codigos[novas],
+        'aprendizado_pesos': pesos[novas],
+    }
+
+
+def _apply_delta(base, delta):
+    """Arrays completos da população a partir da base e do delta"""
+    def junta(nome, ref):
+        return np.concatenate((base[nome], delta[nome]))[ref]
+    
+    # Referências das linhas de cada indivíduo (pela tabela que ele usa)
+    offsets = delta['aprendizado_offsets']
+    tabela = delta['aprendizado_tabela']
+    refs = delta['aprendizado_ref']
+    linhas = [refs[offsets[t]:offsets[t + 1]] for t in tabela.tolist()]
+    linhas_ref = np.concatenate([np.empty(0, dtype=np.int32)] + linhas)
+    tamanhos = np.diff(offsets)[tabela]
+    
+    return {
+        'gene_size': delta['gene_size'],
+        'genes': junta('genes', delta['genes_ref']),
+        'cores': delta['cores'],
+        'aprendizado_offsets': np.concatenate(([0], np.cumsum(tamanhos, dtype=np.int64))),
+        'aprendizado_codigos': junta('aprendizado_codigos', linhas_ref),
+        'aprendizado_pesos': junta('aprendizado_pesos', linhas_ref),
+    }
+
+
+def _read_base(directory, meta):
+    """Arrays da base de um delta, conferindo que é o arquivo em que ele foi gravado"""
+    caminho = os.path.join(directory, meta['base'])
+    if not os.path.exists(caminho):
+        raise CheckpointError(f"base {meta['base']} do checkpoint delta nao existe mais")
+    base = _read_npz(caminho)
+    base_meta = json.loads(base.pop('meta').tobytes())
+    if meta.get('base_id') is not None and base_meta.get('timestamp') != meta['base_id']:
+        raise CheckpointError(f"base {meta['base']} foi substituida depois que o delta foi gravado")
+    return base
 
 
-def load_checkpoint(filename='checkpoint.json'):
+def _release_base(filename, compress=CHECKPOINT_COMPRESS):
+    """
+    Antes de sobrescrever filename: os deltas do índice que o usam como base
+    são regravados como checkpoints completos.
+    """
+    if not os.path.exists(filename):
+        return
+    directory = os.path.dirname(os.path.abspath(filename))
+    name = os.path.basename(filename)
+    entries = read_manifest(directory)
+    dependentes = [e for e in entries if e.get('base') == name and e['filename'] != name
+                   and os.path.exists(os.path.join(directory, e['filename']))]
+    if not dependentes:
+        return
+    
+    for e in dependentes:
+        caminho = os.path.join(directory, e['filename'])
+        delta = _read_npz(caminho)
+        meta = json.loads(delta.pop('meta').tobytes())
+        try:
+            base = _read_base(directory, meta)
+        except CheckpointError as erro:
+            print(f"[!] {e['filename']}: {erro}")
+            continue
+        meta.pop('base', None)
+        meta.pop('base_id', None)
+        arrays = {'meta': np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)}
+        arrays.update(_apply_delta(base, delta))
+        write_npz(caminho, arrays, compress)
+        e.pop('base')
+        print(f"[+] {e['filename']} regravado completo ({name} sera sobrescrito)")
+    
+    _write_manifest(directory, entries)
+
+
+def write_npz(filename, arrays, compress=False):
+    """
+    Grava um .npz campo a campo, sem montar o arquivo em memória. Cada valor
+    é um array ou (dtype, shape, partes) para campos escritos em partes.
+    O arquivo é escrito num temporário na mesma pasta e renomeado no fim
+    (os.replace), então um checkpoint nunca fica pela metade.
+    """
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    
+    def write(f):
+        with zipfile.ZipFile(f, 'w', compression) as zf:
+            for name, value in arrays.items():
+                with zf.open(name + '.npy', 'w', force_zip64=True) as out:
+                    if isinstance(value, tuple):
+                        dtype, shape, partes = value
+                        _write_parts(out, np.dtype(dtype), shape, partes)
+                    else:
+                        np.lib.format.write_array(out, np.asarray(value), allow_pickle=False)
+    
+    _replace_atomically(filename, write)
+
+
+def _replace_atomically(filename, write):
+    """Chama write(f) num temporário da mesma pasta e o renomeia para filename"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(prefix='.checkpoint_', suffix='.tmp', dir=directory)
+    
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        # mkstemp cria com 0600: mesmas permissões de um open() comum
+        os.chmod(tmp, 0o666 & ~UMASK)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _write_parts(out, dtype, shape, partes):
+    """Cabeçalho .npy seguido dos bytes de cada parte (na ordem)"""
+    header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': shape}
+    np.lib.format.write_array_header_2_0(out, header)
+    for parte in partes:
+        out.write(np.ascontiguousarray(parte, dtype=dtype).tobytes())
+
+
+def load_checkpoint(filename='checkpoint.npz'):
     """
     Carrega população e estado salvos.
     
     Returns:
         tuple: (population_data, state) ou (None, None) se não existir
+    
+    Raises:
+        CheckpointError: delta cuja base sumiu ou foi substituída
     """
     if not os.path.exists(filename):
         return None, None
     
     try:
-        with open(filename, 'r') as f:
-            checkpoint = json.load(f)
+        if filename.endswith('.json'):
+            with open(filename, 'r') as f:
+                checkpoint = json.load(f)
+            pop_data = checkpoint['population']
+        else:
+            pop_data = _read_npz(filename)
+            checkpoint = json.loads(pop_data.pop('meta').tobytes())
+            if checkpoint.get('base'):
+                # Delta: genomas e aprendizado vêm em parte do checkpoint completo
+                base = _read_base(os.path.dirname(filename), checkpoint)
+                pop_data = _apply_delta(base, pop_data)
         
         print(f"[+] Checkpoint carregado: {filename}")
         print(f"    Salvo em: {checkpoint.get('timestamp', 'desconhecido')}")
         print(f"    Geracao: {checkpoint['state'].get('geracao', '?')}")
         print(f"    Best Fitness: {checkpoint['state'].get('best_fitness', '?'):.2f}")
         
-        return checkpoint['population'], checkpoint['state']
+        return pop_data, checkpoint['state']
     
+    except CheckpointError:
+        # Delta sem a base certa: não dá para recuperar a população
+        raise
     except Exception as e:
         print(f"[!] Erro ao carregar checkpoint: {e}")
         return None, None
 
 
+def _read_npz(filename):
+    with np.load(filename, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
 def restore_population(pop_data, width, height):
     """
-    Restaura a população a partir dos dados salvos.
+    Restaura a população a partir dos dados salvos (arrays de um .npz ou
+    lista de dicts de um .json).
     """
-    from .genetic import create_individual
-    from collections import defaultdict
+    if isinstance(pop_data, dict):
+        return _restore_arrays(pop_data, width, height)
+    
+    from .genetic import create_individual, encode_moves, MOVES
+    from .cellular import encode_state
     
     population = []
     
     for ind_data in pop_data:
-        ind = create_individual(width, height)
-        ind['historico_movimento'] = ind_data['historico_movimento']
-        ind['cor'] = tuple(ind_data['cor'])
+        # Genes: string 'UDRL...' ou lista de letras (checkpoints antigos)
+        genes = encode_moves(ind_data['historico_movimento'])
+        ind = create_individual(width, height, genes=genes)
+        ind.cor = tuple(ind_data['cor'])
         
         # Restaura aprendizado
         if 'aprendizado' in ind_data:
             for state_str, prefs in ind_data['aprendizado'].items():
-                # Converte string de volta para tupla
+                # Código inteiro, ou tupla do estado (checkpoints antigos)
                 try:
-                    state = eval(state_str)
-                except:
-                    state = state_str
-                ind['aprendizado'][state] = defaultdict(float, prefs)
+                    state = int(state_str)
+                except ValueError:
+                    try:
+                        state = encode_state(ast.literal_eval(state_str))
+                    except (ValueError, SyntaxError, KeyError, TypeError):
+                        continue
+                # Pesos [U, D, R, L], ou dict por letra (checkpoints antigos)
+                if isinstance(prefs, dict):
+                    prefs = [prefs.get(move, 0) for move in MOVES]
+                ind.aprendizado.set(state, prefs)
         
         population.append(ind)
     
     return population
 
 
+def _restore_arrays(data, width, height):
+    """restore_population para os arrays do formato binário"""
+    from .genetic import create_individual, unpack_genomes
+    from .learning import TabelaAprendizado
+    
+    genomes = unpack_genomes(data['genes'], int(data['gene_size']))
+    offsets = data['aprendizado_offsets'].tolist()
+    codigos = data['aprendizado_codigos']
+    pesos = data['aprendizado_pesos']
+    
+    population = []
+    for i, (genes, cor) in enumerate(zip(genomes, data['cores'].tolist())):
+        ind = create_individual(width, height, genes=bytearray(genes.tobytes()))
+        ind.cor = tuple(cor)
+        a, b = offsets[i], offsets[i + 1]
+        if b > a:
+            ind.aprendizado = TabelaAprendizado.from_arrays(codigos[a:b], pesos[a:b])
+        population.append(ind)
+    
+    return population
+
+
+def read_checkpoint_meta(filepath):
+    """timestamp e state de um checkpoint, sem carregar a população"""
+    if filepath.endswith('.json'):
+        with open(filepath, 'r') as file:
+            data = json.load(file)
+        return {'timestamp': data.get('timestamp'), 'state': data.get('state', {})}
+    
+    with np.load(filepath, allow_pickle=False) as data:
+        return json.loads(data['meta'].tobytes())
+
+
+def _manifest_entry(filename, meta, protegido=False):
+    state = meta.get('state', {})
+    entry = {
+        'filename': filename,
+        'timestamp': meta.get('timestamp') or 'desconhecido',
+        'geracao': state.get('geracao', 0),
+        'best_fitness': state.get('best_fitness', 0),
+        # Checkpoints que não foram salvos por save_checkpoint nunca são apagados
+        'protegido': protegido,
+    }
+    if meta.get('base'):
+        entry['base'] = meta['base']
+    return entry
+
+
+def read_manifest(directory='.'):
+    """Entradas do índice de checkpoints da pasta (vazio se não existir)"""
+    try:
+        with open(os.path.join(directory, MANIFEST), 'r') as f:
+            return json.load(f).get('checkpoints', [])
+    except (OSError, ValueError):
+        return []
+
+
+def _write_manifest(directory, entries):
+    data = json.dumps({'checkpoints': entries}, indent=2).encode()
+    _replace_atomically(os.path.join(directory, MANIFEST), lambda f: f.write(data))
+
+
+def _register(filename, meta, keep):
+    """Adiciona o checkpoint ao índice e apaga os mais antigos além de keep"""
+    directory = os.path.dirname(filename) or '.'
+    name = os.path.basename(filename)
+    
+    entries = [e for e in read_manifest(directory) if e['filename'] != name]
+    entries.append(_manifest_entry(name, meta))
+    
+    if keep:
+        # O índice está na ordem em que os checkpoints foram salvos
+        salvos = [e for e in entries if not e.get('protegido')]
+        # Checkpoints completos de que algum delta mantido depende ficam
+        bases = {e.get('base') for e in entries if e not in salvos[:-keep]}
+        for e in salvos[:-keep]:
+            if e['filename'] in bases:
+                continue
+            try:
+                os.remove(os.path.join(directory, e['filename']))
+            except OSError:
+                pass
+            entries.remove(e)
+    
+    _write_manifest(directory, entries)
+
+
 def list_checkpoints(directory='.'):
-    """Lista todos os checkpoints disponíveis"""
-    checkpoints = []
+    """
+    Lista todos os checkpoints disponíveis, pelo índice da pasta. Arquivos
+    que não estão no índice (checkpoints antigos, copiados à mão) são lidos
+    uma vez e entram no índice como protegidos.
+    """
+    manifest = read_manifest(directory)
+    entries = {}
+    for e in manifest:
+        if os.path.exists(os.path.join(directory, e['filename'])):
+            entries[e['filename']] = e
+    alterado = len(entries) != len(manifest)
     
     for f in os.listdir(directory):
-        if f.endswith('.json') and 'checkpoint' in f.lower():
-            filepath = os.path.join(directory, f)
+        if (f.endswith(CHECKPOINT_EXTENSIONS) and 'checkpoint' in f.lower()
+                and f != MANIFEST and f not in entries):
             try:
-                with open(filepath, 'r') as file:
-                    data = json.load(file)
-                    checkpoints.append({
-                        'filename': f,
-                        'timestamp': data.get('timestamp', 'desconhecido'),
-                        'geracao': data.get('state', {}).get('geracao', 0),
-                        'best_fitness': data.get('state', {}).get('best_fitness', 0),
-                    })
+                meta = read_checkpoint_meta(os.path.join(directory, f))
             except:
-                pass
+                continue
+            entries[f] = _manifest_entry(f, meta, protegido=True)
+            alterado = True
+    
+    if alterado:
+        _write_manifest(directory, list(entries.values()))
     
-    return sorted(checkpoints, key=lambda x: x.get('geracao', 0), reverse=True)
+    return sorted(entries.values(), key=lambda x: x.get('geracao', 0), reverse=True)
 
 
 def auto_save_filename():
     """Gera nome de arquivo com timestamp"""
-    return f"checkpoint_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    return f"checkpoint_{datetime.now().strftime('%Y%m%d_%H%M%S')}.npz"
@@ -0,0 +1,178 @@
+"""
+Solução exata por alcançabilidade no espaço-tempo.
+
+Como o autômato é determinístico, o problema é saber quais células (x, y)
+podem ser ocupadas em cada instante t. A fronteira começa no início e, a
+cada passo, é dilatada nas 4 direções e filtrada pelas células seguras do
+quadro em que o movimento acontece (as mesmas regras de movimentar). O
+primeiro instante em que o objetivo aparece na fronteira é o caminho mais
+curto possível.
+"""
+import numpy as np
+from .genetic import MOVE_DELTAS, decode_moves
+
+
+def dilate(frente):
+    """Células a um movimento (U, D, R, L) de alguma célula da fronteira"""
+    nova = np.zeros_like(frente)
+    nova[1:] |= frente[:-1]
+    nova[:-1] |= frente[1:]
+    nova[:, 1:] |= frente[:, :-1]
+    nova[:, :-1] |= frente[:, 1:]
+    return nova
+
+
+def reachable(timeline, start=(0, 0), end_pos=None, max_steps=None):
+    """
+    Fronteiras alcançáveis a partir de start: lista de máscaras (rows x cols),
+    a de índice t com as posições possíveis após t movimentos. Para no
+    primeiro instante em que end_pos é alcançado (ou a fronteira se esvazia).
+    """
+    rows, cols = timeline.rows, timeline.cols
+    if max_steps is None:
+        max_steps = timeline.max_iter
+
+    frente = np.zeros((rows, cols), dtype=bool)
+    frente[start[1], start[0]] = True
+    frentes = [frente]
+
+    for t in range(max_steps):
+        if end_pos is not None and frente[end_pos[1], end_pos[0]]:
+            break
+        # O movimento feito no passo t é validado no quadro t
+        frente = dilate(frente) & ~timeline.green(t)
+        frentes.append(frente)
+        if not frente.any():
+            break
+
+    return frentes
+
+
+def backtrace(frentes, end_pos):
+    """Movimentos (códigos) que levam à end_pos no último instante das fronteiras"""
+    rows, cols = frentes[0].shape
+    x, y = end_pos
+    caminho = bytearray()
+
+    for t in range(len(frentes) - 1, 0, -1):
+        anterior = frentes[t - 1]
+        for code, (dx, dy) in enumerate(MOVE_DELTAS):
+            px, py = x - dx, y - dy
+            if 0 <= px < cols and 0 <= py < rows and anterior[py, px]:
+                caminho.append(code)
+                x, y = px, py
+                break
+
+    caminho.reverse()
+    return caminho
+
+
+def solve(timeline, start=(0, 0), end_pos=None, max_steps=None):
+    """
+    Caminho mais curto de start até end_pos (padrão: canto inferior direito)
+    nos quadros da linha do tempo.
+    Retorna os movimentos no formato de historico_movimento (bytearray de
+    códigos) ou None se o objetivo não é alcançável em max_steps passos.
+    """
+    if end_pos is None:
+        end_pos = (timeline.cols - 1, timeline.rows - 1)
+
+    frentes = reachable(timeline, start, end_pos, max_steps)
+    if not frentes[-1][end_pos[1], end_pos[0]]:
+        return None
+    return backtrace(frentes, end_pos)
+
+
+def print_solution(timeline, end_pos=None):
+    """Resolve e mostra o caminho ótimo (referência para o algoritmo genético)"""
+    caminho = solve(timeline, end_pos=end_pos)
+    if caminho is None:
+        print(f"[!] Objetivo inalcancavel em {timeline.max_iter} passos.")
+    else:
+        print(f"[+] Caminho otimo: {len(caminho)} passos")
+        print(decode_moves(caminho))
+    return caminho
+
+
+# Valor da tabela para posições de onde o objetivo não é mais alcançável
+INALCANCAVEL = np.iinfo(np.uint16).max
+
+
+def time_to_goal(timeline, end_pos=None):
+    """
+    Tabela (max_iter + 1, rows, cols) uint16 com o menor número de movimentos
+    para chegar ao objetivo estando em (x, y) após t movimentos, ou
+    INALCANCAVEL se nenhuma sequência segura chega lá até o fim da linha do
+    tempo. Calculada de trás para frente: tabela[t] vem de tabela[t + 1] e
+    das células seguras do quadro t.
+    """
+    rows, cols = timeline.rows, timeline.cols
+    if end_pos is None:
+        end_pos = (cols - 1, rows - 1)
+    end_x, end_y = end_pos
+    total = timeline.max_iter
+
+    tabela = np.full((total + 1, rows, cols), INALCANCAVEL, dtype=np.uint16)
+    tabela[total, end_y, end_x] = 0
+
+    for t in range(total - 1, -1, -1):
+        # Destinos possíveis do movimento feito no passo t
+        destino = np.where(timeline.green(t), INALCANCAVEL, tabela[t + 1])
+
+        melhor = np.full((rows, cols), INALCANCAVEL, dtype=np.uint16)
+        np.minimum(melhor[1:], destino[:-1], out=melhor[1:])
+        np.minimum(melhor[:-1], destino[1:], out=melhor[:-1])
+        np.minimum(melhor[:, 1:], destino[:, :-1], out=melhor[:, 1:])
+        np.minimum(melhor[:, :-1], destino[:, 1:], out=melhor[:, :-1])
+
+        alcanca = melhor != INALCANCAVEL
+        tabela[t][alcanca] = melhor[alcanca] + 1
+        tabela[t, end_y, end_x] = 0
+
+    return tabela
+
+
+def goal_reachability(timeline, end_pos=None):
+    """
+    Só o sim/não de time_to_goal, em bits: array (max_iter + 1, rows,
+    ceil(cols / 8)) uint8 com o bit de (x, y) no instante t ligado se alguma
+    sequência segura ainda leva ao objetivo (ler com can_reach). Ocupa 1/16
+    da tabela de tempos, então serve para podar em grades grandes.
+    """
+    rows, cols = timeline.rows, timeline.cols
+    if end_pos is None:
+        end_pos = (cols - 1, rows - 1)
+    end_x, end_y = end_pos
+    total = timeline.max_iter
+
+    alcance = np.empty((total + 1, rows, (cols + 7) // 8), dtype=np.uint8)
+    alcanca = np.zeros((rows, cols), dtype=bool)
+    alcanca[end_y, end_x] = True
+    alcance[total] = np.packbits(alcanca, axis=-1, bitorder='little')
+
+    for t in range(total - 1, -1, -1):
+        # Mesma recorrência de time_to_goal, sem as distâncias
+        alcanca = dilate(alcanca & ~timeline.green(t))
+        alcanca[end_y, end_x] = True
+        alcance[t] = np.packbits(alcanca, axis=-1, bitorder='little')
+
+    return alcance
+
+
+def can_reach(alcance, t, x, y):
+    """Bits de goal_reachability nos instantes t e posições (x, y) (arrays)"""
+    return ((alcance[t, y, x >> 3] >> (x & 7)) & 1).astype(bool)
+
+
+def goal_proximity(tabela, x, y, passos, start=(0, 0)):
+    """
+    Proximidade (0 = início ou sem saída, 1 = objetivo) pelo tempo até o
+    objetivo na tabela, em vez da distância em linha reta. Com passos
+    movimentos feitos, o indivíduo está em (x, y) no instante passos.
+    Retorna None se nem do início o objetivo é alcançável.
+    """
+    inicial = tabela[0, start[1], start[0]]
+    if inicial == INALCANCAVEL:
+        return None
+    restante = tabela[np.minimum(passos, len(tabela) - 1), y, x].astype(float)
+    return np.where(restante == INALCANCAVEL, 0, np.maximum(1 - restante / inicial, 0))
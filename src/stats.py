@@ -0,0 +1,59 @@
+"""
+Estatísticas da geração mantidas de forma incremental.
+
+A simulação avisa só quando algo muda (indivíduo sai da simulação, recebe
+fitness ou melhora o progresso), então ler melhor/média/vivos/progresso a
+cada passo custa O(1) em vez de percorrer a população inteira.
+"""
+
+
+class RunningStats:
+    """Contadores e somas da geração atual"""
+
+    def __init__(self, n, distancia):
+        self.n = n
+        self.distancia = distancia
+        self.vivos = n
+        self.avaliados = 0
+        self.soma_fitness = 0.0
+        self.best = 0.0
+        self.soma_progresso = 0
+        self._diversity_fn = None
+        self._diversity_value = None
+
+    def saiu(self, count):
+        """count indivíduos saíram da simulação (morreram ou chegaram)"""
+        self.vivos -= count
+
+    def avaliado(self, fitness):
+        """Fitness (array) de indivíduos que acabaram de ser avaliados"""
+        if len(fitness):
+            self.avaliados += len(fitness)
+            self.soma_fitness += float(fitness.sum())
+            self.best = max(self.best, float(fitness.max()))
+
+    def progrediu(self, ganho):
+        """Soma dos aumentos de max_progresso neste passo"""
+        self.soma_progresso += int(ganho)
+
+    @property
+    def avg(self):
+        """Fitness médio de quem já foi avaliado"""
+        return self.soma_fitness / self.avaliados if self.avaliados else 0
+
+    @property
+    def progress(self):
+        """Progresso médio normalizado (0 a 1)"""
+        return self.soma_progresso / (self.n * self.distancia) if self.n else 0
+
+    def set_diversity(self, func):
+        """Função que calcula a diversidade; só é chamada se alguém ler"""
+        self._diversity_fn = func
+        self._diversity_value = None
+
+    @property
+    def diversity(self):
+        """Diversidade genética da geração (calculada uma vez, sob demanda)"""
+        if self._diversity_value is None:
+            self._diversity_value = self._diversity_fn() if self._diversity_fn else 1.0
+        return self._diversity_value
@@ -0,0 +1,108 @@
+"""
+Linha do tempo do autômato celular.
+
+O autômato é determinístico: partindo da mesma matriz inicial, todas as
+gerações enxergam exatamente a mesma sequência de quadros. A linha do tempo
+calcula cada quadro uma única vez (sob demanda) e o guarda compactado em bits,
+para ser reaproveitado por todas as gerações.
+"""
+import numpy as np
+from .cellular import propagar_array, safe_move_mask
+from .bitboard import Bitboard
+
+
+class Timeline:
+    """
+    Quadros 0..max_iter do autômato, calculados uma vez e guardados em bits.
+    engine: 'bitboard' (inteiros Python, mais rápido) ou 'numpy' (propagar_array)
+    """
+
+    def __init__(self, matrix, max_iter, engine='bitboard'):
+        if engine not in ('bitboard', 'numpy'):
+            raise ValueError(f"Engine desconhecida: {engine}")
+
+        self.rows = len(matrix)
+        self.cols = len(matrix[0])
+        self.max_iter = max_iter
+        self.engine = engine
+
+        # Células especiais (início, fim) nunca mudam: ficam fora dos bits
+        base = np.array(matrix, dtype=np.int8)
+        self.fixed = np.where(base == 1, 0, base).astype(np.int8)
+
+        # Quadros compactados (1 bit por célula verde)
+        self._packed = []
+        self._grid = None  # Último quadro calculado (para continuar a propagação)
+
+        if engine == 'bitboard':
+            self._board = Bitboard(matrix)
+            self._bits = self._board.bits
+
+        self._append(base)
+
+    def __len__(self):
+        return self.max_iter + 1
+
+    def _append(self, grid):
+        self._packed.append(np.packbits(grid == 1, axis=None).tobytes())
+        self._grid = grid
+
+    def _ensure(self, t):
+        """Calcula os quadros até o instante t (inclusive)"""
+        if t < 0 or t > self.max_iter:
+            raise IndexError(f"Quadro {t} fora da linha do tempo (0..{self.max_iter})")
+
+        while len(self._packed) <= t:
+            if self.engine == 'bitboard':
+                self._bits = self._board.step(self._bits)
+                self._append(self._bits_to_grid(self._bits))
+            else:
+                self._append(propagar_array(self._grid))
+
+        # Todos os quadros calculados: a grade de trabalho não é mais necessária
+        if len(self._packed) == len(self):
+            self._grid = None
+            self._bits = None
+
+    def _bits_to_grid(self, bits):
+        """Converte o inteiro do bitboard para a máscara (rows x cols) de verdes"""
+        stride = self._board.stride
+        size = self.rows * stride
+        raw = np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+        green = np.unpackbits(raw, count=size, bitorder='little').reshape(self.rows, stride)
+        return green[:, :self.cols]
+
+    def green(self, t):
+        """Máscara booleana (rows x cols) das células verdes no instante t"""
+        self._ensure(t)
+        bits = np.frombuffer(self._packed[t], dtype=np.uint8)
+        size = self.rows * self.cols
+        return np.unpackbits(bits, count=size).reshape(self.rows, self.cols).astype(bool)
+
+    def array(self, t):
+        """Matriz NumPy (rows x cols, int8) no instante t"""
+        return np.where(self.green(t), 1, self.fixed).astype(np.int8)
+
+    def _fill(self, total, out, dtype, quadro):
+        """Array (total x rows x cols) preenchido quadro a quadro, sem cópias intermediárias"""
+        total = len(self) if total is None else total
+        if out is None:
+            out = np.empty((total, self.rows, self.cols), dtype=dtype)
+        for t in range(total):
+            out[t] = quadro(t)
+        return out
+
+    def arrays(self, total=None, out=None):
+        """
+        Quadros 0..total-1 (padrão: todos) como um array (total x rows x
+        cols, int8); out: array já alocado para preencher (ex.: memória
+        compartilhada)
+        """
+        return self._fill(total, out, np.int8, self.array)
+
+    def safe_masks(self, total=None, out=None):
+        """
+        Movimentos seguros de cada célula nos quadros 0..total-1 (total x
+        rows x cols, uint8, ver safe_move_mask); total e out como em arrays
+        """
+        return self._fill(total, out, np.uint8, lambda t: safe_move_mask(self.green(t)))
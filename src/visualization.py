@@ -1,6 +1,7 @@
 """
 Visualização com Pygame e Matplotlib
 """
+import numpy as np
 import pygame
 import matplotlib
 matplotlib.use('Agg')
@@ -40,24 +41,61 @@ class Visualizer:
         self.font_title = pygame.font.SysFont('monospace', 28, bold=True)
         pygame.display.set_caption("Algoritmo Genetico - Celulas Automatas")
         
+        self._setup_board()
+        
         # Matplotlib
         self.fig, self.axes = self._setup_plots()
         self.graph_surface = None
     
     def _setup_plots(self):
-        """Configura os gráficos"""
+        """Configura os gráficos e cria os artistas, atualizados depois com set_data"""
         fig, axes = plt.subplots(2, 2, figsize=(5.2, 3.8), dpi=100)
         fig.patch.set_facecolor('#1a1a2e')
         
-        for ax in axes.flat:
+        titles = [
+            ('Fitness', 'Fitness'), ('Diversidade Genetica', 'Diversidade'),
+            ('Mutacao Adaptativa', 'Taxa'), ('Progresso Medio', 'Progresso (%)'),
+        ]
+        for ax, (title, ylabel) in zip(axes.flat, titles):
             ax.set_facecolor('#16213e')
-            ax.tick_params(colors='white', labelsize=8)
+            ax.set_xlabel('Geracao', fontsize=9)
+            ax.set_ylabel(ylabel, fontsize=9)
+            ax.set_title(title, fontsize=10, fontweight='bold')
+            ax.grid(True, alpha=0.3, color='gray')
+            ax.tick_params(colors='white', labelsize=7)
             ax.xaxis.label.set_color('white')
             ax.yaxis.label.set_color('white')
             ax.title.set_color('white')
             for spine in ax.spines.values():
                 spine.set_color('#404040')
         
+        # Gráfico 1: Fitness
+        ax1 = axes[0, 0]
+        self.line_best, = ax1.plot([], [], 'g-', lw=2, label='Best')
+        self.line_avg, = ax1.plot([], [], 'y-', lw=1.5, label='Avg')
+        self.fill_fitness = ax1.fill_between([0, 1], [0, 0], [0, 0], alpha=0.2, color='cyan')
+        ax1.legend(loc='lower right', fontsize=7, facecolor='#16213e', labelcolor='white')
+        
+        # Gráfico 2: Diversidade (uma barra por geração do histórico)
+        ax2 = axes[0, 1]
+        maxlen = self.history['diversity'].maxlen
+        self.div_bars = ax2.bar(np.zeros(maxlen), np.zeros(maxlen), alpha=0.8)
+        ax2.axhline(y=0.4, color='#ffd93d', linestyle='--', alpha=0.7, lw=1)
+        ax2.set_ylim(0, 1)
+        
+        # Gráfico 3: Mutação
+        ax3 = axes[1, 0]
+        self.line_mutation, = ax3.plot([], [], 'm-', lw=2)
+        self.fill_mutation = ax3.fill_between([0, 1], 0, [0, 0], alpha=0.3, color='magenta')
+        ax3.axhline(y=MUTATION_RATE, color='white', linestyle='--', alpha=0.5, lw=1)
+        ax3.set_ylim(0, 0.6)
+        
+        # Gráfico 4: Progresso
+        ax4 = axes[1, 1]
+        self.line_progress, = ax4.plot([], [], 'c-', lw=2)
+        self.fill_progress = ax4.fill_between([0, 1], 0, [0, 0], alpha=0.3, color='cyan')
+        ax4.set_ylim(0, 100)
+        
         plt.tight_layout(pad=1.5)
         return fig, axes
     
@@ -71,109 +109,101 @@ class Visualizer:
         self.history['progress'].append(avg_progress)
     
     def update_plots(self):
-        """Atualiza e salva os gráficos"""
+        """Atualiza os gráficos e a superfície pygame usada por draw_info"""
         if len(self.history['geracao']) < 2:
             return
         
-        gens = list(self.history['geracao'])
+        gens = np.array(self.history['geracao'])
+        best = np.array(self.history['best_fitness'])
+        avg = np.array(self.history['avg_fitness'])
+        div_data = np.array(self.history['diversity'])
+        mutation = np.array(self.history['mutation_rate'])
+        progress = np.array(self.history['progress']) * 100
+        zeros = np.zeros_like(gens)
         
         # Gráfico 1: Fitness
-        ax1 = self.axes[0, 0]
-        ax1.clear()
-        ax1.set_facecolor('#16213e')
-        ax1.plot(gens, list(self.history['best_fitness']), 'g-', lw=2, label='Best')
-        ax1.plot(gens, list(self.history['avg_fitness']), 'y-', lw=1.5, label='Avg')
-        ax1.fill_between(gens, list(self.history['avg_fitness']), 
-                         list(self.history['best_fitness']), alpha=0.2, color='cyan')
-        ax1.set_xlabel('Geracao', fontsize=9)
-        ax1.set_ylabel('Fitness', fontsize=9)
-        ax1.set_title('Fitness', fontsize=10, fontweight='bold')
-        ax1.legend(loc='lower right', fontsize=7, facecolor='#16213e', labelcolor='white')
-        ax1.grid(True, alpha=0.3, color='gray')
-        ax1.tick_params(colors='white', labelsize=7)
+        self.line_best.set_data(gens, best)
+        self.line_avg.set_data(gens, avg)
+        self.fill_fitness.set_verts([_fill_verts(gens, avg, best)])
+        low, high = min(avg.min(), best.min()), max(avg.max(), best.max())
+        pad = (high - low) * 0.05 or 1
+        self.axes[0, 0].set_ylim(low - pad, high + pad)
         
         # Gráfico 2: Diversidade
-        ax2 = self.axes[0, 1]
-        ax2.clear()
-        ax2.set_facecolor('#16213e')
-        div_data = list(self.history['diversity'])
-        colors = ['#ff6b6b' if d < 0.3 else '#ffd93d' if d < 0.5 else '#6bcb77' for d in div_data]
-        ax2.bar(gens, div_data, color=colors, alpha=0.8, width=max(1, len(gens)//50))
-        ax2.axhline(y=0.4, color='#ffd93d', linestyle='--', alpha=0.7, lw=1)
-        ax2.set_xlabel('Geracao', fontsize=9)
-        ax2.set_ylabel('Diversidade', fontsize=9)
-        ax2.set_title('Diversidade Genetica', fontsize=10, fontweight='bold')
-        ax2.set_ylim(0, 1)
-        ax2.grid(True, alpha=0.3, color='gray')
-        ax2.tick_params(colors='white', labelsize=7)
+        width = max(1, len(gens) // 50)
+        for i, bar in enumerate(self.div_bars):
+            if i < len(gens):
+                d = div_data[i]
+                bar.set_x(gens[i] - width / 2)
+                bar.set_width(width)
+                bar.set_height(d)
+                bar.set_facecolor('#ff6b6b' if d < 0.3 else '#ffd93d' if d < 0.5 else '#6bcb77')
+                bar.set_visible(True)
+            else:
+                bar.set_visible(False)
         
         # Gráfico 3: Mutação
-        ax3 = self.axes[1, 0]
-        ax3.clear()
-        ax3.set_facecolor('#16213e')
-        ax3.plot(gens, list(self.history['mutation_rate']), 'm-', lw=2)
-        ax3.fill_between(gens, 0, list(self.history['mutation_rate']), alpha=0.3, color='magenta')
-        ax3.axhline(y=MUTATION_RATE, color='white', linestyle='--', alpha=0.5, lw=1)
-        ax3.set_xlabel('Geracao', fontsize=9)
-        ax3.set_ylabel('Taxa', fontsize=9)
-        ax3.set_title('Mutacao Adaptativa', fontsize=10, fontweight='bold')
-        ax3.set_ylim(0, 0.6)
-        ax3.grid(True, alpha=0.3, color='gray')
-        ax3.tick_params(colors='white', labelsize=7)
+        self.line_mutation.set_data(gens, mutation)
+        self.fill_mutation.set_verts([_fill_verts(gens, zeros, mutation)])
         
         # Gráfico 4: Progresso
-        ax4 = self.axes[1, 1]
-        ax4.clear()
-        ax4.set_facecolor('#16213e')
-        prog_data = [p * 100 for p in self.history['progress']]
-        ax4.plot(gens, prog_data, 'c-', lw=2)
-        ax4.fill_between(gens, 0, prog_data, alpha=0.3, color='cyan')
-        ax4.set_xlabel('Geracao', fontsize=9)
-        ax4.set_ylabel('Progresso (%)', fontsize=9)
-        ax4.set_title('Progresso Medio', fontsize=10, fontweight='bold')
-        ax4.set_ylim(0, 100)
-        ax4.grid(True, alpha=0.3, color='gray')
-        ax4.tick_params(colors='white', labelsize=7)
+        self.line_progress.set_data(gens, progress)
+        self.fill_progress.set_verts([_fill_verts(gens, zeros, progress)])
         
+        margin = (gens[-1] - gens[0]) * 0.05
         for ax in self.axes.flat:
-            ax.tick_params(colors='white')
-            ax.xaxis.label.set_color('white')
-            ax.yaxis.label.set_color('white')
-            ax.title.set_color('white')
+            ax.set_xlim(gens[0] - margin, gens[-1] + margin)
         
-        plt.tight_layout(pad=1.5)
-        self.fig.savefig('grafico_evolucao.png', facecolor='#1a1a2e', edgecolor='none')
+        # Pixels direto do canvas Agg para o pygame (sem arquivo)
+        canvas = self.fig.canvas
+        canvas.draw()
+        surface = pygame.image.frombuffer(canvas.buffer_rgba(), canvas.get_width_height(), 'RGBA')
+        self.graph_surface = pygame.transform.scale(surface, (GRAPH_WIDTH, GRAPH_HEIGHT))
+    
+    def save_plots(self, filename='grafico_evolucao.png'):
+        """Salva os gráficos atuais em arquivo"""
+        self.fig.savefig(filename, facecolor='#1a1a2e', edgecolor='none')
+    
+    def _setup_board(self):
+        """Superfícies do tabuleiro: 1 pixel por célula e a grade de bordas"""
+        rows, cols = self.width, self.height
+        self.board_pixels = np.zeros((rows, cols, 3), dtype=np.uint8)
+        self.board_small = pygame.Surface((cols, rows))
+        self.board_surface = pygame.Surface((self.board_width, self.board_height))
         
-        # Carrega como superfície pygame
-        try:
-            self.graph_surface = pygame.image.load('grafico_evolucao.png')
-        except:
-            pass
+        # Cor por valor da célula: branca se 0, verde caso contrário
+        self.palette = np.array([WHITE] + [GREEN] * 255, dtype=np.uint8)
+        
+        # Bordas de cada célula (MARGIN pixels), desenhadas por cima do tabuleiro
+        px = np.arange(self.board_width) % BLOCK_SIZE
+        py = np.arange(self.board_height) % BLOCK_SIZE
+        edge_x = (px < MARGIN) | (px >= BLOCK_SIZE - MARGIN)
+        edge_y = (py < MARGIN) | (py >= BLOCK_SIZE - MARGIN)
+        grid = np.zeros((self.board_width, self.board_height, 3), dtype=np.uint8)
+        grid[~(edge_x[:, None] | edge_y[None, :])] = (255, 0, 255)
+        grid[edge_x[:, None] | edge_y[None, :]] = BLACK
+        self.grid_surface = pygame.surfarray.make_surface(grid)
+        self.grid_surface.set_colorkey((255, 0, 255))
     
-    def draw_board(self, matrix, population):
-        """Desenha o tabuleiro e indivíduos"""
-        for i in range(len(matrix)):
-            for j in range(len(matrix[0])):
-                if i == 0 and j == 0:
-                    color = YELLOW
-                elif i == len(matrix) - 1 and j == len(matrix[0]) - 1:
-                    color = CYAN
-                elif matrix[i][j] == 0:
-                    color = WHITE
-                else:
-                    color = GREEN
-                
-                rect = (j * BLOCK_SIZE, i * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
-                pygame.draw.rect(self.screen, color, rect, 0)
-                pygame.draw.rect(self.screen, BLACK, rect, MARGIN)
-        
-        # Desenha indivíduos vivos
-        for ind in population:
-            if ind['vivo']:
-                x, y = ind['posicao']['x'], ind['posicao']['y']
-                rect = (x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
-                pygame.draw.rect(self.screen, ind['cor'], rect, 0)
-                pygame.draw.rect(self.screen, BLACK, rect, MARGIN)
+    def draw_board(self, matrix, agents):
+        """
+        Desenha o tabuleiro e indivíduos.
+        matrix: array (rows x cols) do quadro atual
+        agents: (x, y, cores) dos indivíduos vivos, como arrays
+        """
+        pixels = self.board_pixels
+        np.take(self.palette, np.asarray(matrix, dtype=np.uint8), axis=0, out=pixels)
+        pixels[0, 0] = YELLOW
+        pixels[-1, -1] = CYAN
+        
+        # Indivíduos vivos
+        x, y, cores = agents
+        pixels[y, x] = cores
+        
+        pygame.surfarray.blit_array(self.board_small, pixels.transpose(1, 0, 2))
+        pygame.transform.scale(self.board_small, (self.board_width, self.board_height), self.board_surface)
+        self.screen.blit(self.board_surface, (0, 0))
+        self.screen.blit(self.grid_surface, (0, 0))
     
     def draw_info(self, stats):
         """Desenha informações na tela"""
@@ -203,15 +233,14 @@ class Visualizer:
         y3 = y2 + 24
         self.screen.blit(self.font_small.render(f"Avg: {stats['avg']:.1f}", True, GRAY), (10, y3))
         
-        # Gráfico na lateral
+        # Gráfico na lateral (já no tamanho final)
         if self.graph_surface:
-            scaled = pygame.transform.scale(self.graph_surface, (GRAPH_WIDTH, GRAPH_HEIGHT))
-            self.screen.blit(scaled, (self.board_width + 15, 10))
+            self.screen.blit(self.graph_surface, (self.board_width + 15, 10))
     
-    def draw(self, matrix, population, stats):
+    def draw(self, matrix, agents, stats):
         """Desenha tudo"""
         self.screen.fill(BLACK)
-        self.draw_board(matrix, population)
+        self.draw_board(matrix, agents)
         self.draw_info(stats)
         pygame.display.flip()
     
@@ -223,5 +252,12 @@ class Visualizer:
         return True
     
     def quit(self):
-        """Fecha pygame"""
+        """Salva os gráficos e fecha pygame"""
+        if self.graph_surface:
+            self.save_plots()
         pygame.quit()
+
+
+def _fill_verts(x, lower, upper):
+    """Contorno da área entre lower e upper (para atualizar fill_between)"""
+    return np.concatenate((np.column_stack((x, upper)), np.column_stack((x, lower))[::-1]))
@@ -0,0 +1,111 @@
+"""
+Teste diferencial da simulação em lote: BatchSimulation + finalizar deve
+deixar cada indivíduo igual ao loop de referência de main.run (movimentar
+em cada vivo, fitness_function ao sair), em posição, passos, progresso,
+colisão, fitness, caminho e tabela de aprendizado.
+
+Os sorteios da heurística gulosa são fixados: o lote roda no modo
+determinístico e, no loop de referência, random.random, random.choice e
+random.randrange de genetic devolvem os mesmos sorteios (hash do prefixo
+de genes lidos de cada indivíduo).
+"""
+import random
+import numpy as np
+import pytest
+from src import genetic
+from src.batch import BatchSimulation, DRAW_OFFSETS, PREFIX_SEED, encode_genomes, mix64
+from src.genetic import R, D, L, U, create_individual, create_population, fitness_function, movimentar
+from src.timeline import Timeline
+
+ROWS, COLS = 20, 30
+TAMANHO = 300
+
+
+class Sorteios:
+    """Substitui o módulo random em genetic: sorteios do prefixo do indivíduo atual"""
+    # Ordem em que o lote sorteia entre os movimentos seguros
+    ORDEM = (R, D, L, U)
+
+    def __init__(self):
+        self.prefixo = np.array([PREFIX_SEED])
+
+    def _uniforme(self, sorteio):
+        z = mix64(self.prefixo + DRAW_OFFSETS[sorteio])
+        return float((z >> np.uint64(11))[0]) * 2.0 ** -53
+
+    def random(self):
+        return self._uniforme(1)
+
+    def choice(self, moves):
+        # A lista vem ordenada pela distância; o lote conta os seguros na ordem R, D, L, U
+        moves = sorted(moves, key=lambda m: self.ORDEM.index(m[0]))
+        return moves[int(self._uniforme(0) * len(moves))]
+
+    def randrange(self, n):
+        return int(self._uniforme(2) * n)
+
+
+def referencia(population, timeline, end_pos, monkeypatch):
+    """Loop de main.run com movimentar, com os sorteios do modo determinístico"""
+    sorteios = Sorteios()
+    monkeypatch.setattr(genetic, 'random', sorteios)
+    prefixos = [np.array([PREFIX_SEED]) for _ in population]
+
+    for t in range(timeline.max_iter):
+        if not any(ind.vivo for ind in population):
+            break
+        matrix = timeline.array(t).tolist()
+        for i, ind in enumerate(population):
+            if not ind.vivo:
+                continue
+            hist = ind.historico_movimento
+            lido = hist[ind.passos] if ind.passos < len(hist) else 4
+            prefixos[i] = mix64(prefixos[i] + np.uint64(lido))
+            sorteios.prefixo = prefixos[i]
+            movimentar(matrix, ind, end_pos)
+            if not ind.vivo:
+                ind.fitness = fitness_function(ind, end_pos, ROWS, COLS)
+
+    for ind in population:
+        if ind.fitness == 0:
+            ind.fitness = fitness_function(ind, end_pos, ROWS, COLS)
+
+
+def estado(ind):
+    return (ind.x, ind.y, ind.passos, ind.max_progresso, ind.vivo, ind.colidiu, ind.fitness,
+            ind.caminho.tolist(), sorted(ind.aprendizado.items()))
+
+
+@pytest.mark.parametrize('semente, verdes, genes', [
+    (1, 0.25, None),  # Genes até o fim do horizonte
+    (2, 0.4, 12),     # Genes curtos: heurística gulosa e direção aleatória sem gene
+    (3, 0.1, 40),
+])
+def test_lote_igual_a_movimentar(semente, verdes, genes, monkeypatch):
+    rng = np.random.default_rng(semente)
+    grid = (rng.random((ROWS, COLS)) < verdes).astype(int)
+    grid[:3, :3] = 0  # Saída livre perto do início
+    grid[0, 0] = 3
+    grid[-1, -1] = 4
+    timeline = Timeline(grid.tolist(), 3 * (ROWS + COLS))
+    end_pos = (COLS - 1, ROWS - 1)
+
+    random.seed(semente)
+    population = create_population(ROWS, COLS, TAMANHO)
+    if genes is not None:
+        population = [create_individual(ROWS, COLS, genes=ind.historico_movimento[:genes])
+                      for ind in population]
+    lote = [create_individual(ROWS, COLS, genes=bytearray(ind.historico_movimento))
+            for ind in population]
+
+    sim = BatchSimulation(encode_genomes(lote), end_pos, ROWS, COLS, podar=False,
+                          proximidade=False, deterministico=True)
+    sim.simular(timeline.arrays(timeline.max_iter), timeline.safe_masks(timeline.max_iter))
+    sim.finalizar(lote)
+    referencia(population, timeline, end_pos, monkeypatch)
+
+    for i, (ind, ref) in enumerate(zip(lote, population)):
+        assert estado(ind) == estado(ref), i
+    # Os ramos da heurística foram exercitados
+    assert any(ind.colidiu for ind in population)
+    assert len({ind.passos for ind in population}) > 10
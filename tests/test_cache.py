@@ -0,0 +1,102 @@
+"""
+Teste diferencial do cache de fitness: ao longo de vários ciclos de
+reproduce, o resultado da população pelo FitnessCache (genomas repetidos
+do cache, os novos retomados de snapshots por prefixo) deve ser igual ao
+de simular a geração inteira do início, campo a campo, nos eventos de
+aprendizado e nas estatísticas; no processo e com ParallelEvaluator.
+"""
+import numpy as np
+import pytest
+from src.batch import BatchSimulation
+from src.cache import CAMPOS, FitnessCache
+from src.config import DETERMINISTIC_EVAL
+from src.genetic import reproduce
+from src.parallel import ParallelEvaluator
+from src.solver import goal_reachability, time_to_goal
+from src.timeline import Timeline
+
+pytestmark = pytest.mark.skipif(not DETERMINISTIC_EVAL, reason="cache requer avaliacao deterministica")
+
+ROWS, COLS = 18, 26
+TAMANHO = 300
+CICLOS = 5
+
+
+@pytest.fixture(scope='module')
+def mapa():
+    """Timeline de uma matriz aleatória, com objetivo e tabelas do solver"""
+    rng = np.random.default_rng(42)
+    grid = (rng.random((ROWS, COLS)) < 0.25).astype(int)
+    grid[0, 0] = 3
+    grid[-1, -1] = 4
+    max_iter = 3 * (ROWS + COLS)
+    timeline = Timeline(grid.tolist(), max_iter)
+    end_pos = (COLS - 1, ROWS - 1)
+    return {
+        'timeline': timeline, 'end_pos': end_pos,
+        'frames': timeline.arrays(max_iter), 'mascaras': timeline.safe_masks(max_iter),
+        'tabela': time_to_goal(timeline, end_pos),
+        'alcance': goal_reachability(timeline, end_pos),
+    }
+
+
+def nova(mapa, genomes, **kwargs):
+    return BatchSimulation(genomes, mapa['end_pos'], ROWS, COLS, caminho=False,
+                           tabela=mapa['tabela'], alcance=mapa['alcance'], **kwargs)
+
+
+def eventos(sim):
+    """Eventos (índice, código, direção, delta) agrupados por indivíduo, em ordem"""
+    idx, codes, direcoes, deltas = (np.concatenate(parte) for parte in zip(*sim.eventos))
+    ordem = np.argsort(idx, kind='stable')
+    return idx[ordem], codes[ordem], direcoes[ordem], deltas[ordem]
+
+
+def comparar(sim, ref):
+    for campo in CAMPOS:
+        np.testing.assert_array_equal(getattr(sim, campo), getattr(ref, campo), err_msg=campo)
+    for a, b in zip(eventos(sim), eventos(ref)):
+        np.testing.assert_array_equal(a, b)
+    assert sim.stats.vivos == ref.stats.vivos
+    assert sim.stats.avaliados == ref.stats.avaliados
+    assert sim.stats.soma_progresso == ref.stats.soma_progresso
+    assert sim.stats.best == ref.stats.best
+    assert sim.stats.avg == pytest.approx(ref.stats.avg)
+
+
+@pytest.fixture(params=['local', 'paralelo'])
+def simular(request, mapa):
+    """simular(genomas, retomada, intervalo) como em main.run"""
+    rng = np.random.default_rng(0)
+    if request.param == 'paralelo':
+        evaluator = ParallelEvaluator(mapa['timeline'], mapa['end_pos'], ROWS, COLS, 2,
+                                      mapa['tabela'], mapa['alcance'])
+        yield lambda genomes, retomada, intervalo: evaluator.evaluate(genomes, rng, retomada, intervalo)
+        evaluator.close()
+        return
+
+    def local(genomes, retomada, intervalo):
+        sim = nova(mapa, genomes, rng=rng, intervalo=intervalo)
+        if retomada is not None:
+            sim.retomar(*retomada)
+        return sim.simular(mapa['frames'], mapa['mascaras'])
+    yield local
+
+
+def test_cache_e_retomada_iguais_a_simular(mapa, simular):
+    rng = np.random.default_rng(7)
+    genomes = rng.integers(0, 4, (TAMANHO, len(mapa['timeline']) - 1), dtype=np.uint8)
+    cache = FitnessCache(intervalo=10)
+
+    for _ in range(CICLOS):
+        ref = nova(mapa, genomes).simular(mapa['frames'], mapa['mascaras'])
+        ref.concluir()
+        sim = cache.evaluate(nova(mapa, genomes), simular)
+        sim.concluir()
+        comparar(sim, ref)
+
+        genomes, *_ = reproduce(genomes, ref.fitness, TAMANHO, 20, 10, 0.3, rng)
+
+    # O teste só vale se o cache respondeu e retomou de snapshots
+    assert cache.acertos > 0
+    assert cache.retomados > 0 and cache.passos_poupados > 0
@@ -0,0 +1,82 @@
+"""
+Teste diferencial do autômato: propagar (referência em listas),
+propagar_array e o bitboard devem produzir os mesmos quadros, inclusive
+com células de início/fim (3 e 4), que nunca mudam. Os códigos de estado
+local e as máscaras de movimentos seguros vetorizados são conferidos contra
+as funções por célula.
+"""
+import numpy as np
+import pytest
+from src.cellular import (
+    propagar, propagar_array, neighborhood_codes, safe_move_mask, get_state_code,
+    is_safe_position
+)
+from src.bitboard import Bitboard
+from src.genetic import MOVE_DELTAS
+from src.timeline import Timeline
+
+PASSOS = 12
+
+
+def random_grid(rng, rows, cols, verdes=0.4, especiais=0.05):
+    """Matriz aleatória (lista de listas) com 0, 1, 3 e 4"""
+    grid = (rng.random((rows, cols)) < verdes).astype(int)
+    fixas = rng.random((rows, cols)) < especiais
+    grid[fixas] = rng.choice([3, 4], size=int(fixas.sum()))
+    return grid.tolist()
+
+
+def casos():
+    rng = np.random.default_rng(1234)
+    formas = [(1, 1), (1, 7), (7, 1), (2, 2), (5, 8), (13, 9), (20, 31), (65, 85)]
+    for rows, cols in formas:
+        for verdes in (0.1, 0.4, 0.7):
+            yield random_grid(rng, rows, cols, verdes)
+
+
+CASOS = list(casos())
+
+
+@pytest.mark.parametrize('grid', CASOS)
+def test_propagar_array_igual_propagar(grid):
+    esperado = grid
+    atual = np.array(grid)
+    for _ in range(PASSOS):
+        esperado = propagar(esperado)
+        atual = propagar_array(atual)
+        assert atual.tolist() == esperado
+
+
+@pytest.mark.parametrize('grid', CASOS)
+def test_bitboard_igual_propagar(grid):
+    board = Bitboard(grid)
+    esperado = grid
+    bits = board.bits
+    for _ in range(PASSOS):
+        esperado = propagar(esperado)
+        bits = board.step(bits)
+        assert bits == board.encode(esperado)
+
+
+@pytest.mark.parametrize('grid', CASOS)
+def test_timeline_engines_iguais(grid):
+    bitboard = Timeline(grid, PASSOS, engine='bitboard')
+    numpy = Timeline(grid, PASSOS, engine='numpy')
+    esperado = grid
+    for t in range(PASSOS + 1):
+        assert bitboard.array(t).tolist() == esperado
+        assert numpy.array(t).tolist() == esperado
+        esperado = propagar(esperado)
+
+
+@pytest.mark.parametrize('grid', CASOS[:12])
+def test_codigos_e_mascaras_iguais_as_funcoes_por_celula(grid):
+    matrix = np.array(grid, dtype=np.int8)
+    ys, xs = np.indices(matrix.shape)
+    xs, ys = xs.ravel(), ys.ravel()
+    codigos = neighborhood_codes(matrix, xs, ys)
+    mascara = safe_move_mask(matrix)
+    for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        assert codigos[i] == get_state_code(grid, x, y)
+        for d, (dx, dy) in enumerate(MOVE_DELTAS):
+            assert bool(mascara[y, x] >> d & 1) == is_safe_position(grid, x + dx, y + dy)
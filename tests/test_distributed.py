@@ -0,0 +1,152 @@
+"""
+Avaliação distribuída em localhost: coordenador (RemoteEvaluator) e workers
+em processos. O resultado da geração deve ser igual ao da avaliação local
+quando um worker morre no meio dela (o lote dele volta para a fila), e um
+lote mais demorado que o timeout não é dado como perdido enquanto o worker
+avisa VIVO.
+"""
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import numpy as np
+import pytest
+from src import distributed
+from src.batch import BatchSimulation
+from src.cache import CAMPOS
+from src.config import DETERMINISTIC_EVAL
+from src.distributed import RemoteEvaluator, run_worker
+from src.solver import goal_reachability, time_to_goal
+from src.timeline import Timeline
+
+pytestmark = pytest.mark.skipif(not DETERMINISTIC_EVAL,
+                                reason="lotes com sementes diferentes so batem com avaliacao deterministica")
+
+ROWS, COLS = 18, 26
+TAMANHO = 300
+# Workers herdam do teste os módulos (e o que ele trocou neles)
+CTX = multiprocessing.get_context('fork')
+
+
+@pytest.fixture
+def cenario(tmp_path):
+    """matrix.txt aleatória, genomas e o resultado da avaliação local"""
+    rng = np.random.default_rng(11)
+    grid = (rng.random((ROWS, COLS)) < 0.25).astype(int)
+    grid[:3, :3] = 0
+    grid[0, 0] = 3
+    grid[-1, -1] = 4
+    arquivo = tmp_path / 'matrix.txt'
+    arquivo.write_text('\n'.join(' '.join(map(str, linha)) for linha in grid.tolist()))
+
+    max_iter = 3 * (ROWS + COLS)
+    timeline = Timeline(grid.tolist(), max_iter)
+    end_pos = (COLS - 1, ROWS - 1)
+    tabela = time_to_goal(timeline, end_pos)
+    alcance = goal_reachability(timeline, end_pos)
+    genomes = rng.integers(0, 4, (TAMANHO, max_iter), dtype=np.uint8)
+    local = BatchSimulation(genomes, end_pos, ROWS, COLS, caminho=False, tabela=tabela,
+                            alcance=alcance)
+    local.simular(timeline.arrays(max_iter), timeline.safe_masks(max_iter))
+
+    processos = []
+    avaliadores = []
+
+    def coordenador(**kwargs):
+        evaluator = RemoteEvaluator(('127.0.0.1', 0), str(arquivo), end_pos, ROWS, COLS, max_iter,
+                                    tabela, alcance=alcance, **kwargs)
+        avaliadores.append(evaluator)
+        return evaluator
+
+    def worker(evaluator):
+        p = CTX.Process(target=run_worker, args=(evaluator.endereco, str(tmp_path / 'cache')),
+                        daemon=True)
+        p.start()
+        processos.append(p)
+        return p
+
+    yield {'genomes': genomes, 'local': local, 'coordenador': coordenador, 'worker': worker}
+
+    for evaluator in avaliadores:
+        evaluator.close()
+    for p in processos:
+        p.kill()
+        p.join()
+
+
+def esperar(condicao, prazo=30):
+    fim = time.monotonic() + prazo
+    while not condicao():
+        assert time.monotonic() < fim, "tempo esgotado"
+        time.sleep(0.01)
+
+
+def avaliar(evaluator, genomes):
+    """evaluate numa thread (o teste age no meio da geração): (thread, saída)"""
+    saida = {}
+    thread = threading.Thread(
+        target=lambda: saida.update(sim=evaluator.evaluate(genomes, np.random.default_rng(0))),
+        daemon=True
+    )
+    thread.start()
+    return thread, saida
+
+
+def eventos(sim):
+    """Eventos (índice, código, direção, delta) agrupados por indivíduo, em ordem"""
+    idx, codes, direcoes, deltas = (np.concatenate(parte) for parte in zip(*sim.eventos))
+    ordem = np.argsort(idx, kind='stable')
+    return idx[ordem], codes[ordem], direcoes[ordem], deltas[ordem]
+
+
+def comparar(sim, ref):
+    for campo in CAMPOS:
+        np.testing.assert_array_equal(getattr(sim, campo), getattr(ref, campo), err_msg=campo)
+    for a, b in zip(eventos(sim), eventos(ref)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_worker_morto_no_meio_da_geracao(cenario, capsys):
+    evaluator = cenario['coordenador'](lote=20)
+    parado = cenario['worker'](evaluator)
+    cenario['worker'](evaluator)
+    esperar(lambda: evaluator.workers == 2)
+
+    # Congelado já conectado: pega um lote da geração e não responde
+    os.kill(parado.pid, signal.SIGSTOP)
+    avaliacao, saida = avaliar(evaluator, cenario['genomes'])
+
+    # Todos os lotes na fila e o outro worker a esvaziou: a geração só
+    # espera o lote do congelado
+    fila = evaluator._pendentes
+    esperar(lambda: fila.unfinished_tasks == TAMANHO // 20 and fila.empty())
+    assert avaliacao.is_alive()
+    parado.kill()
+    avaliacao.join(60)
+
+    assert not avaliacao.is_alive()
+    assert "volta para a fila" in capsys.readouterr().out
+    comparar(saida['sim'], cenario['local'])
+
+
+def test_lote_mais_longo_que_o_timeout(cenario, capsys, monkeypatch):
+    class Lenta(BatchSimulation):
+        def simular(self, frames, mascaras=None):
+            time.sleep(1.5)
+            return super().simular(frames, mascaras)
+
+    evaluator = cenario['coordenador'](lote=TAMANHO, timeout=0.5)
+    # O worker (criado por fork) simula devagar e avisa VIVO a cada 0.1 s
+    monkeypatch.setattr(distributed, 'BatchSimulation', Lenta)
+    monkeypatch.setattr(distributed, 'REMOTE_HEARTBEAT', 0.1)
+    cenario['worker'](evaluator)
+    esperar(lambda: evaluator.workers == 1)
+
+    # Sem os avisos, o lote volta para a fila a cada tentativa e a geração não termina
+    avaliacao, saida = avaliar(evaluator, cenario['genomes'])
+    avaliacao.join(30)
+
+    assert not avaliacao.is_alive()
+    assert "saiu" not in capsys.readouterr().out
+    comparar(saida['sim'], cenario['local'])
@@ -0,0 +1,151 @@
+"""
+Checkpoints .npz completos e delta: ida e volta por load_checkpoint e
+restore_population, e os casos em que a base de um delta é regravada,
+substituída ou seria apagada pela retenção (keep).
+"""
+import random
+import shutil
+import numpy as np
+import pytest
+from src.genetic import create_individual, create_population
+from src.persistence import (
+    CheckpointWriter, CheckpointError, save_checkpoint, load_checkpoint,
+    restore_population, read_checkpoint_meta, read_manifest
+)
+
+WIDTH, HEIGHT = 12, 9
+
+
+def populacao(semente, tamanho=40):
+    """População com genes aleatórios e tabelas de aprendizado preenchidas"""
+    random.seed(semente)
+    rng = np.random.default_rng(semente)
+    population = create_population(WIDTH, HEIGHT, tamanho)
+    for ind in population:
+        for code in rng.integers(0, 2**50, 5).tolist():
+            ind.aprendizado.set(code, rng.normal(size=4).tolist())
+    return population
+
+
+def proxima(population, semente):
+    """Geração seguinte: metade igual, metade com genes e aprendizado novos"""
+    rng = np.random.default_rng(semente)
+    nova = []
+    for i, pai in enumerate(population):
+        filho = create_individual(WIDTH, HEIGHT, genes=bytearray(pai.historico_movimento))
+        filho.cor = pai.cor
+        filho.aprendizado = pai.aprendizado.copy()
+        if i % 2:
+            filho.historico_movimento[int(rng.integers(len(filho.historico_movimento)))] ^= 1
+            filho.aprendizado.add(int(rng.integers(2**50)), int(rng.integers(4)), 0.5)
+        nova.append(filho)
+    return nova
+
+
+def conteudo(population):
+    """Genes, cor e aprendizado de cada indivíduo (para comparar populações)"""
+    return [(bytes(ind.historico_movimento), tuple(ind.cor), sorted(ind.aprendizado.items()))
+            for ind in population]
+
+
+def carregar(filename):
+    pop_data, state = load_checkpoint(str(filename))
+    return restore_population(pop_data, WIDTH, HEIGHT), state
+
+
+def gravar(writer, populacoes, pasta, primeira=1):
+    """Salva cada população como checkpoint_gen{N}.npz e espera a gravação"""
+    nomes = []
+    for geracao, population in enumerate(populacoes, primeira):
+        nome = pasta / f"checkpoint_gen{geracao}.npz"
+        writer.save(population, {'geracao': geracao, 'best_fitness': 1.0}, str(nome))
+        writer.flush()
+        nomes.append(nome)
+    return nomes
+
+
+def geracoes(n):
+    populacoes = [populacao(1)]
+    for i in range(1, n):
+        populacoes.append(proxima(populacoes[-1], i))
+    return populacoes
+
+
+@pytest.fixture
+def writer():
+    writer = CheckpointWriter(compress=False, keep=0, full_every=5)
+    yield writer
+    writer.close()
+
+
+def test_completo_e_delta_ida_e_volta(tmp_path, writer):
+    populacoes = geracoes(3)
+    nomes = gravar(writer, populacoes, tmp_path)
+
+    assert 'base' not in read_checkpoint_meta(str(nomes[0]))
+    for nome in nomes[1:]:
+        assert read_checkpoint_meta(str(nome))['base'] == nomes[0].name
+    # O delta guarda só os genomas que não estão na base
+    with np.load(nomes[1]) as delta, np.load(nomes[0]) as base:
+        assert len(delta['genes']) < len(base['genes'])
+
+    for nome, population in zip(nomes, populacoes):
+        restaurada, state = carregar(nome)
+        assert conteudo(restaurada) == conteudo(population)
+        assert state['geracao'] == int(nome.stem.split('gen')[1])
+
+
+def test_salvar_de_novo_no_nome_da_base(tmp_path, writer):
+    primeira, segunda = geracoes(2)
+    base, = gravar(writer, [primeira], tmp_path)
+    writer.save(segunda, {'geracao': 2, 'best_fitness': 1.0}, str(base))
+    writer.flush()
+
+    # Um delta não pode ter a si mesmo como base: o arquivo volta a ser completo
+    assert 'base' not in read_checkpoint_meta(str(base))
+    assert conteudo(carregar(base)[0]) == conteudo(segunda)
+
+
+def test_sobrescrever_base_regrava_os_deltas(tmp_path, writer):
+    populacoes = geracoes(3)
+    base, *deltas = gravar(writer, populacoes, tmp_path)
+
+    save_checkpoint(populacao(99), {'geracao': 9, 'best_fitness': 1.0}, str(base),
+                    compress=False, keep=0)
+
+    for nome, population in zip(deltas, populacoes[1:]):
+        assert 'base' not in read_checkpoint_meta(str(nome))
+        assert conteudo(carregar(nome)[0]) == conteudo(population)
+    assert not any(e.get('base') for e in read_manifest(str(tmp_path)))
+
+
+def test_base_substituida_ou_apagada_gera_erro(tmp_path, writer):
+    base, delta = gravar(writer, geracoes(2), tmp_path)
+    outra = tmp_path / 'outra_checkpoint.npz'
+    save_checkpoint(populacao(7), {'geracao': 1, 'best_fitness': 0.0}, str(outra),
+                    compress=False, keep=0)
+
+    # Base trocada por fora (sem passar pelo writer): base_id não confere
+    shutil.copyfile(outra, base)
+    with pytest.raises(CheckpointError):
+        load_checkpoint(str(delta))
+
+    base.unlink()
+    with pytest.raises(CheckpointError):
+        load_checkpoint(str(delta))
+
+
+def test_keep_nao_apaga_base_de_delta_mantido(tmp_path):
+    writer = CheckpointWriter(compress=False, keep=2, full_every=5)
+    try:
+        populacoes = geracoes(4)
+        nomes = gravar(writer, populacoes, tmp_path)
+    finally:
+        writer.close()
+
+    # Só os 2 mais recentes ficam, mais a base de que eles dependem
+    assert [n.exists() for n in nomes] == [True, False, True, True]
+    indice = {e['filename'] for e in read_manifest(str(tmp_path))}
+    assert indice == {nomes[0].name, nomes[2].name, nomes[3].name}
+    for nome, population in zip(nomes[2:], populacoes[2:]):
+        assert conteudo(carregar(nome)[0]) == conteudo(population)